@@ -1,17 +1,48 @@
 import sys
+import threading
 from datetime import datetime
-import bcrypt  # For password hashing
 from PyQt5.QtWidgets import (
     QApplication, QWidget, QPushButton, QLabel, QLineEdit, QVBoxLayout,
-    QHBoxLayout, QMessageBox, QTableWidget, QTableWidgetItem, QFrame,
-    QGridLayout, QHeaderView, QMainWindow, QSizePolicy, QSpacerItem
+    QHBoxLayout, QMessageBox, QTableWidget, QTableWidgetItem, QTableView, QFrame,
+    QGridLayout, QHeaderView, QMainWindow, QSizePolicy, QSpacerItem, QFileDialog, QProgressDialog,
+    QComboBox, QAbstractItemView
 )
-from PyQt5.QtCore import Qt, QRect
+from PyQt5.QtCore import Qt, QRect, pyqtSlot
 from PyQt5.QtGui import QPainter, QColor, QPen, QFont
-from PyQt5.QtChart import QChart, QChartView, QLineSeries, QPieSeries, QValueAxis
+from PyQt5 import sip
+from PyQt5.QtChart import QBarCategoryAxis, QChart, QChartView, QLineSeries, QPieSeries, QValueAxis
 
 # Backend functions (keep your existing db.py)
-from db import load_employees, save_employees, get_employee, delete_employee, save_payrolls, load_payrolls
+from payroll import compute
+from db import (EmployeeStore, SUMMARY_COLUMNS, get_login_record, load_employee_page,
+                delete_employee, delete_employees, save_payrolls, load_payroll_page, update_employees)
+from bulk_io import FIELD_PARSERS, export_employees, import_employees
+from dashboard_stats import EMPTY_STATS, cached_stats, get_dashboard_stats
+from employee_cache import get_cache
+from instrumentation import record_error, traced
+from migrations import migrate
+from passwords import DEFAULT_PASSWORD
+from purger import purge_deleted
+from search_index import get_index
+from table_models import ButtonDelegate, EmployeeTableModel
+from workers import AsyncDb, EmployeeChangeNotifier, PasswordService, ProgressReporter, change_feed_poller
+
+# Rows fetched each time the Employee Data / payroll tables are scrolled to the bottom
+EMPLOYEE_PAGE_SIZE = 200
+# Best matches shown while searching Employee Data
+SEARCH_RESULTS = 50
+# Employee Data bulk edit: (label, field) that can be set, and (label, scope) it can be applied to
+BULK_EDIT_CHOICES = [("Days worked", "days"), ("Department", "department"), ("Status", "status"),
+                     ("Salary", "salary")]
+BULK_EDIT_SCOPES = [("Selected employees", "selected"), ("Department", "department"), ("Status", "status")]
+# Set when the app quits: a background purge stops after its current batch
+PURGE_STOP = threading.Event()
+
+# (header, employee field) per table column; None is the painted Delete action
+EMPLOYEE_TABLE_COLUMNS = [("Key", "username"), ("Name", "name"), ("ID", "id"), ("Email", "email"),
+                          ("Department", "department"), ("Salary", "salary"), ("Actions", None)]
+PAY_TABLE_COLUMNS = [("Name", "name"), ("ID", "id"), ("Base Salary", "salary"), ("Days Worked", "days"),
+                     ("Calculated Salary", "gross")]
 
 # ------------------ Global Design Tokens ------------------
 PALETTE = {
@@ -105,7 +136,7 @@ QFrame.panel {{
 }}
 
 /* Table */
-QTableWidget {{
+QTableView {{
     background: {PALETTE['card']};
     border-radius: 8px;
 }}
@@ -296,10 +327,27 @@ class DashboardWindow(QMainWindow):
         self.setGeometry(160, 80, 1200, 720)
         self.showMaximized()
 
-        # Load employees from DB (backend handled separately)
-        self.employees = load_employees()
-        if not isinstance(self.employees, dict):
-            self.employees = {}
+        # Database calls run on worker threads; results arrive through callbacks on the GUI thread
+        self.db = AsyncDb(self)
+        self.current_view = None
+        # Employees edited this session, written back in batches; the views page from the database
+        self.employees = EmployeeStore(columns=SUMMARY_COLUMNS)
+        # Dashboard figures; the shared cache is invalidated by every write through db.py
+        self.stats = cached_stats() or EMPTY_STATS
+        # Employee records shared with the other windows; writes from any of them (or a payroll
+        # run or import) arrive as changed(usernames) and update just those rows
+        self.cache = get_cache()
+        self.stale_rows = set()  # Changed usernames whose rows are being re-read
+        self.changes = EmployeeChangeNotifier(self)
+        self.changes.changed.connect(self.employees_changed)
+        # Writes by other admins and payroll_runner.py come in through the change feed
+        change_feed_poller().watch(self)
+
+        # bcrypt runs in a process pool; results come back through these signals
+        self.passwords = PasswordService(self)
+        self.passwords.hashed.connect(self.finish_save_employee)
+        self.passwords.failed.connect(
+            lambda tag, error: QMessageBox.critical(self, "Error", f"Failed to save employee: {error}"))
 
         # Central widget + layout
         main_widget = QWidget()
@@ -321,9 +369,20 @@ class DashboardWindow(QMainWindow):
         self.content_area.setLayout(self.content_layout)
         main_layout.addWidget(self.content_area, 1)
 
-        # Header + start dashboard
+        # Header + start dashboard; it fills in once the statistics have loaded
         self.show_dashboard_view()
 
+    def refresh_stats(self):
+        # One aggregate query on a worker thread, or the cached result if nothing was written since
+        self.db.run("dashboard_stats", get_dashboard_stats, on_result=self.stats_loaded,
+                    on_error=lambda error: QMessageBox.critical(self, "Error", f"Failed to load dashboard: {error}"))
+
+    @traced("ui.stats_loaded")
+    def stats_loaded(self, stats):
+        self.stats = stats
+        if self.current_view == "dashboard":
+            self.show_dashboard_view()
+
     def create_sidebar(self):
         frame = QFrame()
         frame.setFixedWidth(260)
@@ -381,8 +440,18 @@ class DashboardWindow(QMainWindow):
             if widget is not None:
                 widget.deleteLater()
 
+    # Button handlers are declared @pyqtSlot() so clicked(bool) doesn't pass `checked` through @traced
+    @pyqtSlot()
+    @traced("ui.show_dashboard_view")
     def show_dashboard_view(self):
         self.clear_content()
+        self.current_view = "dashboard"
+        fresh = cached_stats()
+        if fresh is not None:
+            self.stats = fresh
+        else:
+            self.refresh_stats()  # Shows the last known figures until the new ones arrive
+        stats = self.stats
 
         # Modified header with Admin text on right and logout button on left
         header_row = QHBoxLayout()
@@ -424,25 +493,18 @@ class DashboardWindow(QMainWindow):
         stats_row = QHBoxLayout()
         stats_row.setSpacing(20)  # Increased spacing for better separation
 
-        total_employees = len(self.employees)
-        active = sum(1 for e in self.employees.values() if e.get("status", "Active") == "Active")
-        inactive = max(0, total_employees - active)
-        pending_pay = sum(1 for e in self.employees.values() if e.get("pending", False))
+        total_employees = stats.total
 
-        cpb_active = CircularProgressBar(active, max(1, total_employees), "Active Staff", PALETTE['accent'])
+        cpb_active = CircularProgressBar(stats.active, max(1, total_employees), "Active Staff", PALETTE['accent'])
         cpb_active.setMinimumWidth(180)  # Enforce minimum width for text
-        cpb_inactive = CircularProgressBar(inactive, max(1, total_employees), "Inactive", "#06b6d4")
+        cpb_inactive = CircularProgressBar(stats.inactive, max(1, total_employees), "Inactive", "#06b6d4")
         cpb_inactive.setMinimumWidth(180)  # Enforce minimum width for text
         stats_row.addWidget(cpb_active)
         stats_row.addWidget(cpb_inactive)
 
         card_total = self.make_colored_card("Total Employees", str(total_employees))
-        card_pending = self.make_colored_card("Pending Payroll", str(pending_pay))
-        total_pay = sum(
-            ((e.get('salary', 0) / 30) * e.get('days', 0) - 0.15 * ((e.get('salary', 0) / 30) * e.get('days', 0)))
-            for e in self.employees.values() if e.get("pending", False)
-        )
-        card_revenue = self.make_colored_card("This Month Payroll", f"₱ {total_pay:.2f}")
+        card_pending = self.make_colored_card("Pending Payroll", str(stats.pending))
+        card_revenue = self.make_colored_card("This Month Payroll", f"₱ {stats.pending_net:.2f}")
         stats_row.addWidget(card_total)
         stats_row.addWidget(card_pending)
         stats_row.addWidget(card_revenue)
@@ -455,9 +517,9 @@ class DashboardWindow(QMainWindow):
         charts_row = QHBoxLayout()
         charts_row.setSpacing(20)  # Increased spacing
 
-        line = self.create_line_chart()
+        line = self.create_line_chart(stats.trend)
         line.setMaximumWidth(600)  # Limit line chart width to prevent it from dominating
-        pie = self.create_pie_chart()
+        pie = self.create_pie_chart(stats.departments)
         charts_row.addWidget(line, 1)  # Reduced stretch factor from 2 to 1
         charts_row.addWidget(pie, 1)  # Keep pie chart stretch at 1
         charts_widget = QWidget()
@@ -473,17 +535,12 @@ class DashboardWindow(QMainWindow):
         activity_title = QLabel("Recent Payroll Activity")
         activity_title.setStyleSheet("font-size: 16px; font-weight:700;")
         activity_layout.addWidget(activity_title)
-        last = sorted(self.employees.values(), key=lambda e: e.get("created_at", datetime.min), reverse=True)[:6]
-        if not last:
+        if not stats.recent:
             activity_layout.addWidget(QLabel("No recent payroll activity"))
         else:
-            for e in last:
-                name = e.get("name", "-")
-                empid = e.get("id", "-")
-                pending = "Pending" if e.get("pending", False) else "Approved"
-                salary = (e.get("salary", 0) / 30) * e.get("days", 0)
-                net_salary = salary - 0.15 * salary
-                lbl = QLabel(f"{name} (ID: {empid}) — {pending} (Net: ₱{net_salary:.2f})")
+            for e in stats.recent:
+                pending = "Pending" if e["pending"] else "Approved"
+                lbl = QLabel(f"{e['name']} (ID: {e['id']}) — {pending} (Net: ₱{e['net']:.2f})")
                 lbl.setStyleSheet("color: #475569; font-size: 12px; margin-top: 4px;")
                 activity_layout.addWidget(lbl)
         activity_frame.setLayout(activity_layout)
@@ -496,17 +553,10 @@ class DashboardWindow(QMainWindow):
         stats_title = QLabel("Quick Stats")
         stats_title.setStyleSheet("font-size: 16px; font-weight:700;")
         stats_layout.addWidget(stats_title)
-        total_employees = max(1, total_employees)
-        avg_salary = sum(e.get("salary", 0) for e in self.employees.values()) / total_employees
-        avg_days = sum(e.get("days", 0) for e in self.employees.values()) / total_employees
-        dept_count = {}
-        for e in self.employees.values():
-            d = e.get("department", "Unknown")
-            dept_count[d] = dept_count.get(d, 0) + 1
-        if dept_count:
-            largest_dept = max(dept_count, key=dept_count.get)
-            stats_layout.addWidget(QLabel(f"Average Monthly Salary: ₱{avg_salary:.2f}"))
-            stats_layout.addWidget(QLabel(f"Average Days Worked: {avg_days:.1f}"))
+        if stats.departments:
+            largest_dept = stats.departments[0][0]
+            stats_layout.addWidget(QLabel(f"Average Monthly Salary: ₱{stats.avg_salary:.2f}"))
+            stats_layout.addWidget(QLabel(f"Average Days Worked: {stats.avg_days:.1f}"))
             stats_layout.addWidget(QLabel(f"Largest Department: {largest_dept}"))
         stats_frame.setLayout(stats_layout)
         lower_row.addWidget(stats_frame, 1)
@@ -515,41 +565,39 @@ class DashboardWindow(QMainWindow):
         lower_widget.setLayout(lower_row)
         self.content_layout.addWidget(lower_widget)
 
-    def create_line_chart(self):
+    def create_line_chart(self, trend):
         series = QLineSeries()
-        # Dummy data
-        for x in range(6):
-            series.append(x, 15000 + x * 1000 + (x % 3) * 2000)
+        # trend is [(month, net payroll)] from the monthly rollup, oldest first
+        for x, (_, net) in enumerate(trend):
+            series.append(x, float(net))
 
         chart = QChart()
         chart.addSeries(series)
-        chart.setTitle("Payroll Trend (Sample)")
-        chart.createDefaultAxes()
+        chart.setTitle("Payroll Trend (Net per Month)")
         chart.setAnimationOptions(QChart.SeriesAnimations)
         chart.legend().hide()
 
-        axisX = QValueAxis()
-        axisX.setTickCount(6)
-        axisX.setLabelFormat("%d")
+        axisX = QBarCategoryAxis()
+        axisX.append([month.strftime("%b %Y") for month, _ in trend] or ["No payroll yet"])
         chart.setAxisX(axisX, series)
+        axisY = QValueAxis()
+        axisY.setRange(0, max([float(net) for _, net in trend], default=0) * 1.1 or 1)
+        axisY.setLabelFormat("%.0f")
+        chart.setAxisY(axisY, series)
 
         view = QChartView(chart)
         view.setRenderHint(QPainter.Antialiasing)
         view.setStyleSheet("background-color: white; border-radius: 12px;")
         return view
 
-    def create_pie_chart(self):
+    def create_pie_chart(self, departments):
         series = QPieSeries()
 
-        # Compute actual department data (replacing dummy)
-        dept_count = {}
-        for e in self.employees.values():
-            d = e.get("department", "Unknown")
-            dept_count[d] = dept_count.get(d, 0) + 1
-        total = max(1, sum(dept_count.values()))  # Avoid division by zero
+        # departments is [(department, employees)], largest first
+        total = max(1, sum(count for _, count in departments))  # Avoid division by zero
 
-        # Sort by size, take top 6 to avoid overcrowding
-        sorted_depts = sorted(dept_count.items(), key=lambda x: x[1], reverse=True)[:6]
+        # Take top 6 to avoid overcrowding
+        sorted_depts = departments[:6]
 
         colors = ["#7C3AED", "#EF4444", "#F59E0B", "#10B981", "#3B82F6", "#06B6D4"]
         for i, (dept, count) in enumerate(sorted_depts):
@@ -587,8 +635,11 @@ class DashboardWindow(QMainWindow):
         w.setLayout(layout)
         return w
 
+    @pyqtSlot()
+    @traced("ui.show_manage_view")
     def show_manage_view(self):
         self.clear_content()
+        self.current_view = "manage"
 
         header = QHBoxLayout()
         title = QLabel("Manage Payroll")
@@ -676,33 +727,42 @@ class DashboardWindow(QMainWindow):
         btn_widget.setLayout(btn_row)
         self.content_layout.addWidget(btn_widget)
 
-        self.pay_table = QTableWidget()
-        self.pay_table.setColumnCount(5)
-        self.pay_table.setHorizontalHeaderLabels(["Name", "ID", "Base Salary", "Days Worked", "Calculated Salary"])
+        self.pay_table = QTableView()
+        # Headers only until "Calculate Payroll" gives it a page loader
+        self.pay_table.setModel(EmployeeTableModel(PAY_TABLE_COLUMNS, None, self.pay_table))
         self.pay_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
         self.pay_table.setStyleSheet("background-color: white; border-radius: 8px;")
         self.content_layout.addWidget(self.pay_table)
 
+    @pyqtSlot()
+    @traced("ui.load_employee")
     def load_employee(self):
         key = self.input_name.text().strip()
         if not key:
             QMessageBox.warning(self, "Error", "Enter Username to load.")
             return
-        try:
-            emp = get_employee(key)
-            if emp:
-                self.input_email.setText(emp.get("email", ""))
-                self.input_empid.setText(emp.get("id", ""))
-                self.input_salary.setText(str(emp.get("salary", "")))
-                self.input_days.setText(str(emp.get("days", "")))
-                self.input_dept.setText(emp.get("department", ""))
-                # Password not loaded for security
-                QMessageBox.information(self, "Loaded", f"Employee '{key}' loaded.")
-            else:
-                QMessageBox.warning(self, "Not Found", f"Employee '{key}' not found.")
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"Failed to load: {str(e)}")
+        # A newer Load replaces one still in flight
+        self.db.run("get_employee", self.cache.get, key,
+                    on_result=lambda emp: self.employee_loaded(key, emp),
+                    on_error=lambda error: QMessageBox.critical(self, "Error", f"Failed to load: {error}"))
+
+    @traced("ui.employee_loaded")
+    def employee_loaded(self, key, emp):
+        if sip.isdeleted(self.input_email):
+            return  # Left Manage Payroll before the employee arrived
+        if emp:
+            self.input_email.setText(emp.get("email", ""))
+            self.input_empid.setText(emp.get("id", ""))
+            self.input_salary.setText(str(emp.get("salary", "")))
+            self.input_days.setText(str(emp.get("days", "")))
+            self.input_dept.setText(emp.get("department", ""))
+            # Password not loaded for security
+            QMessageBox.information(self, "Loaded", f"Employee '{key}' loaded.")
+        else:
+            QMessageBox.warning(self, "Not Found", f"Employee '{key}' not found.")
 
+    @pyqtSlot()
+    @traced("ui.save_employee")
     def save_employee(self):
         key = self.input_name.text().strip()
         if not key:
@@ -730,58 +790,155 @@ class DashboardWindow(QMainWindow):
 
         password_text = self.input_password.text().strip()
         if password_text:
-            salt = bcrypt.gensalt()
-            emp['password'] = bcrypt.hashpw(password_text.encode(), salt).decode()
+            self.passwords.hash(password_text, (key, emp))
+        elif key in self.employees:
+            self.finish_save_employee((key, emp), None)  # Keep the stored hash
         else:
-            if key in self.employees:
-                emp['password'] = self.employees[key]['password']
-            else:
-                salt = bcrypt.gensalt()
-                emp['password'] = bcrypt.hashpw(b"123", salt).decode()
+            # Existing employees keep their hash; new ones get the default password
+            self.db.run(f"employee_exists:{key}", self.cache.get, key,
+                        on_result=lambda existing: self.save_with_default_password(key, emp, existing),
+                        on_error=lambda error: QMessageBox.critical(self, "Error", f"Failed to save employee: {error}"))
+
+    def save_with_default_password(self, key, emp, existing):
+        if existing:
+            self.finish_save_employee((key, emp), None)
+        else:
+            self.passwords.hash(DEFAULT_PASSWORD, (key, emp))
 
+    @traced("ui.finish_save_employee")
+    def finish_save_employee(self, tag, hashed):
+        # Called directly, or by PasswordService once the new password hash is ready
+        key, emp = tag
+        emp['password'] = hashed
         self.employees[key] = emp
-        try:
-            save_employees(self.employees)
-            self.employees = load_employees()
-            QMessageBox.information(self, "Saved", f"Employee '{key}' saved.")
-            self.input_name.clear()
-            self.input_email.clear()
-            self.input_empid.clear()
-            self.input_salary.clear()
-            self.input_days.clear()
-            self.input_dept.clear()
-            self.input_password.clear()
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"Failed to save employee: {str(e)}")
-
+        changes = self.employees.take_changes()
+        # Write-through: the cache keeps the rows as saved and every open view is told
+        self.db.run(f"save_employee:{key}", self.cache.write, changes, write=True,
+                    on_result=lambda fresh: self.employee_saved(key, changes, fresh),
+                    on_error=lambda error: self.employee_save_failed(changes, error))
+
+    @traced("ui.employee_saved")
+    def employee_saved(self, key, changes, fresh):
+        self.employees.apply(changes, fresh)
+        QMessageBox.information(self, "Saved", f"Employee '{key}' saved.")
+        self.clear_employee_form()
+
+    def employee_save_failed(self, changes, error):
+        self.employees.dirty.update(changes)  # Retried with the next save
+        QMessageBox.critical(self, "Error", f"Failed to save employee: {error}")
+
+    def clear_employee_form(self):
+        if sip.isdeleted(self.input_name):
+            return  # Navigated away from Manage Payroll while the password was hashing
+        self.input_name.clear()
+        self.input_email.clear()
+        self.input_empid.clear()
+        self.input_salary.clear()
+        self.input_days.clear()
+        self.input_dept.clear()
+        self.input_password.clear()
+
+    @pyqtSlot()
+    @traced("ui.calculate_payroll_table")
     def calculate_payroll_table(self):
-        self.pay_table.setRowCount(0)
-        for idx, (key, emp) in enumerate(self.employees.items()):
-            salary = (emp.get("salary", 0) / 30) * emp.get("days", 0)
-            self.pay_table.insertRow(idx)
-            self.pay_table.setItem(idx, 0, QTableWidgetItem(emp.get("name", key)))
-            self.pay_table.setItem(idx, 1, QTableWidgetItem(emp.get("id", "")))
-            self.pay_table.setItem(idx, 2, QTableWidgetItem(str(emp.get("salary", 0))))
-            self.pay_table.setItem(idx, 3, QTableWidgetItem(str(emp.get("days", 0))))
-            self.pay_table.setItem(idx, 4, QTableWidgetItem(str(round(salary, 2))))
+        self.pay_model = EmployeeTableModel(PAY_TABLE_COLUMNS, self.load_pay_table_page, self.pay_table)
+        self.pay_table.setModel(self.pay_model)
+        self.pay_model.fetchMore()
+
+    def load_pay_table_page(self, after, on_page):
+        columns = [field for _, field in PAY_TABLE_COLUMNS if field not in ("username", "gross")]
+        self.db.run("pay_table_page", load_employee_page, after, EMPLOYEE_PAGE_SIZE, columns=columns,
+                    on_result=on_page)
 
+    @pyqtSlot()
+    @traced("ui.approve_payroll")
     def approve_payroll(self):
-        try:
-            save_payrolls(self.employees)
-            self.employees = load_employees()
-            QMessageBox.information(self, "Payroll Approved",
-                                    "Payroll processed, saved to history, and employees notified.")
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"Failed to approve payroll: {str(e)}")
+        if self.db.is_running("approve_payroll"):
+            QMessageBox.information(self, "Payroll", "Payroll approval is already in progress.")
+            return
+        # save_payrolls reads the pending employees itself, in the same pass that processes them
+        self.db.run("approve_payroll", save_payrolls, write=True, on_result=self.payroll_approved,
+                    on_error=lambda error: QMessageBox.critical(self, "Error", f"Failed to approve payroll: {error}"))
+
+    def changed_model(self):
+        # The table on screen, if it is one whose rows can be refreshed
+        if self.current_view == "employees":
+            return self.emp_model
+        if self.current_view == "manage":
+            model = self.pay_table.model()  # Headers only until "Calculate Payroll"
+            return model if model is getattr(self, 'pay_model', None) else None
+        return None
+
+    @traced("ui.employees_changed")
+    def employees_changed(self, usernames):
+        # Edited employees not yet saved keep their edits; the rest are re-read when next needed
+        stale = list(self.employees) if usernames is None else [u for u in usernames if u in self.employees]
+        self.employees.apply([u for u in stale if u not in self.employees.dirty], {})
+        if self.current_view == "dashboard":
+            self.refresh_stats()
+            return
+        model = self.changed_model()
+        if model is None:
+            return
+        if usernames is None:
+            model.reload()
+            return
+        stale = model.loaded(usernames)
+        if not stale:
+            return  # None of them are on screen
+        self.stale_rows.update(stale)
+        # A newer change replaces a re-read still in flight, so each request carries every stale row
+        pending = sorted(self.stale_rows)
+        self.db.run("refresh_rows", self.cache.get_many, pending,
+                    on_result=lambda records: self.rows_refreshed(model, pending, records))
+
+    @traced("ui.rows_refreshed")
+    def rows_refreshed(self, model, usernames, records):
+        self.stale_rows.difference_update(usernames)
+        if not sip.isdeleted(model) and model is self.changed_model():
+            model.update_rows(usernames, records)
+
+    @traced("ui.payroll_approved")
+    def payroll_approved(self, result):
+        if self.current_view == "dashboard":
+            self.show_dashboard_view()  # The approval invalidated the cached statistics
+        # Employees already paid for the period stay pending for the next one
+        skipped = (f"{result.skipped} pending employees were already paid for {result.period:%B %Y}."
+                   if result.skipped else "")
+        if not result.paid:
+            QMessageBox.information(self, "Payroll", skipped or "No pending employees.")
+            return
+        QMessageBox.information(self, "Payroll Approved",
+                                f"Payroll processed for {result.paid} employees, saved to history, and employees notified."
+                                + (f"\n{skipped}" if skipped else ""))
 
+    @pyqtSlot()
+    @traced("ui.show_employees_view")
     def show_employees_view(self):
         self.clear_content()
+        self.current_view = "employees"
 
         header = QHBoxLayout()
         title = QLabel("Employee Data")
         title.setStyleSheet("font-size:18px; font-weight:700;")
         header.addWidget(title)
         header.addStretch()
+        self.search_input = QLineEdit()
+        self.search_input.setPlaceholderText("Search name, email, ID or department")
+        self.search_input.setClearButtonEnabled(True)
+        self.search_input.setFixedWidth(320)
+        self.search_input.textChanged.connect(self.search_employees)
+        header.addWidget(self.search_input)
+        import_btn = QPushButton("Import CSV")
+        import_btn.setObjectName("secondaryBtn")
+        import_btn.setFixedHeight(36)
+        import_btn.clicked.connect(self.import_employees)
+        header.addWidget(import_btn)
+        export_btn = QPushButton("Export CSV")
+        export_btn.setObjectName("secondaryBtn")
+        export_btn.setFixedHeight(36)
+        export_btn.clicked.connect(self.export_employees)
+        header.addWidget(export_btn)
         logout_btn = QPushButton("Logout")
         logout_btn.setObjectName("logoutBtn")
         logout_btn.setFixedHeight(36)
@@ -791,37 +948,230 @@ class DashboardWindow(QMainWindow):
         header_widget.setLayout(header)
         self.content_layout.addWidget(header_widget)
 
-        self.emp_table = QTableWidget()
-        self.emp_table.setColumnCount(7)
-        self.emp_table.setHorizontalHeaderLabels(["Key", "Name", "ID", "Email", "Department", "Salary", "Actions"])
+        # One change for the selected rows or everyone matching a filter, applied in a single UPDATE
+        bulk_row = QHBoxLayout()
+        bulk_row.addWidget(QLabel("Set"))
+        self.bulk_field = QComboBox()
+        for label, field in BULK_EDIT_CHOICES:
+            self.bulk_field.addItem(label, field)
+        bulk_row.addWidget(self.bulk_field)
+        bulk_row.addWidget(QLabel("to"))
+        self.bulk_value = QLineEdit()
+        self.bulk_value.setPlaceholderText("New value")
+        bulk_row.addWidget(self.bulk_value)
+        bulk_row.addWidget(QLabel("for"))
+        self.bulk_scope = QComboBox()
+        for label, scope in BULK_EDIT_SCOPES:
+            self.bulk_scope.addItem(label, scope)
+        bulk_row.addWidget(self.bulk_scope)
+        self.bulk_filter = QLineEdit()
+        self.bulk_filter.setPlaceholderText("Department / status to match")
+        bulk_row.addWidget(self.bulk_filter)
+        bulk_btn = QPushButton("Apply")
+        bulk_btn.setObjectName("secondaryBtn")
+        bulk_btn.clicked.connect(self.apply_bulk_edit)
+        bulk_row.addWidget(bulk_btn)
+        bulk_delete_btn = QPushButton("Delete")
+        bulk_delete_btn.setObjectName("secondaryBtn")
+        bulk_delete_btn.clicked.connect(self.bulk_delete)
+        bulk_row.addWidget(bulk_delete_btn)
+        bulk_widget = QWidget()
+        bulk_widget.setLayout(bulk_row)
+        self.content_layout.addWidget(bulk_widget)
+
+        self.emp_table = QTableView()
+        self.emp_model = EmployeeTableModel(EMPLOYEE_TABLE_COLUMNS, self.load_employee_table_page, self.emp_table)
+        self.emp_table.setModel(self.emp_model)
         self.emp_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
-        self.emp_table.setRowCount(0)
-        for idx, (key, emp) in enumerate(self.employees.items()):
-            self.emp_table.insertRow(idx)
-            self.emp_table.setItem(idx, 0, QTableWidgetItem(key))
-            self.emp_table.setItem(idx, 1, QTableWidgetItem(emp.get("name", "")))
-            self.emp_table.setItem(idx, 2, QTableWidgetItem(emp.get("id", "")))
-            self.emp_table.setItem(idx, 3, QTableWidgetItem(emp.get("email", "")))
-            self.emp_table.setItem(idx, 4, QTableWidgetItem(emp.get("department", "")))
-            self.emp_table.setItem(idx, 5, QTableWidgetItem(str(emp.get("salary", ""))))
-            delete_btn = QPushButton("Delete")
-            delete_btn.setObjectName("secondaryBtn")
-            delete_btn.clicked.connect(lambda checked, k=key: self.delete_employee(k))
-            self.emp_table.setCellWidget(idx, 6, delete_btn)
+        self.emp_table.verticalHeader().setDefaultSectionSize(36)
+        # Ctrl/Shift-click rows to pick them for a bulk edit
+        self.emp_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.emp_table.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        # Painted, not a QPushButton per row
+        delete_delegate = ButtonDelegate("Delete", "#EFF6FF", PALETTE['sidebar'], self.emp_table)
+        delete_delegate.clicked.connect(lambda row: self.delete_employee(self.emp_model.username(row)))
+        self.emp_table.setItemDelegateForColumn(len(EMPLOYEE_TABLE_COLUMNS) - 1, delete_delegate)
         self.emp_table.setStyleSheet("background-color: white; border-radius: 8px;")
         self.content_layout.addWidget(self.emp_table)
+        self.emp_model.fetchMore()
+        # Index built once per process, off the GUI thread, ready for the first keystroke
+        self.db.run("search_index", get_index().ensure_built)
+
+    @traced("ui.search_employees")
+    def search_employees(self, text):
+        # Search results, or the whole table again when the box is cleared
+        text = text.strip()
+        if text:
+            load_page = lambda after, on_page: self.db.run("employee_search", self.search_page, text,
+                                                           on_result=on_page)
+        else:
+            load_page = self.load_employee_table_page
+        previous = self.emp_model
+        self.emp_model = EmployeeTableModel(EMPLOYEE_TABLE_COLUMNS, load_page, self.emp_table)
+        self.emp_table.setModel(self.emp_model)
+        previous.deleteLater()
+        self.emp_model.fetchMore()
+
+    def search_page(self, text):
+        # Worker thread: the best matches as one page of cached records, in match order
+        usernames = get_index().search(text, SEARCH_RESULTS)
+        records = self.cache.get_many(usernames)
+        return {username: records[username] for username in usernames if username in records}, None
+
+    def load_employee_table_page(self, after, on_page):
+        # Only the columns the table shows; further pages load as the table is scrolled
+        columns = [field for _, field in EMPLOYEE_TABLE_COLUMNS if field not in ("username", None)]
+        self.db.run("employee_page", load_employee_page, after, EMPLOYEE_PAGE_SIZE, columns=columns,
+                    on_result=on_page)
+
+    def bulk_target(self, title):
+        """update_employees / delete_employees targeting for the bulk scope chosen, and its description.
+
+        Returns (None, None) after warning if the selection or filter is missing.
+        """
+        scope = self.bulk_scope.currentData()
+        if scope == "selected":
+            rows = self.emp_table.selectionModel().selectedRows()
+            if not rows:
+                QMessageBox.warning(self, title, "Select employees in the table first (Ctrl/Shift-click).")
+                return None, None
+            usernames = [self.emp_model.username(index.row()) for index in rows]
+            return {'usernames': usernames}, f"{len(rows)} selected employees"
+        match = self.bulk_filter.text().strip()
+        if not match:
+            QMessageBox.warning(self, title, f"Enter the {scope} to match.")
+            return None, None
+        try:
+            match = FIELD_PARSERS[scope](match)
+        except ValueError as e:
+            QMessageBox.warning(self, title, str(e))
+            return None, None
+        return {scope: match}, f"every employee with {scope} '{match}'"
+
+    @pyqtSlot()
+    @traced("ui.apply_bulk_edit")
+    def apply_bulk_edit(self):
+        label, field = self.bulk_field.currentText(), self.bulk_field.currentData()
+        text = self.bulk_value.text().strip()
+        if not text:
+            QMessageBox.warning(self, "Bulk Edit", f"Enter the new {label.lower()}.")
+            return
+        try:
+            value = FIELD_PARSERS[field](text)
+        except ValueError as e:
+            QMessageBox.warning(self, "Bulk Edit", str(e))
+            return
+        target, description = self.bulk_target("Bulk Edit")
+        if target is None:
+            return
+        reply = QMessageBox.question(self, "Bulk Edit", f"Set {label.lower()} to '{value}' for {description}?",
+                                     QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+        if reply != QMessageBox.Yes:
+            return
+        # The changed rows update in place through employees_changed
+        self.db.run("bulk_edit", update_employees, {field: value}, **target, write=True,
+                    on_result=lambda count: QMessageBox.information(self, "Bulk Edit", f"Updated {count} employees."),
+                    on_error=lambda error: QMessageBox.critical(self, "Error", f"Bulk edit failed: {error}"))
+
+    @pyqtSlot()
+    @traced("ui.bulk_delete")
+    def bulk_delete(self):
+        target, description = self.bulk_target("Delete")
+        if target is None:
+            return
+        reply = QMessageBox.question(self, "Confirm Delete", f"Are you sure you want to delete {description}?",
+                                     QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+        if reply != QMessageBox.Yes:
+            return
+        # One UPDATE stamping deleted_at; the rows leave the table through employees_changed
+        self.db.run("bulk_delete", delete_employees, **target, write=True,
+                    on_result=self.employees_deleted,
+                    on_error=lambda error: QMessageBox.critical(self, "Error", f"Failed to delete: {error}"))
+
+    def employees_deleted(self, count):
+        QMessageBox.information(self, "Deleted", f"Deleted {count} employees.")
+        self.purge_deleted()
+
+    def purge_deleted(self):
+        # Payroll history and rows of deleted employees, a throttled batch at a time; a purge
+        # already running picks up the newly deleted too
+        self.db.run("purge_deleted", purge_deleted, stop=PURGE_STOP,
+                    on_error=self.purge_failed)
+
+    def purge_failed(self, error):
+        # Deleted employees stay in the table until a purge succeeds; the next delete retries
+        record_error(error)
+        QMessageBox.critical(self, "Error", f"Failed to purge deleted employees: {error}")
+
+    def bulk_progress(self, label):
+        # Modal progress bar fed from the worker thread; file and row counts can exceed int range
+        dialog = QProgressDialog(label, None, 0, 1000, self)
+        dialog.setWindowTitle("Employee Data")
+        dialog.setWindowModality(Qt.WindowModal)
+        dialog.setMinimumDuration(0)
+        reporter = ProgressReporter(dialog)
+        reporter.changed.connect(lambda done, total: dialog.setValue(int(done * 1000 / total) if total else 1000))
+        return dialog, reporter
+
+    @pyqtSlot()
+    @traced("ui.import_employees")
+    def import_employees(self):
+        if self.db.is_running("bulk_import"):
+            QMessageBox.information(self, "Import", "An import is already in progress.")
+            return
+        path, _ = QFileDialog.getOpenFileName(self, "Import Employees", "", "CSV files (*.csv);;All files (*)")
+        if not path:
+            return
+        dialog, reporter = self.bulk_progress("Importing employees...")
+        # Streams the file and upserts it chunk by chunk on a worker thread
+        self.db.run("bulk_import", import_employees, path, write=True,
+                    progress=lambda rows, done, total: reporter(done, total),
+                    on_result=lambda result: self.employees_imported(dialog, result),
+                    on_error=lambda error: self.bulk_failed(dialog, "Import failed", error))
+
+    @traced("ui.employees_imported")
+    def employees_imported(self, dialog, result):
+        dialog.close()
+        message = (f"Imported {result.imported} employees ({result.created} new) from {result.rows} rows."
+                   f"\n{result.rejected} rows rejected.")
+        if result.errors:
+            message += "\n\n" + "\n".join(f"Line {line}: {error}" for line, error in result.errors[:10])
+        QMessageBox.information(self, "Import", message)
+        if self.current_view == "employees":
+            self.show_employees_view()  # Reload the table from the first page
+
+    @pyqtSlot()
+    @traced("ui.export_employees")
+    def export_employees(self):
+        path, _ = QFileDialog.getSaveFileName(self, "Export Employees", "employees.csv", "CSV files (*.csv)")
+        if not path:
+            return
+        dialog, reporter = self.bulk_progress("Exporting employees...")
+        self.db.run("bulk_export", export_employees, path, progress=reporter,
+                    on_result=lambda count: self.employees_exported(dialog, path, count),
+                    on_error=lambda error: self.bulk_failed(dialog, "Export failed", error))
+
+    def employees_exported(self, dialog, path, count):
+        dialog.close()
+        QMessageBox.information(self, "Export", f"Exported {count} employees to {path}.")
+
+    def bulk_failed(self, dialog, title, error):
+        dialog.close()
+        QMessageBox.critical(self, "Error", f"{title}: {error}")
 
     def delete_employee(self, username):
         reply = QMessageBox.question(self, 'Confirm Delete', f"Are you sure you want to delete '{username}'?",
                                      QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
         if reply == QMessageBox.Yes:
-            try:
-                delete_employee(username)
-                self.employees = load_employees()
-                self.show_employees_view()
-                QMessageBox.information(self, "Deleted", f"Employee '{username}' deleted.")
-            except Exception as e:
-                QMessageBox.critical(self, "Error", f"Failed to delete: {str(e)}")
+            self.db.run(f"delete_employee:{username}", delete_employee, username, write=True,
+                        on_result=lambda _: self.employee_deleted(username),
+                        on_error=lambda error: QMessageBox.critical(self, "Error", f"Failed to delete: {error}"))
+
+    @traced("ui.employee_deleted")
+    def employee_deleted(self, username):
+        self.employees.apply([username], {})  # The table drops the row when employees_changed arrives
+        QMessageBox.information(self, "Deleted", f"Employee '{username}' deleted.")
+        self.purge_deleted()
 
     def logout(self):
         self.close()
@@ -868,20 +1218,38 @@ class EmployeeLogin(QWidget):
 
         self.setLayout(layout)
 
+        self.passwords = PasswordService(self)
+        self.passwords.verified.connect(self.finish_login)
+        self.passwords.failed.connect(self.login_failed)
+
     def check_login(self):
         try:
-            employees = load_employees()
             key = self.username.text().strip()
-            if key in employees and bcrypt.checkpw(self.password.text().encode(),
-                                                   employees[key].get("password", "").encode()):
-                self.emp_view = EmployeeDashboard(key)
-                self.emp_view.showMaximized()
-                self.close()
+            emp = get_login_record(key) if key else None
+            if emp:
+                # Verify off the GUI thread; finish_login opens the dashboard
+                self.login_btn.setEnabled(False)
+                self.passwords.verify(self.password.text(), emp.pop("password"), (key, emp))
             else:
                 QMessageBox.warning(self, "Error", "Invalid Employee Credentials")
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Login failed: {str(e)}")
 
+    def finish_login(self, tag, ok):
+        self.login_btn.setEnabled(True)
+        key, emp = tag
+        if ok:
+            get_cache().put_many({key: emp})
+            self.emp_view = EmployeeDashboard(key, emp)
+            self.emp_view.showMaximized()
+            self.close()
+        else:
+            QMessageBox.warning(self, "Error", "Invalid Employee Credentials")
+
+    def login_failed(self, tag, error):
+        self.login_btn.setEnabled(True)
+        QMessageBox.critical(self, "Error", f"Login failed: {error}")
+
     def go_back(self):
         self.main = MainWindow()
         self.main.show()
@@ -890,24 +1258,31 @@ class EmployeeLogin(QWidget):
 
 # ------------------ EMPLOYEE DASHBOARD ------------------
 class EmployeeDashboard(QMainWindow):
-    def __init__(self, username):
+    def __init__(self, username, emp=None):
         super().__init__()
         self.username = username
         self.setWindowTitle("Employee Payroll Dashboard")
         self.setGeometry(300, 100, 960, 640)
 
         try:
-            self.employees = load_employees()
-            if self.username not in self.employees:
+            # The login passes the record it already fetched; otherwise look it up
+            self.emp = emp if emp is not None else get_cache().get(self.username)
+            if self.emp is None:
                 QMessageBox.warning(self, "Error", "Employee data not found.")
                 self.close()
                 return
-            self.emp = self.employees[self.username]
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Failed to load employee data: {str(e)}")
             self.close()
             return
 
+        # Database calls run on worker threads; results arrive through callbacks on the GUI thread
+        self.db = AsyncDb(self)
+        # Saves by an admin and payroll approvals, here or in another process, re-read this employee's record
+        self.changes = EmployeeChangeNotifier(self)
+        self.changes.changed.connect(self.employees_changed)
+        change_feed_poller().watch(self)
+
         main_widget = QWidget()
         main_layout = QHBoxLayout()
         main_widget.setLayout(main_layout)
@@ -983,6 +1358,7 @@ class EmployeeDashboard(QMainWindow):
 
     def show_dashboard_view(self):
         self.clear_content()
+        self.current_view = "dashboard"
 
         welcome = QLabel(f"Welcome back, {self.emp.get('name', self.username)}! 👋")
         welcome.setStyleSheet("font-size:18px; font-weight:700;")
@@ -1009,9 +1385,7 @@ class EmployeeDashboard(QMainWindow):
         stats_row.addWidget(cpb_attendance)
 
         base_salary = self.emp.get("salary", 0)
-        calculated_salary = (base_salary / 30) * days_worked
-        tax = 0.15 * calculated_salary
-        net_salary = calculated_salary - tax
+        calculated_salary, tax, net_salary = compute(base_salary, days_worked)
         card1 = self.make_stat_card("Base Salary", f"₱{base_salary:.2f}")
         card2 = self.make_stat_card("Net Salary", f"₱{net_salary:.2f}")
         stats_row.addWidget(card1)
@@ -1020,11 +1394,12 @@ class EmployeeDashboard(QMainWindow):
         stats_widget.setLayout(stats_row)
         self.content_layout.addWidget(stats_widget)
 
-        pie = self.create_salary_pie_chart(calculated_salary, tax, net_salary)
+        pie = self.create_salary_pie_chart(float(calculated_salary), float(tax), float(net_salary))
         self.content_layout.addWidget(pie)
 
     def show_payroll_view(self):
         self.clear_content()
+        self.current_view = "payroll"
 
         title = QLabel("Payroll Status")
         title.setStyleSheet("font-size:16px; font-weight:700;")
@@ -1037,9 +1412,7 @@ class EmployeeDashboard(QMainWindow):
         table.setRowCount(1)
         base_salary = self.emp.get("salary", 0)
         days_worked = self.emp.get("days", 0)
-        calculated_salary = (base_salary / 30) * days_worked
-        tax = 0.15 * calculated_salary
-        net_salary = calculated_salary - tax
+        calculated_salary, tax, net_salary = compute(base_salary, days_worked)
         table.setItem(0, 0, QTableWidgetItem(self.emp.get("id", "")))
         table.setItem(0, 1, QTableWidgetItem(f"₱{base_salary:.2f}"))
         table.setItem(0, 2, QTableWidgetItem(str(days_worked)))
@@ -1062,29 +1435,73 @@ class EmployeeDashboard(QMainWindow):
 
     def show_pay_history_view(self):
         self.clear_content()
+        self.current_view = "history"
 
         title = QLabel("Pay History")
         title.setStyleSheet("font-size:16px; font-weight:700;")
         self.content_layout.addWidget(title)
 
-        payrolls = load_payrolls(self.username)
-        table = QTableWidget()
-        table.setColumnCount(4)
-        table.setHorizontalHeaderLabels(["Processed At", "Gross", "Tax", "Net"])
-        table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
-        table.setRowCount(len(payrolls))
-        for idx, p in enumerate(payrolls):
+        self.history_table = QTableWidget()
+        self.history_table.setColumnCount(4)
+        self.history_table.setHorizontalHeaderLabels(["Processed At", "Gross", "Tax", "Net"])
+        self.history_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.history_table.setStyleSheet("background-color: white; border-radius: 8px;")
+        self.content_layout.addWidget(self.history_table)
+
+        self.history_status = QLabel("Loading payroll history...")
+        self.history_status.setStyleSheet("color: #475569;")
+        self.content_layout.addWidget(self.history_status)
+
+        # Newest page first; each click loads the next older page
+        self.history_older_btn = QPushButton("Load older")
+        self.history_older_btn.setObjectName("secondaryBtn")
+        self.history_older_btn.clicked.connect(self.load_older_pay_history)
+        self.history_older_btn.hide()
+        self.content_layout.addWidget(self.history_older_btn)
+
+        self.history_before = None
+        self.load_older_pay_history()
+
+    def load_older_pay_history(self):
+        self.history_older_btn.setEnabled(False)
+        self.db.run("payrolls", load_payroll_page, self.username, self.history_before,
+                    on_result=self.pay_history_loaded,
+                    on_error=lambda error: QMessageBox.critical(self, "Error", f"Failed to load pay history: {error}"))
+
+    def pay_history_loaded(self, result):
+        if sip.isdeleted(self.history_table):
+            return  # Switched views before the history arrived
+        payrolls, self.history_before = result
+        table = self.history_table
+        first = table.rowCount()
+        table.setRowCount(first + len(payrolls))
+        for idx, p in enumerate(payrolls, first):
             table.setItem(idx, 0, QTableWidgetItem(str(p['processed_at'])))
             table.setItem(idx, 1, QTableWidgetItem(f"₱{p['gross']:.2f}"))
             table.setItem(idx, 2, QTableWidgetItem(f"₱{p['tax']:.2f}"))
             table.setItem(idx, 3, QTableWidgetItem(f"₱{p['net']:.2f}"))
-        table.setStyleSheet("background-color: white; border-radius: 8px;")
-        self.content_layout.addWidget(table)
 
-        if not payrolls:
-            no_history = QLabel("No payroll history available.")
-            no_history.setStyleSheet("color: #475569;")
-            self.content_layout.addWidget(no_history)
+        if table.rowCount():
+            self.history_status.hide()
+        else:
+            self.history_status.setText("No payroll history available.")
+        self.history_older_btn.setVisible(self.history_before is not None)
+        self.history_older_btn.setEnabled(True)
+
+    def employees_changed(self, usernames):
+        if usernames is None or self.username in usernames:
+            self.db.run("employee", get_cache().get, self.username, on_result=self.employee_refreshed)
+
+    def employee_refreshed(self, emp):
+        if emp is None:
+            return  # Deleted; keep showing what was loaded
+        self.emp = emp
+        if self.current_view == "dashboard":
+            self.show_dashboard_view()
+        elif self.current_view == "payroll":
+            self.show_payroll_view()
+        elif self.current_view == "history":
+            self.show_pay_history_view()  # A payroll approval may have added one
 
     def make_stat_card(self, title, value):
         w = QFrame()
@@ -1134,6 +1551,12 @@ if __name__ == "__main__":
     app = QApplication(sys.argv)
     app.setFont(QFont("Segoe UI", 9))
     app.setStyleSheet(GLOBAL_STYLE)
+    app.aboutToQuit.connect(PURGE_STOP.set)
+    try:
+        migrate()  # The views rely on the current schema; applies only what an older database lacks
+    except Exception as e:
+        QMessageBox.critical(None, "Database Error", f"Could not update the database schema: {e}")
+        sys.exit(1)
     window = MainWindow()
     window.show()
-    sys.exit(app.exec_())
\ No newline at end of file
+    sys.exit(app.exec_())
\ No newline at end of file
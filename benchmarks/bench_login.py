@@ -0,0 +1,50 @@
+"""Employee login latency against table size: full-table load (old check_login) vs. db.authenticate.
+
+Usage: python benchmarks/bench_login.py [employees ...]   (default: 1000 10000 100000)
+
+Runs on the SQLite stand-in. Hashes use bcrypt cost 4 so the numbers show the data-access
+cost; production hashes add the same constant bcrypt time to both paths.
+"""
+import sys
+import time
+
+import bcrypt
+
+import sqlite_standin  # Puts the repo root on sys.path
+import db
+
+PASSWORD = b"123"
+LOGINS = 20
+
+
+def legacy_login(username):
+    """The pre-authenticate path: load every employee, then check one hash."""
+    employees = db.load_employees()
+    return username in employees and bcrypt.checkpw(PASSWORD, employees[username]['password'].encode())
+
+
+def indexed_login(username):
+    return db.authenticate(username, PASSWORD.decode()) is not None
+
+
+def timed(func, usernames):
+    start = time.perf_counter()
+    for username in usernames:
+        assert func(username)
+    return (time.perf_counter() - start) * 1000 / len(usernames)
+
+
+def main(sizes):
+    password_hash = bcrypt.hashpw(PASSWORD, bcrypt.gensalt(rounds=4)).decode()
+    print(f"{'employees':>9} {'full load ms/login':>19} {'authenticate ms/login':>22}")
+    for size in sizes:
+        conn = sqlite_standin.install()
+        sqlite_standin.populate(conn, size, password_hash=password_hash)
+        usernames = [f"user{i * size // LOGINS:07d}" for i in range(LOGINS)]
+        legacy = timed(legacy_login, usernames[:3])  # A few are enough, each one reads the whole table
+        indexed = timed(indexed_login, usernames)
+        print(f"{size:>9} {legacy:>19.2f} {indexed:>22.2f}")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [1000, 10000, 100000])
@@ -0,0 +1,66 @@
+"""Memory held per loaded employee: the old dict-per-row load vs. db.load_employees' slotted records.
+
+Usage: python benchmarks/bench_memory.py [employees ...]   (default: 100000)
+
+Runs on the SQLite stand-in with 60-character bcrypt-style hashes. Counts the bytes still
+allocated (tracemalloc) once the {username: employee} map is built, divided by the number of
+employees; usernames are held by both and included.
+"""
+import gc
+import sys
+import tracemalloc
+
+import sqlite_standin  # Puts the repo root on sys.path
+import db
+
+PASSWORD_HASH = "$2b$12$" + "x" * 53
+
+
+def legacy_load():
+    """The pre-EmployeeRecord load: SELECT *, one 11-key dict per row, hash and timestamps included."""
+    conn = db.get_connection()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT * FROM employees")
+            employees = {}
+            for row in cursor.fetchall():
+                emp = {key: row[column] for key, column in db.EMPLOYEE_COLUMNS.items() if column in row}
+                emp['salary'] = float(emp['salary'])
+                emp['pending'] = bool(emp['pending'])
+                employees[row['username']] = emp
+            return employees
+    finally:
+        conn.close()
+
+
+def retained_bytes(load):
+    """Bytes still allocated after load() returns, with its result kept alive."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        result = load()
+        gc.collect()
+        return tracemalloc.get_traced_memory()[0] - before, len(result)
+    finally:
+        tracemalloc.stop()
+
+
+def main(sizes):
+    loads = [
+        ("dict per row (old)", legacy_load),
+        ("EmployeeRecord", db.load_employees),
+        ("EmployeeRecord, SUMMARY_COLUMNS", lambda: db.load_employees(columns=db.SUMMARY_COLUMNS)),
+    ]
+    print(f"{'employees':>9}  {'representation':<32} {'bytes/employee':>15} {'MiB':>8}")
+    for size in sizes:
+        conn = sqlite_standin.install()
+        sqlite_standin.populate(conn, size, password_hash=PASSWORD_HASH)
+        for name, load in loads:
+            held, count = retained_bytes(load)
+            assert count == size
+            print(f"{size:>9}  {name:<32} {held / size:>15.0f} {held / 2 ** 20:>8.1f}")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [100000])
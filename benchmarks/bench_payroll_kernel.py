@@ -0,0 +1,48 @@
+"""Throughput of the payroll kernel: per-dict Python expression vs. payroll.compute / compute_batch.
+
+Usage: python benchmarks/bench_payroll_kernel.py [employees ...]   (default: 1000 10000 100000)
+"""
+import random
+import sys
+import time
+
+import standin  # Puts the repo root on sys.path
+import payroll
+
+
+def make_employees(count, seed=42):
+    rng = random.Random(seed)
+    return [{'salary': round(rng.uniform(20000, 100000), 2), 'days': rng.randint(0, 30)} for _ in range(count)]
+
+
+def per_dict_expression(employees):
+    """What every call site did before payroll.py existed."""
+    return [(e['salary'] / 30) * e['days'] - 0.15 * ((e['salary'] / 30) * e['days']) for e in employees]
+
+
+def scalar_path(employees):
+    return [payroll.compute(e['salary'], e['days']).net for e in employees]
+
+
+def batch_from_dicts(employees):
+    return payroll.compute_employees(employees).net
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    func(*args)
+    return (time.perf_counter() - start) * 1000
+
+
+def main(sizes):
+    print(f"{'employees':>9} {'per-dict ms':>12} {'scalar ms':>10} {'batch(dicts) ms':>16} {'batch(columns) ms':>18}")
+    for size in sizes:
+        employees = make_employees(size)
+        salaries = [e['salary'] for e in employees]
+        days = [e['days'] for e in employees]
+        print(f"{size:>9} {timed(per_dict_expression, employees):>12.1f} {timed(scalar_path, employees):>10.1f} "
+              f"{timed(batch_from_dicts, employees):>16.1f} {timed(payroll.compute_batch, salaries, days):>18.1f}")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [1000, 10000, 100000])
@@ -0,0 +1,73 @@
+"""Statements and wall time of a payroll run: legacy per-employee loop vs. db.save_payrolls.
+
+Usage: python benchmarks/bench_payroll_run.py [--rtt-ms 0.2] [employees ...]   (default: 10000)
+
+--rtt-ms adds a simulated network round trip per statement to the stand-in connection.
+The bulk counts include the run lock and the payroll_runs ledger statements (a handful per run,
+plus one progress UPDATE and one paid-check SELECT per chunk).
+"""
+import argparse
+import random
+import time
+
+import standin  # Puts the repo root on sys.path
+import db
+
+
+def make_employees(count, pending_ratio=1.0, seed=42):
+    rng = random.Random(seed)
+    return {
+        f"user{i:07d}": {
+            'salary': round(rng.uniform(20000, 100000), 2),
+            'days': rng.randint(0, 30),
+            'pending': rng.random() < pending_ratio,
+        }
+        for i in range(count)
+    }
+
+
+def legacy_save_payrolls(employees):
+    """The pre-bulk implementation: one INSERT and one UPDATE per pending employee."""
+    conn = db.get_connection()
+    try:
+        with conn.cursor() as cursor:
+            for username, emp in employees.items():
+                if emp.get('pending', False):
+                    gross = (emp.get('salary', 0) / 30) * emp.get('days', 0)
+                    tax = 0.15 * gross
+                    net = gross - tax
+                    cursor.execute("""
+                        INSERT INTO payrolls (employee_username, gross, tax, net)
+                        VALUES (%s, %s, %s, %s)
+                    """, (username, gross, tax, net))
+                    cursor.execute("UPDATE employees SET pending = 0 WHERE username = %s", (username,))
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def measure(label, func, employees, conn):
+    conn.statements = 0
+    start = time.perf_counter()
+    func(employees)
+    elapsed = time.perf_counter() - start
+    per_10k = 10000 / max(1, len(employees))
+    print(f"{label:<8} {len(employees):>9} {conn.statements:>11} {conn.statements * per_10k:>13.0f} "
+          f"{elapsed * 1000:>10.1f} {elapsed * 1000 * per_10k:>14.1f}")
+
+
+def main(sizes, rtt_ms):
+    conn = standin.install(latency=rtt_ms / 1000)
+    print(f"{'impl':<8} {'employees':>9} {'statements':>11} {'stmts/10k':>13} {'wall ms':>10} {'wall ms/10k':>14}")
+    for size in sizes:
+        employees = make_employees(size)
+        measure("legacy", legacy_save_payrolls, employees, conn)
+        measure("bulk", db.save_payrolls, employees, conn)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('sizes', nargs='*', type=int, default=[10000])
+    parser.add_argument('--rtt-ms', type=float, default=0.2)
+    args = parser.parse_args()
+    main(args.sizes, args.rtt_ms)
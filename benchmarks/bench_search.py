@@ -0,0 +1,71 @@
+"""Employee search: index build time and memory, and per-query latency of search_index at scale.
+
+Usage: python benchmarks/bench_search.py [employees ...]   (default: 100000)
+
+Runs on the SQLite stand-in, with the stand-in's synthetic employees renamed to random first/last
+name pairs so name prefixes are as ambiguous as in real data. Each query is timed over repeated
+runs of search() (top 20) once the index is built; search-as-you-type issues one per keystroke.
+The first search after a build also pays for warming up, so the mean and 99th percentile are shown.
+"""
+import gc
+import random
+import sys
+import time
+import tracemalloc
+
+import sqlite_standin  # Puts the repo root on sys.path
+import search_index
+
+FIRST_NAMES = ['John', 'Jane', 'Michael', 'Emily', 'David', 'Sarah', 'James', 'Olivia', 'Robert', 'Sophia',
+               'William', 'Ava', 'Joseph', 'Mia', 'Charles', 'Isabella', 'Thomas', 'Amelia', 'Christopher', 'Evelyn']
+LAST_NAMES = ['Smith', 'Johnson', 'Williams', 'Brown', 'Jones', 'Garcia', 'Miller', 'Davis', 'Rodriguez',
+              'Martinez', 'Hernandez', 'Lopez', 'Gonzalez', 'Wilson', 'Anderson', 'Thomas', 'Taylor', 'Moore',
+              'Jackson', 'Martin']
+
+# Typed a keystroke at a time: short prefixes match most of the table, longer ones a handful
+QUERIES = ['j', 'jo', 'joh', 'john', 'john s', 'john sm', 'john smith', 'garc', 'it', 'customer serv',
+           'user00012', 'emp0004242', '4242', 'example', 'zzz']
+REPEAT = 200
+
+
+def populate(size, seed=7):
+    conn = sqlite_standin.install()
+    sqlite_standin.populate(conn, size)
+    rng = random.Random(seed)
+    conn.raw.executemany("UPDATE employees SET name = ? WHERE username = ?", [
+        (f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}", f"user{i:07d}") for i in range(size)])
+    conn.raw.commit()
+
+
+def main(sizes):
+    for size in sizes:
+        populate(size)
+        gc.collect()
+        tracemalloc.start()  # Slows the build down several times, so it is timed separately below
+        measured = search_index.EmployeeSearchIndex()
+        measured.build()
+        held = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del measured
+        index = search_index.EmployeeSearchIndex()
+        gc.collect()
+        started = time.perf_counter()
+        index.build()
+        build_seconds = time.perf_counter() - started
+        gc.collect()  # Don't time the collection the build's allocations are due
+        print(f"{size} employees: built in {build_seconds:.2f}s, {len(index._words)} words, "
+              f"{held / size:.0f} bytes/employee ({held / 2 ** 20:.1f} MiB)")
+        print(f"  {'query':<16} {'matches':>7} {'mean us':>9} {'p99 us':>9}")
+        for query in QUERIES:
+            timings = []
+            for _ in range(REPEAT):
+                started = time.perf_counter()
+                found = index.search(query)
+                timings.append(time.perf_counter() - started)
+            timings.sort()
+            print(f"  {query!r:<16} {len(found):>7} {sum(timings) / REPEAT * 1e6:>9.1f} "
+                  f"{timings[int(REPEAT * 0.99) - 1] * 1e6:>9.1f}")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [100000])
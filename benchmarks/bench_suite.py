@@ -0,0 +1,252 @@
+"""End-to-end timings of db.py and the admin views at several table sizes, saved as JSON.
+
+Usage: python benchmarks/bench_suite.py [--sizes 1000 10000 100000] [--repeat 3] [--output FILE]
+       python benchmarks/bench_suite.py --backend mysql --database payroll_bench
+       python benchmarks/bench_suite.py --compare BEFORE.json AFTER.json
+
+The sqlite backend is the in-process stand-in (real query plans, no network round trips). The
+mysql backend connects with db.DB_CONFIG to a local MySQL/MariaDB server (e.g. a container) and
+uses --database as a scratch database: it is created, migrated and emptied before every size, so
+never point it at real data. Views are rendered with QT_QPA_PLATFORM=offscreen, from the call
+until the data has arrived and the window has painted. Every result records the git commit, so
+two runs can be compared with --compare.
+"""
+import argparse
+import importlib.util
+import itertools
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+import sqlite_standin  # Puts the repo root on sys.path
+from standin import ROOT
+import dashboard_stats
+import db
+
+HISTORY = 12  # Payroll rows per employee
+LOOKUPS = 100  # get_employee calls per sample
+UPSERTS = 1000  # Employees written per save_employees sample
+SLOWER = 1.2  # --compare flags medians that grew by more than this factor
+RESULTS_DIR = os.path.join(ROOT, 'benchmarks', 'results')  # Default --output location, not committed
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def prepare_sqlite(size):
+    conn = sqlite_standin.install()
+    sqlite_standin.populate(conn, size, payrolls_per_employee=HISTORY)
+
+
+def prepare_mysql(size, database):
+    import pymysql
+    import datagen
+    import migrations
+
+    server = pymysql.connect(**{key: value for key, value in db.DB_CONFIG.items() if key != 'db'})
+    try:
+        with server.cursor() as cursor:
+            cursor.execute(f"CREATE DATABASE IF NOT EXISTS `{database}`")
+    finally:
+        server.close()
+    db.DB_CONFIG['db'] = database  # datagen shares this dict
+    db.configure_pool()
+    migrations.migrate()
+    conn = db.get_connection()
+    try:
+        with conn.cursor() as cursor:
+            for table in ('payrolls', 'payrolls_archive', 'employees', 'payroll_monthly', 'payroll_runs'):
+                cursor.execute(f"TRUNCATE TABLE {table}")
+        conn.commit()
+    finally:
+        conn.close()
+    options = dict(employees=size, payrolls=HISTORY, seed=42, prefix='user', method='insert', chunk_size=10000,
+                   batch=5000, salary=('uniform', 20000, 100000), departments=datagen.DEPARTMENTS,
+                   pending_ratio=0.5, inactive_ratio=0.1, payroll_dist='fixed', max_age_days=365 * 2,
+                   csv_dir=None, now=datetime.now().replace(microsecond=0), password='x')
+    for chunk in range((size + options['chunk_size'] - 1) // options['chunk_size']):
+        datagen.write_chunk(options, chunk)  # In-process, so it uses the scratch database; fills payroll_monthly too
+
+
+def measure(results, name, size, func, repeat, setup=None, calls=1):
+    """Time func() repeat times (after setup(), untimed); records seconds per call."""
+    samples = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) / calls)
+    results.append({'name': name, 'size': size, 'calls': calls, 'seconds': samples,
+                    'min': min(samples), 'median': statistics.median(samples)})
+    print(f"{name:<28} {size:>8} {statistics.median(samples) * 1000:>12.2f} {min(samples) * 1000:>10.2f}")
+
+
+def bench_db(results, size, repeat, key):
+    every = max(1, size // LOOKUPS)
+    lookups = [key(i) for i in range(0, size, every)][:LOOKUPS]
+    upserts = db.get_employees([key(i) for i in range(min(size, UPSERTS))], columns=db.SUMMARY_COLUMNS)
+    for emp in upserts.values():
+        emp['days'] = (emp['days'] + 1) % 31
+
+    def mark_all_pending():
+        conn = db.get_connection()
+        try:
+            with conn.cursor() as cursor:
+                # Undo the previous sample's run, or its employees would be skipped as already paid this month
+                cursor.execute("DELETE FROM payrolls WHERE run_id IS NOT NULL")
+                cursor.execute("DELETE FROM payroll_runs")
+                cursor.execute("UPDATE employees SET pending = 1")
+            conn.commit()
+        finally:
+            conn.close()
+
+    measure(results, "load_employees", size, lambda: db.load_employees(columns=db.SUMMARY_COLUMNS), repeat)
+    measure(results, "get_employee", size, lambda: [db.get_employee(u, columns=db.SUMMARY_COLUMNS) for u in lookups],
+            repeat, calls=len(lookups))
+    measure(results, "save_employees", size, lambda: db.save_employees(upserts), repeat)
+    days = itertools.count()  # A new value every sample, so every row really changes
+    measure(results, "update_employees", size, lambda: db.update_employees({'days': next(days) % 31}, department='Sales'),
+            repeat)
+    measure(results, "load_payrolls", size, lambda: [db.load_payrolls(u) for u in lookups[:10]], repeat,
+            calls=min(10, len(lookups)))
+    measure(results, "load_payroll_page", size, lambda: [db.load_payroll_page(u) for u in lookups[:10]], repeat,
+            calls=min(10, len(lookups)))
+    measure(results, "load_dashboard_aggregates", size, db.load_dashboard_aggregates, repeat)
+    measure(results, "save_payrolls", size, db.save_payrolls, repeat, setup=mark_all_pending)
+
+
+def load_app():
+    from PyQt5.QtWidgets import QApplication, QMessageBox
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    for name in ('information', 'warning', 'critical'):
+        # A modal box would block the run; report instead
+        setattr(QMessageBox, name, staticmethod(lambda parent, title, text, *args: print(f"[{title}] {text}")))
+    spec = importlib.util.spec_from_file_location('payroll_app', os.path.join(ROOT, 'Payroll System(IT5).py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return app, module
+
+
+def wait_until(app, condition, timeout=120):
+    deadline = time.perf_counter() + timeout
+    while not condition():
+        if time.perf_counter() > deadline:
+            raise TimeoutError("View did not finish loading")
+        app.processEvents()
+        time.sleep(0.0005)
+
+
+def bench_views(results, size, repeat, app, module):
+    window = module.DashboardWindow('bench')
+    wait_until(app, lambda: not window.db.is_running("dashboard_stats"))
+
+    def dashboard_cold():
+        dashboard_stats.invalidate()
+        window.show_dashboard_view()
+        wait_until(app, lambda: not window.db.is_running("dashboard_stats"))
+        window.grab()
+
+    def dashboard_cached():
+        window.show_dashboard_view()
+        window.grab()
+
+    def employees_view():
+        window.show_employees_view()
+        wait_until(app, lambda: window.emp_model.rowCount() > 0 or not window.db.is_running("employee_page"))
+        window.grab()
+
+    def payroll_table():
+        window.calculate_payroll_table()
+        wait_until(app, lambda: window.pay_model.rowCount() > 0 or not window.db.is_running("pay_table_page"))
+        window.grab()
+
+    measure(results, "view:dashboard (query)", size, dashboard_cold, repeat)
+    measure(results, "view:dashboard (cached)", size, dashboard_cached, repeat)
+    measure(results, "view:employees", size, employees_view, repeat)
+    measure(results, "view:calculate_payroll", size, payroll_table, repeat, setup=window.show_manage_view)
+    window.db.cancel_all()
+    window.close()
+    window.deleteLater()
+    app.processEvents()
+
+
+def compare(before_path, after_path):
+    with open(before_path) as f:
+        before = json.load(f)
+    with open(after_path) as f:
+        after = json.load(f)
+    old = {(r['name'], r['size']): r['median'] for r in before['results']}
+    print(f"{before['commit']} -> {after['commit']}")
+    print(f"{'benchmark':<28} {'size':>8} {'before ms':>10} {'after ms':>10} {'ratio':>7}")
+    for result in after['results']:
+        key = (result['name'], result['size'])
+        if key not in old:
+            continue
+        ratio = result['median'] / old[key] if old[key] else float('inf')
+        flag = "  slower" if ratio > SLOWER else ""
+        print(f"{key[0]:<28} {key[1]:>8} {old[key] * 1000:>10.2f} {result['median'] * 1000:>10.2f} {ratio:>7.2f}{flag}")
+
+
+def main(args):
+    commit = git_commit()
+    results = []
+    app, module = load_app()
+    print(f"{'benchmark':<28} {'rows':>8} {'median ms':>12} {'min ms':>10}")
+    for size in args.sizes:
+        if args.backend == 'mysql':
+            prepare_mysql(size, args.database)
+            key = lambda i: f"user{i:08d}"  # datagen's username format
+        else:
+            prepare_sqlite(size)
+            key = lambda i: f"user{i:07d}"  # sqlite_standin.populate's
+        dashboard_stats.invalidate()
+        bench_db(results, size, args.repeat, key)
+        if not args.no_views:
+            bench_views(results, size, args.repeat, app, module)
+    report = {
+        'commit': commit,
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'backend': args.backend,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'sizes': args.sizes,
+        'repeat': args.repeat,
+        'results': results,
+    }
+    output = args.output
+    if not output:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, f"bench_{commit}_{args.backend}.json")
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Saved {output}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', nargs='+', type=int, default=[1000, 10000, 100000])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--backend', choices=('sqlite', 'mysql'), default='sqlite')
+    parser.add_argument('--database', default='payroll_bench', help="scratch database for the mysql backend")
+    parser.add_argument('--no-views', action='store_true', help="skip the offscreen view timings")
+    parser.add_argument('--output', help="JSON file (default: benchmarks/results/bench_<commit>_<backend>.json)")
+    parser.add_argument('--compare', nargs=2, metavar=('BEFORE', 'AFTER'), help="compare two saved runs and exit")
+    args = parser.parse_args()
+    if args.compare:
+        compare(*args.compare)
+    else:
+        main(args)
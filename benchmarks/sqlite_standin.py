@@ -0,0 +1,210 @@
+"""SQLite-backed stand-in for the MySQL database, so db.py can be benchmarked without a server.
+
+The schema mirrors payroll_db (primary key on username, payrolls keyed by an auto-increment id)
+and SQLStandInConnection translates the MySQL dialect db.py speaks into SQLite:
+%s placeholders, INSERT ... ON DUPLICATE KEY UPDATE col = VALUES(col), INSERT IGNORE, NOW() and
+DATE_FORMAT(), GREATEST()/LEAST() and SELECT ... FOR UPDATE (SQLite locks the whole database on
+write anyway); GET_LOCK()/RELEASE_LOCK() always succeed. A trigger stands in for updated_at's
+ON UPDATE CURRENT_TIMESTAMP.
+Rows come back as dicts, like pymysql's DictCursor. Timings include real query planning,
+index use and row materialisation, but no network round trips.
+"""
+import random
+import re
+import sqlite3
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import standin  # Puts the repo root on sys.path
+
+sqlite3.register_adapter(Decimal, str)  # pymysql sends DECIMAL parameters as exact strings too
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS employees (
+    username TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    email TEXT,
+    emp_id TEXT UNIQUE,
+    salary NUMERIC NOT NULL DEFAULT 0,
+    days_worked INTEGER NOT NULL DEFAULT 0,
+    department TEXT,
+    password TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'Active',
+    pending INTEGER NOT NULL DEFAULT 1,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    deleted_at TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS idx_employees_updated_at ON employees (updated_at, username);
+CREATE INDEX IF NOT EXISTS idx_employees_deleted_at ON employees (deleted_at);
+-- MySQL's ON UPDATE CURRENT_TIMESTAMP
+CREATE TRIGGER IF NOT EXISTS employees_updated_at AFTER UPDATE ON employees
+WHEN NEW.updated_at IS OLD.updated_at
+BEGIN
+    UPDATE employees SET updated_at = CURRENT_TIMESTAMP WHERE username = NEW.username;
+END;
+CREATE TABLE IF NOT EXISTS payrolls (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    employee_username TEXT NOT NULL,
+    gross NUMERIC NOT NULL,
+    tax NUMERIC NOT NULL,
+    net NUMERIC NOT NULL,
+    processed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    period DATE,
+    run_id INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_payrolls_employee_processed ON payrolls (employee_username, processed_at);
+CREATE UNIQUE INDEX IF NOT EXISTS uq_payrolls_employee_period ON payrolls (employee_username, period);
+CREATE TABLE IF NOT EXISTS payrolls_archive (
+    id INTEGER PRIMARY KEY,
+    employee_username TEXT NOT NULL,
+    gross NUMERIC NOT NULL,
+    tax NUMERIC NOT NULL,
+    net NUMERIC NOT NULL,
+    processed_at TIMESTAMP,
+    period DATE,
+    run_id INTEGER,
+    archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE IF NOT EXISTS payroll_runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    period DATE NOT NULL,
+    status TEXT NOT NULL DEFAULT 'running',
+    processed_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    employees INTEGER NOT NULL DEFAULT 0,
+    chunks INTEGER NOT NULL DEFAULT 0,
+    first_username TEXT,
+    last_username TEXT,
+    error TEXT,
+    finished_at TIMESTAMP
+);
+"""
+
+_DUPLICATE_KEY = re.compile(r"ON\s+DUPLICATE\s+KEY\s+UPDATE", re.IGNORECASE)
+_VALUES_REF = re.compile(r"\bVALUES\((\w+)\)", re.IGNORECASE)
+_INSERT_IGNORE = re.compile(r"\bINSERT\s+IGNORE\b", re.IGNORECASE)
+_NOW = re.compile(r"\bNOW\(\)", re.IGNORECASE)
+_GREATEST_LEAST = re.compile(r"\b(GREATEST|LEAST)\(", re.IGNORECASE)
+_FOR_UPDATE = re.compile(r"\bFOR\s+UPDATE\b", re.IGNORECASE)
+_DATE_FORMAT = re.compile(r"\bDATE_FORMAT\(([^,()]+),\s*('[^']*')\)", re.IGNORECASE)  # Same % codes as strftime
+
+
+def translate(sql):
+    """Rewrite one MySQL statement from db.py into SQLite syntax."""
+    sql = sql.replace("%s", "?")
+    match = _DUPLICATE_KEY.search(sql)
+    if match:
+        head, tail = sql[:match.start()], sql[match.end():]
+        sql = head + "ON CONFLICT DO UPDATE SET" + _VALUES_REF.sub(r"excluded.\1", tail)
+    sql = _INSERT_IGNORE.sub("INSERT OR IGNORE", sql)
+    sql = _DATE_FORMAT.sub(r"strftime(\2, \1)", sql)
+    sql = _GREATEST_LEAST.sub(lambda m: "MAX(" if m.group(1).upper() == "GREATEST" else "MIN(", sql)
+    sql = _FOR_UPDATE.sub("", sql)
+    return _NOW.sub("CURRENT_TIMESTAMP", sql)
+
+
+class SQLStandInCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self._cursor = conn.raw.cursor()
+        self.rowcount = 0
+        self.lastrowid = None
+
+    def execute(self, sql, args=None):
+        self.conn.statements += 1
+        self._cursor.execute(self.conn.translate(sql), tuple(args or ()))
+        self.rowcount = self._cursor.rowcount
+        self.lastrowid = self._cursor.lastrowid
+        return self.rowcount
+
+    def executemany(self, sql, args):
+        self.conn.statements += 1
+        self._cursor.executemany(self.conn.translate(sql), [tuple(row) for row in args])
+        self.rowcount = self._cursor.rowcount
+        return self.rowcount
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        return dict(row) if row is not None else None
+
+    def fetchmany(self, size=1):
+        return [dict(row) for row in self._cursor.fetchmany(size)]
+
+    def fetchall(self):
+        return [dict(row) for row in self._cursor.fetchall()]
+
+    def __iter__(self):
+        return (dict(row) for row in self._cursor)
+
+    def close(self):
+        self._cursor.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class SQLStandInConnection:
+    def __init__(self, path=":memory:"):
+        self.raw = sqlite3.connect(path, detect_types=sqlite3.PARSE_DECLTYPES, check_same_thread=False)
+        self.raw.row_factory = sqlite3.Row
+        self.raw.create_function("GET_LOCK", 2, lambda name, timeout: 1)
+        self.raw.create_function("RELEASE_LOCK", 1, lambda name: 1)
+        self.raw.executescript(SCHEMA)
+        self.statements = 0
+        self._translated = {}
+
+    def translate(self, sql):
+        if sql not in self._translated:
+            self._translated[sql] = translate(sql)
+        return self._translated[sql]
+
+    def cursor(self, cursorclass=None):
+        return SQLStandInCursor(self)
+
+    def ping(self, reconnect=False):
+        pass
+
+    def commit(self):
+        self.raw.commit()
+
+    def rollback(self):
+        self.raw.rollback()
+
+    def close(self):
+        pass  # The pool "closes" connections it recycles; keep the in-memory database alive
+
+
+def install(path=":memory:"):
+    """Point db.py's pool at one shared SQLite stand-in connection and return it."""
+    import db
+
+    conn = SQLStandInConnection(path)
+    # Two handles on the one connection: save_payrolls holds its run lock on one while working on the other
+    db.configure_pool(connect=lambda: conn, max_size=2)
+    return conn
+
+
+def populate(conn, employees, payrolls_per_employee=0, password_hash="x", seed=42):
+    """Bulk-load synthetic employees (and optional payroll history) straight into the stand-in."""
+    rng = random.Random(seed)
+    departments = ['IT', 'HR', 'Finance', 'Sales', 'Marketing', 'Operations', 'Legal', 'Customer Service']
+    now = datetime.now()
+    rows, history = [], []
+    for i in range(employees):
+        username = f"user{i:07d}"
+        created_at = now - timedelta(days=rng.randint(0, 365))
+        rows.append((username, f"Employee {i}", f"{username}@example.com", f"EMP{i:07d}",
+                     round(rng.uniform(20000, 100000), 2), rng.randint(0, 30), rng.choice(departments),
+                     password_hash, 'Inactive' if rng.random() < 0.1 else 'Active',
+                     1 if rng.random() < 0.5 else 0, created_at, created_at))
+        for month in range(payrolls_per_employee):
+            history.append((username, 1000, 150, 850, created_at + timedelta(days=30 * month)))
+    conn.raw.executemany("INSERT INTO employees (username, name, email, emp_id, salary, days_worked, department, "
+                         "password, status, pending, created_at, updated_at) "
+                         "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+    conn.raw.executemany("INSERT INTO payrolls (employee_username, gross, tax, net, processed_at) "
+                         "VALUES (?, ?, ?, ?, ?)", history)
+    conn.raw.commit()
@@ -0,0 +1,107 @@
+"""In-process stand-in for a pymysql connection, used to benchmark db.py without a server.
+
+Every execute()/executemany() call is one round trip and is counted as one statement;
+an optional per-statement latency simulates the network round trip to a real server.
+Real pymysql may split a very large executemany into several statements of at most
+max_stmt_length bytes; the counts here are the ones the code asks for.
+No rows are stored: SELECTs return nothing, except that GET_LOCK() always succeeds and the
+payroll_runs ledger hands back a fresh run, so db.save_payrolls can run end to end.
+"""
+import os
+import sys
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+class StandInCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self.rowcount = 0
+        self.lastrowid = None
+        self._row = None
+
+    def execute(self, sql, args=None):
+        self.conn.round_trip()
+        self.conn.log.append(sql)
+        self.rowcount = 0
+        self._row = self.conn.answer(sql, args)
+        if sql.lstrip().startswith("INSERT"):
+            self.conn.last_id += 1
+            self.lastrowid = self.conn.last_id
+        return 0
+
+    def executemany(self, sql, args):
+        args = list(args)
+        self.conn.round_trip()
+        self.conn.log.append(sql)
+        self.rowcount = len(args)
+        return len(args)
+
+    def fetchone(self):
+        row, self._row = self._row, None
+        return row
+
+    def fetchall(self):
+        return []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+
+class StandInConnection:
+    def __init__(self, latency=0.0):
+        self.latency = latency  # Seconds per statement
+        self.statements = 0
+        self.log = []
+        self.last_id = 0
+
+    def answer(self, sql, args):
+        """The single row a real server would return for sql, where db.py relies on one."""
+        if "GET_LOCK(" in sql:
+            return {'locked': 1}
+        if "FROM payroll_runs WHERE id" in sql:
+            now = datetime.now().replace(microsecond=0)
+            return {'id': args[0], 'period': now.date().replace(day=1), 'status': 'running',
+                    'processed_at': now, 'employees': 0, 'chunks': 0,
+                    'first_username': None, 'last_username': None, 'error': None, 'finished_at': None}
+        return None
+
+    def round_trip(self):
+        self.statements += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def cursor(self):
+        return StandInCursor(self)
+
+    def ping(self, reconnect=False):
+        pass
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def install(latency=0.0):
+    """Point db.py's pool at a single shared stand-in connection and return that connection.
+
+    The pool allows a few checkouts of it at once: save_payrolls holds the run lock's connection
+    while each ledger and chunk statement checks out another.
+    """
+    import db
+
+    conn = StandInConnection(latency)
+    db.configure_pool(connect=lambda: conn, max_size=4)
+    return conn
@@ -0,0 +1,296 @@
+"""Streaming CSV export and chunked CSV import of employees, for moving whole HR files in and out.
+
+Export reads through an unbuffered server-side cursor (SSDictCursor) and writes as it goes, so
+memory stays flat however many employees there are. Import parses the file a chunk at a time,
+validates every row and upserts each chunk in one transaction through db.save_employees; rows
+that fail validation are reported with their line number and skipped.
+
+    python bulk_io.py export employees.csv [--department IT] [--status Active] [--pending yes]
+    python bulk_io.py import employees.csv [--chunk-size 1000] [--dry-run]
+
+Files use the in-app field names (username, name, email, id, salary, days, department, status,
+pending); the column names emp_id and days_worked are accepted on import too. Password hashes are
+never exported. Imported employees that don't exist yet get DEFAULT_PASSWORD, as with the Manage
+Payroll form; existing ones keep theirs, and fields the file leaves out keep their stored values.
+"""
+import argparse
+import csv
+import io
+import os
+import time
+from collections import namedtuple
+from decimal import Decimal, InvalidOperation
+
+import pymysql
+
+import db
+from instrumentation import traced
+from passwords import DEFAULT_PASSWORD, hash_password
+
+# Columns written by export_employees, in order
+EXPORT_FIELDS = ('username',) + db.DEFAULT_COLUMNS
+# Fields import_employees reads; anything else in the file (e.g. created_at) is ignored
+IMPORT_FIELDS = ('name', 'email', 'id', 'salary', 'days', 'department', 'status', 'pending')
+FIELD_ALIASES = {db.EMPLOYEE_COLUMNS[key]: key for key in IMPORT_FIELDS}  # emp_id -> id, ...
+
+EXPORT_BATCH = 1000  # Rows fetched from the server-side cursor at a time
+IMPORT_CHUNK = db.IN_CLAUSE_CHUNK  # Employees per transaction
+MAX_ERRORS = 1000  # Rejected rows whose messages are kept (all are counted)
+
+STATUSES = ('Active', 'Inactive')
+MAX_SALARY = Decimal('9999999999.99')  # DECIMAL(12,2)
+MAX_DAYS = 31
+TRUE_VALUES = {'1', 'true', 'yes', 'y'}
+FALSE_VALUES = {'0', 'false', 'no', 'n'}
+
+# rows: data rows read; imported: employees written (or that would be, dry run); created: of those, new;
+# rejected: rows that failed validation; errors: [(line, message)] for the first MAX_ERRORS of them
+ImportResult = namedtuple('ImportResult', ['rows', 'imported', 'created', 'rejected', 'errors'])
+
+
+@traced
+def export_employees(path, department=None, status=None, pending=None, progress=None, batch=EXPORT_BATCH):
+    """Write the matching employees to a CSV file in username order; returns the number written.
+
+    progress(written, total) is called after every batch (total is counted up front).
+    """
+    conditions, params = db.employee_filters(department, status, pending)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    select = ", ".join(f"{db.EMPLOYEE_COLUMNS.get(field, field)} AS `{field}`" for field in EXPORT_FIELDS)
+    written = 0
+    conn = db.get_connection()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(f"SELECT COUNT(*) AS total FROM employees {where}", params)
+            total = int(cursor.fetchone()['total'])
+        # Unbuffered: rows stream from the server as they are fetched instead of arriving all at once
+        with conn.cursor(pymysql.cursors.SSDictCursor) as cursor, \
+                open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(EXPORT_FIELDS)
+            cursor.execute(f"SELECT {select} FROM employees {where} ORDER BY username", params)
+            while True:
+                rows = cursor.fetchmany(batch)
+                if not rows:
+                    break
+                writer.writerows([_export_value(row[field]) for field in EXPORT_FIELDS] for row in rows)
+                written += len(rows)
+                if progress is not None:
+                    progress(written, max(total, written))
+        conn.commit()
+        return written
+    except pymysql.Error as e:
+        print(f"Export Employees Error: {e}")
+        raise
+    finally:
+        conn.close()
+
+
+def _export_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return int(value)
+    return value
+
+
+def _email(value):
+    if value and '@' not in value:
+        raise ValueError(f"invalid email {value!r}")
+    return value
+
+
+def _emp_id(value):
+    return value or None  # Unique column: blank is NULL
+
+
+def _salary(value):
+    try:
+        salary = Decimal(value.replace(',', '') or '0')
+    except InvalidOperation:
+        raise ValueError(f"invalid salary {value!r}") from None
+    if not salary.is_finite() or not 0 <= salary <= MAX_SALARY:
+        raise ValueError(f"salary out of range: {value!r}")
+    return float(salary.quantize(Decimal('0.01')))
+
+
+def _days(value):
+    try:
+        days = int(value or '0')
+    except ValueError:
+        raise ValueError(f"invalid days {value!r}") from None
+    if not 0 <= days <= MAX_DAYS:
+        raise ValueError(f"days out of range: {value!r}")
+    return days
+
+
+def _status(value):
+    for status in STATUSES:
+        if value.lower() == status.lower():
+            return status
+    raise ValueError(f"status must be one of {', '.join(STATUSES)}, not {value!r}")
+
+
+def _pending(value):
+    if value.lower() in TRUE_VALUES:
+        return True
+    if value.lower() in FALSE_VALUES:
+        return False
+    raise ValueError(f"invalid pending flag {value!r}")
+
+
+FIELD_PARSERS = {
+    'name': str,
+    'email': _email,
+    'id': _emp_id,
+    'salary': _salary,
+    'days': _days,
+    'department': str,
+    'status': _status,
+    'pending': _pending
+}
+
+
+def parse_employee(row):
+    """Validate one CSV row -> (username, {field: value}) for the import fields it has.
+
+    Raises ValueError with a message for the import report. A blank name leaves the stored name
+    (or, for a new employee, the username) in place.
+    """
+    if None in row:
+        raise ValueError("more values than header columns")
+    username = (row.get('username') or "").strip()
+    if not username:
+        raise ValueError("username is required")
+    if len(username) > 100:
+        raise ValueError("username longer than 100 characters")
+    fields = {}
+    for name, value in row.items():
+        key = FIELD_ALIASES.get(name, name)
+        if key not in FIELD_PARSERS or value is None:
+            continue  # Unknown column, or a short row
+        value = value.strip()
+        if key == 'name' and not value:
+            continue
+        fields[key] = FIELD_PARSERS[key](value)
+    return username, fields
+
+
+def _stored_employees(usernames):
+    # Unlike db.get_employees this raises on errors: an empty answer would make every row look new
+    # and reset existing employees' passwords. Deleted employees do count as new (the upsert restores them)
+    select = ", ".join(f"{db.EMPLOYEE_COLUMNS[key]} AS `{key}`" for key in IMPORT_FIELDS)
+    conn = db.get_connection()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(f"SELECT username, {select} FROM employees WHERE username IN "
+                           f"({', '.join(['%s'] * len(usernames))}) AND {db.NOT_DELETED}", usernames)
+            return {row.pop('username'): row for row in cursor.fetchall()}
+    except pymysql.Error as e:
+        print(f"Import Employees Error: {e}")
+        raise
+    finally:
+        conn.close()
+
+
+@traced
+def import_employees(path, chunk_size=IMPORT_CHUNK, progress=None, dry_run=False):
+    """Validate and upsert the employees in a CSV file, chunk_size employees per transaction.
+
+    Each chunk is merged over the stored rows (so the file may carry only some fields) and written
+    with one db.save_employees call; a failing write raises, leaving earlier chunks committed.
+    Rows giving an employee ID that another employee holds are rejected like invalid ones.
+    progress(rows, bytes_read, total_bytes) is called after every chunk. dry_run validates and
+    counts without writing. Returns an ImportResult.
+    """
+    chunk_size = min(chunk_size, db.IN_CLAUSE_CHUNK)
+    total_bytes = os.path.getsize(path)
+    counts = {'rows': 0, 'imported': 0, 'created': 0, 'rejected': 0}
+    errors = []
+    default_password = []  # Hashed once, on the first new employee
+
+    def reject(line, message):
+        counts['rejected'] += 1
+        if len(errors) < MAX_ERRORS:
+            errors.append((line, message))
+
+    def write(chunk, lines):
+        # Rows whose ID another employee holds would make save_employees refuse the whole chunk
+        owners = db.emp_id_owners({fields['id'] for fields in chunk.values() if fields.get('id')})
+        for username, fields in list(chunk.items()):
+            owner = owners.get(fields.get('id'), username)
+            if owner != username:
+                reject(lines[username], db.emp_id_conflict(fields['id'], owner))
+                del chunk[username]
+            elif fields.get('id'):
+                owners[fields['id']] = username  # Claimed for the rest of the chunk
+        if not chunk:
+            return
+        stored = _stored_employees(list(chunk))
+        changes = {}
+        for username, fields in chunk.items():
+            emp = stored.get(username)
+            if emp is None:
+                if not default_password:
+                    default_password.append(hash_password(DEFAULT_PASSWORD))
+                emp = {'name': username, 'status': 'Active', 'pending': True, 'password': default_password[0]}
+                counts['created'] += 1
+            emp.update(fields)
+            changes[username] = emp
+        if not dry_run:
+            db.save_employees(changes)
+        counts['imported'] += len(changes)
+
+    with open(path, 'rb') as raw:
+        reader = csv.DictReader(io.TextIOWrapper(raw, encoding='utf-8-sig', newline=''))
+        if 'username' not in (reader.fieldnames or ()):
+            raise ValueError("The file has no username column")
+        chunk, lines = {}, {}
+        for row in reader:
+            counts['rows'] += 1
+            try:
+                username, fields = parse_employee(row)
+            except ValueError as e:
+                reject(reader.line_num, str(e))
+                continue
+            chunk.setdefault(username, {}).update(fields)  # A repeated username: later values win
+            lines[username] = reader.line_num
+            if len(chunk) >= chunk_size:
+                write(chunk, lines)
+                chunk, lines = {}, {}
+                if progress is not None:
+                    progress(counts['rows'], raw.tell(), total_bytes)
+        if chunk:
+            write(chunk, lines)
+        if progress is not None:
+            progress(counts['rows'], total_bytes, total_bytes)
+    return ImportResult(errors=errors, **counts)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+    export_parser = commands.add_parser('export', help="write employees to a CSV file")
+    export_parser.add_argument('path')
+    export_parser.add_argument('--department')
+    export_parser.add_argument('--status', choices=STATUSES)
+    export_parser.add_argument('--pending', type=_pending, help="yes/no")
+    import_parser = commands.add_parser('import', help="upsert employees from a CSV file")
+    import_parser.add_argument('path')
+    import_parser.add_argument('--chunk-size', type=int, default=IMPORT_CHUNK, help="employees per transaction")
+    import_parser.add_argument('--dry-run', action='store_true', help="validate and count, write nothing")
+    args = parser.parse_args()
+    started = time.perf_counter()
+    if args.command == 'export':
+        count = export_employees(args.path, args.department, args.status, args.pending,
+                                 progress=lambda written, total: print(f"\r{written}/{total} employees", end=""))
+        print(f"\nExported {count} employees to {args.path} in {time.perf_counter() - started:.1f}s")
+    else:
+        result = import_employees(args.path, args.chunk_size, dry_run=args.dry_run, progress=lambda rows, done, total:
+                                  print(f"\r{rows} rows ({done * 100 // max(total, 1)}%)", end=""))
+        print(f"\n{'Checked' if args.dry_run else 'Imported'} {result.imported} employees "
+              f"({result.created} new) in {time.perf_counter() - started:.1f}s; {result.rejected} rows rejected")
+        for line, message in result.errors[:20]:
+            print(f"  line {line}: {message}")
+        if result.rejected > 20:
+            print(f"  ... and {result.rejected - 20} more")
@@ -0,0 +1,182 @@
+"""Change feed: notices employee and payroll writes made by other processes (another admin, payroll_runner.py).
+
+Writes through this process's db.py already reach the write listeners (dashboard_stats,
+employee_cache) as they commit. For everyone else's, ChangeFeed.poll() looks past two high-water
+marks, employees.updated_at (ON UPDATE CURRENT_TIMESTAMP) and the payrolls auto-increment id, and
+publish() hands what changed to the same listeners through db.notify_external_write, so open views
+update just those rows. workers.ChangeFeedPoller runs the polls on a timer off the GUI thread.
+
+Each poll is two index range reads that return only rows written since the last one. Deletes are
+soft (they stamp deleted_at, and so updated_at), so they are noticed like any other change. Rows
+this process wrote itself are skipped, their listeners having been told at commit; a change another
+process makes to the same row in the few seconds before the next poll is skipped with them.
+"""
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+import pymysql
+
+import db
+
+POLL_INTERVAL = 5  # Seconds between polls
+# A row's updated_at is stamped when its statement runs but only seen once the transaction commits,
+# so rows stamped up to this long before the high-water mark are looked at again
+COMMIT_LAG = timedelta(seconds=30)
+EPOCH = datetime(1970, 1, 2)  # Before any TIMESTAMP; the mark of an empty table
+MAX_CHANGES = 5000  # More changed rows than this in one poll: report "everything" instead
+
+# employees: usernames whose rows changed; payrolls: usernames just paid. Either is None when too many did
+Changes = namedtuple('Changes', ['employees', 'payrolls'])
+NO_CHANGES = Changes([], [])
+
+
+class LocalWrites:
+    """Usernames this process wrote to a table recently, fed by a db write listener; thread-safe."""
+
+    def __init__(self, table):
+        self.table = table
+        self._written = {}  # username -> monotonic time of the write, oldest first
+        self._lock = threading.Lock()
+        db.add_write_listener(self.on_write, local_only=True)
+
+    def on_write(self, table, usernames):
+        if table != self.table or not usernames:
+            return  # Writes without usernames (e.g. a rollup rebuild) are reported again by the feed
+        now = time.monotonic()
+        with self._lock:
+            for username in usernames:
+                self._written.pop(username, None)  # Re-inserted at the end, keeping time order
+                self._written[username] = now
+            self._expire(now)
+
+    def _expire(self, now):
+        # Writes the feed hasn't seen within COMMIT_LAG (e.g. UPDATEs that changed nothing) are dropped
+        cutoff = now - COMMIT_LAG.total_seconds()
+        while self._written:
+            username, written = next(iter(self._written.items()))
+            if written >= cutoff:
+                break
+            del self._written[username]
+
+    def __len__(self):
+        return len(self._written)
+
+    def take(self, usernames):
+        """Those of usernames written here, forgetting them: a later write of the row is news again."""
+        with self._lock:
+            self._expire(time.monotonic())
+            return {username for username in usernames if self._written.pop(username, None) is not None}
+
+    def clear(self):
+        with self._lock:
+            self._written.clear()
+
+
+class ChangeFeed:
+    """High-water marks of what has been seen; poll() returns what was written since.
+
+    poll() is not thread-safe; this process's own writes may be recorded from any thread.
+    """
+
+    def __init__(self):
+        self._local_employees = LocalWrites('employees')
+        self._local_payrolls = LocalWrites('payrolls')
+        self.reset()
+
+    def reset(self):
+        """Forget the marks; the next poll starts from the current state again."""
+        self.updated_at = None  # Newest employees.updated_at seen (EPOCH if none)
+        self.payroll_id = None  # Newest payrolls.id seen
+        self._seen = {}  # username -> updated_at already reported, within COMMIT_LAG of updated_at
+        self._floor = None  # Rows stamped up to here were covered by a bulk "everything" report
+        self._local_employees.clear()
+        self._local_payrolls.clear()
+
+    def _newest_update(self, cursor):
+        # The last entry of idx_employees_updated_at
+        cursor.execute("SELECT updated_at FROM employees ORDER BY updated_at DESC LIMIT 1")
+        row = cursor.fetchone()
+        return row['updated_at'] if row else EPOCH
+
+    def _start(self, cursor):
+        self.updated_at = self._newest_update(cursor)
+        cursor.execute("SELECT MAX(id) AS id FROM payrolls")
+        self.payroll_id = cursor.fetchone()['id'] or 0
+        self._seen = {}
+        self._changed_employees(cursor)  # Marks the rows stamped within the lag as seen
+
+    def _changed_employees(self, cursor):
+        since = self.updated_at - COMMIT_LAG
+        if self._floor is not None:
+            since = max(since, self._floor + timedelta(seconds=1))  # TIMESTAMPs are whole seconds
+        cursor.execute("""
+            SELECT username, updated_at FROM employees
+            WHERE updated_at >= %s
+            ORDER BY updated_at, username
+            LIMIT %s
+        """, (since, MAX_CHANGES + len(self._seen) + len(self._local_employees) + 1))
+        rows = cursor.fetchall()
+        changed = [row['username'] for row in rows if self._seen.get(row['username']) != row['updated_at']]
+        local = self._local_employees.take(changed)
+        changed = [username for username in changed if username not in local]
+        if rows:
+            self.updated_at = max(self.updated_at, rows[-1]['updated_at'])
+        since = self.updated_at - COMMIT_LAG
+        self._seen = {row['username']: row['updated_at'] for row in rows if row['updated_at'] >= since}
+        if len(changed) > MAX_CHANGES:
+            # A bulk write: skip to its end rather than reading it all. Everything is reloaded after
+            # this report, so only a write in the bulk write's last second that commits after that
+            # reload goes unnoticed (until the caches expire)
+            self.updated_at = self._floor = self._newest_update(cursor)
+            self._seen = {}
+            return None
+        return changed
+
+    def _new_payrolls(self, cursor):
+        cursor.execute("""
+            SELECT id, employee_username FROM payrolls
+            WHERE id > %s
+            ORDER BY id
+            LIMIT %s
+        """, (self.payroll_id, MAX_CHANGES + len(self._local_payrolls) + 1))
+        rows = cursor.fetchall()
+        usernames = list(dict.fromkeys(row['employee_username'] for row in rows))
+        local = self._local_payrolls.take(usernames)
+        if len(rows) - len(local) > MAX_CHANGES:
+            cursor.execute("SELECT MAX(id) AS id FROM payrolls")
+            self.payroll_id = cursor.fetchone()['id']
+            return None
+        if rows:
+            self.payroll_id = rows[-1]['id']
+        # Ids committed out of order are missed here, but the same transaction cleared the
+        # employees' pending flag, which the updated_at mark does see
+        return [username for username in usernames if username not in local]
+
+    def poll(self):
+        """Changes written since the previous poll (none on the first, which sets the marks)."""
+        conn = db.get_connection()
+        try:
+            with conn.cursor() as cursor:
+                if self.payroll_id is None:
+                    self._start(cursor)
+                    changes = NO_CHANGES
+                else:
+                    changes = Changes(self._changed_employees(cursor), self._new_payrolls(cursor))
+            conn.commit()  # Ends the read snapshot, so the next poll sees newer commits
+            return changes
+        except pymysql.Error as e:
+            print(f"Change Feed Error: {e}")
+            return NO_CHANGES
+        finally:
+            conn.close()
+
+
+def publish(changes):
+    """Tell this process's write listeners about the changes a poll found."""
+    if changes.payrolls is None or changes.payrolls:
+        db.notify_external_write('payrolls', changes.payrolls)
+        db.notify_external_write('payroll_monthly')
+    if changes.employees is None or changes.employees:
+        db.notify_external_write('employees', changes.employees)
@@ -0,0 +1,87 @@
+import threading
+import time
+from collections import namedtuple
+from decimal import Decimal
+
+import db
+from payroll import compute
+
+# Safety net for writes made by other processes; writes through db.py invalidate immediately
+CACHE_TTL = 60
+
+# Months shown on the payroll trend chart
+TREND_MONTHS = 6
+
+# Label of the '' department group (employees without one), as payroll_runner.py prints it
+NO_DEPARTMENT = "(no department)"
+
+DashboardStats = namedtuple('DashboardStats', [
+    'total', 'active', 'inactive', 'pending', 'pending_net', 'avg_salary', 'avg_days',
+    'departments',  # [(department, employees)], largest first
+    'recent',  # newest employees: [{'name', 'id', 'pending', 'net'}]
+    'trend',  # net payroll per month, oldest first: [(month, net)]
+])
+
+EMPTY_STATS = DashboardStats(0, 0, 0, 0, Decimal(0), 0.0, 0.0, [], [], [])
+
+_cache = None
+_cached_at = 0.0
+_generation = 0  # Bumped by every invalidation, so a load that raced a write isn't cached
+_lock = threading.Lock()
+
+
+def build_stats(department_rows, recent_rows, trend=()):
+    """Fold the per-department aggregate rows into dashboard totals; O(departments)."""
+    total = sum(int(row['employees']) for row in department_rows)
+    active = sum(int(row['active'] or 0) for row in department_rows)
+    salary_total = sum(float(row['salary_total'] or 0) for row in department_rows)
+    days_total = sum(int(row['days_total'] or 0) for row in department_rows)
+    departments = sorted(((row['department'] or NO_DEPARTMENT, int(row['employees'])) for row in department_rows),
+                         key=lambda item: item[1], reverse=True)
+    recent = [{'name': emp.get('name', '-'), 'id': emp.get('id') or '-', 'pending': emp.get('pending', False),
+               'net': compute(emp.get('salary', 0), emp.get('days', 0)).net} for emp in recent_rows]
+    return DashboardStats(
+        total=total,
+        active=active,
+        inactive=max(0, total - active),
+        pending=sum(int(row['pending'] or 0) for row in department_rows),
+        pending_net=sum((Decimal(row['pending_net'] or 0) for row in department_rows), Decimal(0)),
+        avg_salary=salary_total / max(1, total),
+        avg_days=days_total / max(1, total),
+        departments=departments,
+        recent=recent,
+        trend=list(trend),
+    )
+
+
+def cached_stats():
+    """The cached stats if still valid, else None (never touches the database)."""
+    with _lock:
+        if _cache is not None and time.monotonic() - _cached_at < CACHE_TTL:
+            return _cache
+        return None
+
+
+def get_dashboard_stats():
+    """Dashboard stats from the cache, or from one grouped aggregate query when invalidated/expired."""
+    global _cache, _cached_at
+    with _lock:
+        if _cache is not None and time.monotonic() - _cached_at < CACHE_TTL:
+            return _cache
+        generation = _generation
+    stats = build_stats(*db.load_dashboard_aggregates(), trend=db.load_payroll_trend(TREND_MONTHS))
+    with _lock:
+        if generation == _generation:
+            _cache, _cached_at = stats, time.monotonic()
+    return stats
+
+
+def invalidate(table=None, usernames=None):
+    """Drop the cached stats; registered as a db write listener."""
+    global _cache, _generation
+    with _lock:
+        _cache = None
+        _generation += 1
+
+
+db.add_write_listener(invalidate)
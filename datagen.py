@@ -0,0 +1,275 @@
+"""Synthetic payroll_db data at production scale, for reproducing slowness locally.
+
+Generates employees (and a monthly payroll history for each) in chunks spread over worker
+processes, writing each chunk with multi-row INSERTs or LOAD DATA LOCAL INFILE from a generated
+CSV. Every chunk draws from its own generator seeded with (seed, chunk number), so the same
+arguments produce the same rows whatever the number of workers.
+
+    python datagen.py --employees 1000000 --payrolls 50 --workers 8 --method load-data
+    python datagen.py --employees 10000 --salary lognormal:45000:0.35 --departments IT=4,HR=1,Sales=3
+
+All employees get DEFAULT_PASSWORD, hashed once. Usernames are <prefix><number>; --reset deletes
+earlier rows with the same prefix first (payroll history has no unique key, so re-running without
+it duplicates history rows).
+"""
+import argparse
+import csv
+import multiprocessing
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import pymysql
+
+from db import DB_CONFIG, PAYROLL_ROLLUP_SQL
+from migrations import migrate
+from passwords import DEFAULT_PASSWORD, hash_password
+from payroll import as_decimals, centavos_to_decimal, compute_batch
+
+DEPARTMENTS = {'IT': 1, 'HR': 1, 'Finance': 1, 'Sales': 1, 'Marketing': 1, 'Operations': 1, 'Legal': 1,
+               'Customer Service': 1}
+FIRST_NAMES = ['John', 'Jane', 'Michael', 'Emily', 'David', 'Sarah', 'James', 'Olivia', 'Robert', 'Sophia',
+               'William', 'Ava', 'Joseph', 'Mia', 'Charles', 'Isabella', 'Thomas', 'Amelia', 'Christopher', 'Evelyn']
+LAST_NAMES = ['Smith', 'Johnson', 'Williams', 'Brown', 'Jones', 'Garcia', 'Miller', 'Davis', 'Rodriguez',
+              'Martinez', 'Hernandez', 'Lopez', 'Gonzalez', 'Wilson', 'Anderson', 'Thomas', 'Taylor', 'Moore',
+              'Jackson', 'Martin']
+
+EMPLOYEE_FIELDS = ('username', 'name', 'email', 'emp_id', 'salary', 'days_worked', 'department', 'password',
+                   'status', 'pending', 'created_at', 'updated_at')
+PAYROLL_FIELDS = ('employee_username', 'gross', 'tax', 'net', 'processed_at')
+
+
+def parse_distribution(text):
+    """'uniform:LOW:HIGH', 'normal:MEAN:SD' or 'lognormal:MEDIAN:SIGMA' -> (kind, a, b)."""
+    kind, a, b = text.split(':')
+    if kind not in ('uniform', 'normal', 'lognormal'):
+        raise argparse.ArgumentTypeError(f"unknown distribution {kind!r}")
+    return kind, float(a), float(b)
+
+
+def parse_weights(text):
+    """'IT=3,HR=1' -> {'IT': 3.0, 'HR': 1.0}."""
+    weights = {}
+    for item in text.split(','):
+        name, _, weight = item.partition('=')
+        weights[name.strip()] = float(weight or 1)
+    return weights
+
+
+def _salaries(rng, distribution, size):
+    kind, a, b = distribution
+    if kind == 'uniform':
+        values = rng.uniform(a, b, size)
+    elif kind == 'normal':
+        values = rng.normal(a, b, size)
+    else:
+        values = rng.lognormal(np.log(a), b, size)
+    return np.round(np.clip(values, 0, 99_999_999), 2)  # DECIMAL(12,2)
+
+
+def generate_chunk(options, chunk):
+    """Employee and payroll rows for employee numbers [start, end) of one chunk.
+
+    Returns (employees, payrolls, rollup): lists of tuples, the last one holding the payrolls'
+    monthly totals per department as payroll_monthly rows.
+    """
+    start = chunk * options['chunk_size']
+    end = min(start + options['chunk_size'], options['employees'])
+    size = end - start
+    rng = np.random.default_rng([options['seed'], chunk])
+    now = options['now']
+
+    numbers = np.arange(start, end)
+    salaries = _salaries(rng, options['salary'], size)
+    days = rng.integers(0, 31, size)
+    names = list(options['departments'])
+    weights = np.array([options['departments'][name] for name in names], dtype=float)
+    departments = rng.choice(len(names), size, p=weights / weights.sum())
+    inactive = rng.random(size) < options['inactive_ratio']
+    pending = rng.random(size) < options['pending_ratio']
+    first = rng.integers(0, len(FIRST_NAMES), size)
+    last = rng.integers(0, len(LAST_NAMES), size)
+    age_days = rng.integers(0, options['max_age_days'] + 1, size)
+
+    prefix, password = options['prefix'], options['password']
+    employees, usernames, created = [], [], []
+    for i in range(size):
+        username = f"{prefix}{numbers[i]:08d}"
+        created_at = now - timedelta(days=int(age_days[i]))
+        usernames.append(username)
+        created.append(created_at)
+        employees.append((username, f"{FIRST_NAMES[first[i]]} {LAST_NAMES[last[i]]}", f"{username}@example.com",
+                          f"{prefix.upper()}{numbers[i]:09d}", float(salaries[i]), int(days[i]),
+                          names[departments[i]], password, 'Inactive' if inactive[i] else 'Active',
+                          int(pending[i]), created_at, created_at))
+
+    # History: one payroll per month going back from now, never before the employee was created
+    if options['payroll_dist'] == 'poisson':
+        counts = rng.poisson(options['payrolls'], size)
+    else:
+        counts = np.full(size, options['payrolls'])
+    counts = np.minimum(counts, age_days // 30 + 1)
+    owner = np.repeat(np.arange(size), counts)
+    months_back = np.arange(len(owner)) - np.repeat(np.cumsum(counts) - counts, counts)
+    pay = compute_batch(salaries[owner], rng.integers(0, 31, len(owner)))
+    gross, tax, net = as_decimals(pay.gross), as_decimals(pay.tax), as_decimals(pay.net)
+    payrolls = [(usernames[o], gross[j], tax[j], net[j], now - timedelta(days=30 * int(m)))
+                for j, (o, m) in enumerate(zip(owner.tolist(), months_back.tolist()))]
+    totals = {}
+    for row, o, g, t, n in zip(payrolls, owner.tolist(), pay.gross.tolist(), pay.tax.tolist(), pay.net.tolist()):
+        month = totals.setdefault((row[4].date().replace(day=1), names[departments[o]]), [0, 0, 0, 0])
+        month[0] += 1
+        month[1] += g
+        month[2] += t
+        month[3] += n
+    rollup = [key + (count,) + tuple(centavos_to_decimal(c) for c in amounts)
+              for key, (count, *amounts) in totals.items()]
+    return employees, payrolls, rollup
+
+
+def _connect(options):
+    conn = pymysql.connect(**dict(DB_CONFIG, local_infile=options['method'] == 'load-data'))
+    with conn.cursor() as cursor:
+        # Bulk-load settings for this session only; the generated keys are unique by construction
+        cursor.execute("SET unique_checks = 0")
+        cursor.execute("SET foreign_key_checks = 0")
+    return conn
+
+
+def _insert(cursor, table, fields, rows, batch):
+    sql = f"INSERT IGNORE INTO {table} ({', '.join(fields)}) VALUES ({', '.join(['%s'] * len(fields))})"
+    for start in range(0, len(rows), batch):
+        # pymysql folds executemany on INSERT ... VALUES into multi-row statements
+        cursor.executemany(sql, rows[start:start + batch])
+
+
+def _load_data(cursor, table, fields, rows, directory):
+    with tempfile.NamedTemporaryFile('w', newline='', suffix='.csv', dir=directory, delete=False) as f:
+        csv.writer(f).writerows(rows)
+        path = f.name
+    try:
+        cursor.execute(f"""
+            LOAD DATA LOCAL INFILE %s IGNORE INTO TABLE {table}
+            FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '"'
+            LINES TERMINATED BY '\\r\\n'
+            ({', '.join(fields)})
+        """, (path,))
+    finally:
+        os.remove(path)
+
+
+def write_chunk(options, chunk):
+    """Generate one chunk and write it in its own transaction; returns (chunk, employees, payrolls)."""
+    employees, payrolls, rollup = generate_chunk(options, chunk)
+    conn = _connect(options)
+    try:
+        with conn.cursor() as cursor:
+            for table, fields, rows in (('employees', EMPLOYEE_FIELDS, employees),
+                                        ('payrolls', PAYROLL_FIELDS, payrolls)):
+                if options['method'] == 'load-data':
+                    _load_data(cursor, table, fields, rows, options['csv_dir'])
+                else:
+                    _insert(cursor, table, fields, rows, options['batch'])
+            # The history is written behind save_payrolls' back, so its totals are added here
+            cursor.executemany(PAYROLL_ROLLUP_SQL, rollup)
+        conn.commit()
+        return chunk, len(employees), len(payrolls)
+    except pymysql.Error as e:
+        print(f"Generator Error (chunk {chunk}): {e}")
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def _run_chunk(args):
+    return write_chunk(*args)
+
+
+def reset(prefix):
+    """Delete employees (and their payroll history and its monthly totals) whose username starts with prefix."""
+    conn = pymysql.connect(**DB_CONFIG)
+    try:
+        with conn.cursor() as cursor:
+            pattern = prefix.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+            cursor.execute("""
+                INSERT INTO payroll_monthly (month, department, payrolls, gross, tax, net)
+                SELECT COALESCE(p.period, DATE_FORMAT(p.processed_at, '%%Y-%%m-01')) AS month,
+                       COALESCE(e.department, '') AS dept, -COUNT(*), -SUM(p.gross), -SUM(p.tax), -SUM(p.net)
+                FROM payrolls p LEFT JOIN employees e ON e.username = p.employee_username
+                WHERE p.employee_username LIKE %s
+                GROUP BY month, dept
+                ON DUPLICATE KEY UPDATE
+                    payrolls = payrolls + VALUES(payrolls),
+                    gross = gross + VALUES(gross),
+                    tax = tax + VALUES(tax),
+                    net = net + VALUES(net)
+            """, (pattern,))
+            cursor.execute("DELETE FROM payroll_monthly WHERE payrolls = 0")
+            cursor.execute("DELETE FROM payrolls WHERE employee_username LIKE %s", (pattern,))
+            cursor.execute("DELETE FROM employees WHERE username LIKE %s", (pattern,))
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def generate(employees, payrolls=12, workers=None, seed=42, prefix='load', method='insert', chunk_size=10000,
+             batch=5000, salary=('uniform', 20000, 100000), departments=None, pending_ratio=0.5,
+             inactive_ratio=0.1, payroll_dist='fixed', max_age_days=3650, csv_dir=None, reset_first=False):
+    """Generate and load the data set; returns (employees, payrolls, seconds)."""
+    migrate()
+    if reset_first:
+        reset(prefix)
+    options = {
+        'employees': employees, 'payrolls': payrolls, 'seed': seed, 'prefix': prefix, 'method': method,
+        'chunk_size': chunk_size, 'batch': batch, 'salary': salary, 'departments': departments or DEPARTMENTS,
+        'pending_ratio': pending_ratio, 'inactive_ratio': inactive_ratio, 'payroll_dist': payroll_dist,
+        'max_age_days': max_age_days, 'csv_dir': csv_dir,
+        # Fixed once, so every worker dates rows from the same instant
+        'now': datetime.now().replace(microsecond=0),
+        # One bcrypt hash shared by all rows: hashing a million passwords would take hours
+        'password': hash_password(DEFAULT_PASSWORD),
+    }
+    chunks = [(options, chunk) for chunk in range((employees + chunk_size - 1) // chunk_size)]
+    totals = [0, 0]
+    started = time.perf_counter()
+    # spawn: each worker opens its own connection and imports nothing from this process's state
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(workers or os.cpu_count() or 2) as pool:
+        for chunk, emp_count, pay_count in pool.imap_unordered(_run_chunk, chunks):
+            totals[0] += emp_count
+            totals[1] += pay_count
+            elapsed = time.perf_counter() - started
+            print(f"chunk {chunk}: {totals[0]} employees, {totals[1]} payrolls "
+                  f"({(totals[0] + totals[1]) / max(elapsed, 1e-9):,.0f} rows/s)")
+    return totals[0], totals[1], time.perf_counter() - started
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--employees', type=int, default=100000)
+    parser.add_argument('--payrolls', type=int, default=12, help="payroll history rows per employee (mean)")
+    parser.add_argument('--payroll-dist', choices=('fixed', 'poisson'), default='fixed')
+    parser.add_argument('--workers', type=int, default=None, help="processes (default: one per core)")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--prefix', default='load', help="username prefix of generated employees")
+    parser.add_argument('--method', choices=('insert', 'load-data'), default='insert',
+                        help="multi-row INSERTs, or LOAD DATA LOCAL INFILE (needs local_infile=ON on the server)")
+    parser.add_argument('--chunk-size', type=int, default=10000, help="employees per worker task and transaction")
+    parser.add_argument('--batch', type=int, default=5000, help="rows per executemany call (insert method)")
+    parser.add_argument('--salary', type=parse_distribution, default=('uniform', 20000, 100000),
+                        help="uniform:LOW:HIGH, normal:MEAN:SD or lognormal:MEDIAN:SIGMA")
+    parser.add_argument('--departments', type=parse_weights, default=None, help="weights, e.g. IT=3,HR=1,Sales=2")
+    parser.add_argument('--pending-ratio', type=float, default=0.5)
+    parser.add_argument('--inactive-ratio', type=float, default=0.1)
+    parser.add_argument('--max-age-days', type=int, default=3650, help="oldest created_at, in days ago")
+    parser.add_argument('--csv-dir', default=None, help="where LOAD DATA files are staged (default: temp dir)")
+    parser.add_argument('--reset', action='store_true', help="delete earlier rows with the same prefix first")
+    args = parser.parse_args()
+    count, history, seconds = generate(
+        args.employees, args.payrolls, args.workers, args.seed, args.prefix, args.method, args.chunk_size,
+        args.batch, args.salary, args.departments, args.pending_ratio, args.inactive_ratio, args.payroll_dist,
+        args.max_age_days, args.csv_dir, args.reset)
+    print(f"Generated {count} employees and {history} payrolls in {seconds:.1f}s")
@@ -1,5 +1,14 @@
+import sys
+import threading
+from collections import namedtuple
+from collections.abc import MutableMapping
+from contextlib import contextmanager
+from datetime import date, datetime
 import pymysql
-import bcrypt  # For password hashing
+from instrumentation import instrument_connection, record_error, traced
+from passwords import check_password
+from payroll import as_decimals, centavos_to_decimal, compute_employees, group_totals, sql_payslip
+from pool import ConnectionPool
 
 # Database configuration (update if your XAMPP setup has a password)
 DB_CONFIG = {
@@ -11,160 +20,1033 @@ DB_CONFIG = {
     'cursorclass': pymysql.cursors.DictCursor  # Returns dicts for easy mapping
 }
 
+# Connection pool settings (see pool.ConnectionPool)
+POOL_CONFIG = {
+    'max_size': 10,  # Upper bound on open connections
+    'max_idle_time': 300,  # Close connections idle this long (seconds), well under MySQL's wait_timeout
+    'health_check_after': 30,  # Ping connections idle this long before handing them out
+    'timeout': 10  # Seconds to wait for a free connection before raising PoolTimeout
+}
+
+# Usernames per "WHERE username IN (...)" statement, keeps statements well under max_allowed_packet
+IN_CLAUSE_CHUNK = 1000
+
+_pool = None
+_pool_lock = threading.Lock()
+_write_listeners = []  # See add_write_listener
+_rollup_ready = False  # payroll_monthly exists (checked once per process)
+
+def _connect():
+    return pymysql.connect(**DB_CONFIG)
+
+def configure_pool(connect=None, **options):
+    """Replace the connection pool, e.g. with different limits or an in-process stand-in connect()."""
+    global _pool, _rollup_ready
+    config = dict(POOL_CONFIG, **options)
+    with _pool_lock:
+        old, _pool = _pool, ConnectionPool(connect or _connect, **config)
+        _rollup_ready = False  # The new pool may point at another database
+    if old is not None:
+        old.close()
+    return _pool
+
+def get_pool():
+    """Return the process-wide connection pool, creating it on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ConnectionPool(_connect, **POOL_CONFIG)
+        return _pool
+
+def pool_stats():
+    """Checkouts, wait time and size of the connection pool."""
+    return get_pool().stats()
+
+def add_write_listener(callback, local_only=False):
+    """Call callback(table, usernames) after every committed write; usernames is None when unknown.
+
+    local_only=True leaves out the writes of other processes passed on by notify_external_write.
+    """
+    _write_listeners.append((callback, local_only))
+
+def _notify_write(table, usernames=None, external=False):
+    for callback, local_only in list(_write_listeners):
+        if external and local_only:
+            continue
+        try:
+            callback(table, usernames)
+        except Exception as e:
+            _log_error("Write Listener", e)
+
+def notify_external_write(table, usernames=None):
+    """Pass a write committed by another process (found by change_feed) to the write listeners."""
+    _notify_write(table, usernames, external=True)
+
+def _log_error(operation, error):
+    # Printed as before, and attached to the operation's instrumentation span
+    print(f"{operation} Error: {error}")
+    record_error(error)
+
+@traced
 def get_connection():
-    """Establish a connection to the database."""
+    """Check out a pooled database connection; close() returns it to the pool.
+
+    Its cursors count statements and rows into the current instrumentation span.
+    """
     try:
-        return pymysql.connect(**DB_CONFIG)
+        return instrument_connection(get_pool().get_connection())
     except pymysql.Error as e:
-        print(f"DB Connection Error: {e}")
+        _log_error("DB Connection", e)
         raise
 
-def load_employees():
-    """Load all employees as a dict {username: employee_dict}, matching JSON structure."""
+# In-app employee keys and the employees table columns they come from
+EMPLOYEE_COLUMNS = {
+    'name': 'name',
+    'email': 'email',
+    'id': 'emp_id',
+    'salary': 'salary',
+    'days': 'days_worked',
+    'department': 'department',
+    'password': 'password',
+    'status': 'status',
+    'pending': 'pending',
+    'created_at': 'created_at',
+    'updated_at': 'updated_at'
+}
+
+# What columns=None loads: every column but the bcrypt hash, which EmployeeRecord fetches on demand
+DEFAULT_COLUMNS = tuple(key for key in EMPLOYEE_COLUMNS if key != 'password')
+
+# Everything the admin views show: no bcrypt hashes or update timestamps
+SUMMARY_COLUMNS = ('name', 'email', 'id', 'salary', 'days', 'department', 'status', 'pending', 'created_at')
+
+# Rows per keyset page
+PAGE_SIZE = 500
+
+# Payroll history rows per page (newest first)
+PAYROLL_PAGE_SIZE = 50
+
+def _select_list(columns):
+    """SELECT list for the given in-app keys (None = DEFAULT_COLUMNS); username is always included."""
+    if columns is None:
+        columns = DEFAULT_COLUMNS
+    unknown = set(columns) - set(EMPLOYEE_COLUMNS)
+    if unknown:
+        raise ValueError(f"Unknown employee columns: {sorted(unknown)}")
+    return ", ".join(["username"] + [EMPLOYEE_COLUMNS[key] for key in columns])
+
+class EmployeeRecord(MutableMapping):
+    """One employee in a slotted object that reads and writes like the employee dict it replaces.
+
+    emp['salary'], emp.get('days'), 'email' in emp, dict(emp) and emp.pop('password') work as
+    before, over the fields that were loaded; there is no per-row dict. The bcrypt hash is not
+    loaded with the rest (see DEFAULT_COLUMNS): emp['password'] fetches it by primary key the
+    first time, while get() and `in` only look at what is already loaded.
+    """
+    __slots__ = ('username',) + tuple(EMPLOYEE_COLUMNS)
+
+    def __init__(self, username=None, fields=(), **kwargs):
+        self.username = username
+        self.update(fields, **kwargs)
+
+    def __getitem__(self, key):
+        if key not in EMPLOYEE_COLUMNS:
+            raise KeyError(key)
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            if key == 'password' and self.username is not None:
+                return self.load_password()
+            raise KeyError(key) from None
+
+    def __setitem__(self, key, value):
+        if key not in EMPLOYEE_COLUMNS:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __delitem__(self, key):
+        if key not in EMPLOYEE_COLUMNS:
+            raise KeyError(key)
+        try:
+            delattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def __contains__(self, key):
+        return key in EMPLOYEE_COLUMNS and hasattr(self, key)
+
+    def __iter__(self):
+        return (key for key in EMPLOYEE_COLUMNS if hasattr(self, key))
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def get(self, key, default=None):
+        return getattr(self, key, default) if key in EMPLOYEE_COLUMNS else default
+
+    def copy(self):
+        return EmployeeRecord(self.username, self)
+
+    def load_password(self):
+        """The stored bcrypt hash, read on first use and then kept (None if the employee is gone)."""
+        if not hasattr(self, 'password'):
+            stored = get_employee(self.username, columns=('password',))
+            self.password = stored.get('password') if stored is not None else None
+        return self.password
+
+    def __repr__(self):
+        return f"EmployeeRecord({self.username!r}, {dict(self)!r})"
+
+# Column value -> in-app value; department and status have a handful of distinct values, so every
+# record shares one interned string instead of holding its own copy
+_CONVERTERS = {
+    'salary': float,  # DECIMAL to float
+    'pending': bool,  # TINYINT to bool
+    'department': sys.intern,
+    'status': sys.intern
+}
+
+def _row_to_employee(row):
+    """Map an employees table row (or a projection of it) to an EmployeeRecord."""
+    emp = EmployeeRecord.__new__(EmployeeRecord)
+    emp.username = row.get('username')
+    for key, column in EMPLOYEE_COLUMNS.items():
+        if column in row:
+            value = row[column]
+            convert = _CONVERTERS.get(key)
+            setattr(emp, key, value if convert is None or value is None else convert(value))
+    return emp
+
+class EmployeeStore(dict):
+    """Employee map {username: EmployeeRecord} that remembers which usernames were changed.
+
+    Plain employee dicts can be stored too (e.g. a form's new values). columns is the projection
+    the store was loaded with (None = DEFAULT_COLUMNS); refreshes re-read the same columns.
+    """
+
+    def __init__(self, *args, columns=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.columns = columns
+        self.dirty = set()
+
+    def __setitem__(self, username, emp):
+        super().__setitem__(username, emp)
+        self.dirty.add(username)
+
+    def __delitem__(self, username):
+        super().__delitem__(username)
+        self.dirty.discard(username)
+
+    def mark_dirty(self, username):
+        """Flag an employee edited in place (e.g. store[key]['days'] = 5) for the next save."""
+        self.dirty.add(username)
+
+    @traced
+    def save(self):
+        """Write only the changed employees in one batched upsert, then refresh just those rows."""
+        changes = self.take_changes()
+        if not changes:
+            return
+        try:
+            fresh = write_employees(changes, columns=self.columns)
+        except Exception:
+            self.dirty.update(changes)  # Keep them for the next save
+            raise
+        self.apply(changes, fresh)
+
+    def take_changes(self):
+        """Clear the dirty set and return copies of those rows, e.g. to write them on a worker thread."""
+        changes = {username: dict(self[username]) for username in self.dirty if username in self}
+        self.dirty.clear()
+        return changes
+
+    def apply(self, usernames, fresh):
+        """Replace the given employees with freshly read rows (dropping ones that no longer exist)."""
+        for username in usernames:
+            if username in fresh:
+                dict.__setitem__(self, username, fresh[username])
+            else:
+                dict.pop(self, username, None)
+
+    @traced
+    def refresh(self, usernames):
+        """Re-read the given employees from the database without marking them dirty."""
+        usernames = list(usernames)
+        self.apply(usernames, get_employees(usernames, columns=self.columns))
+
+# Soft-deleted employees keep their row, with deleted_at set, until purger.py removes it
+NOT_DELETED = "deleted_at IS NULL"
+
+def employee_filters(department=None, status=None, pending=None, conditions=None, params=None):
+    """WHERE conditions and parameters for the employee filters that are set (None = any).
+
+    department '' matches employees without one (NULL or blank), the group payroll_monthly files
+    them under. Deleted employees never match. Appends to the given conditions/params lists, or new
+    ones; returns (conditions, params).
+    """
+    conditions = [] if conditions is None else conditions
+    params = [] if params is None else params
+    conditions.append(NOT_DELETED)
+    if department == '':
+        conditions.append("(department IS NULL OR department = '')")
+    elif department is not None:
+        conditions.append("department = %s")
+        params.append(department)
+    if status is not None:
+        conditions.append("status = %s")
+        params.append(status)
+    if pending is not None:
+        conditions.append("pending = %s")
+        params.append(1 if pending else 0)
+    return conditions, params
+
+@traced
+def load_employee_page(after=None, limit=PAGE_SIZE, columns=None, department=None, status=None, pending=None):
+    """Load one page of employees ordered by username, filtered on the server.
+
+    Keyset pagination: pass the returned next_after as after to get the following page, so every
+    page is an index range scan no matter how deep it is. Returns (EmployeeStore, next_after);
+    next_after is None on the last page.
+    """
+    conditions, params = [], []
+    if after is not None:
+        conditions.append("username > %s")
+        params.append(after)
+    employee_filters(department, status, pending, conditions, params)
+    where = f"WHERE {' AND '.join(conditions)}"
+    params.append(limit)
     conn = get_connection()
     try:
         with conn.cursor() as cursor:
-            cursor.execute("SELECT * FROM employees")
+            cursor.execute(f"SELECT {_select_list(columns)} FROM employees {where} ORDER BY username LIMIT %s", params)
             rows = cursor.fetchall()
-            employees = {}
-            for row in rows:
-                username = row['username']
-                employees[username] = {
-                    'name': row['name'],
-                    'email': row['email'],
-                    'id': row['emp_id'],
-                    'salary': float(row['salary']),  # Convert DECIMAL to float
-                    'days': row['days_worked'],
-                    'department': row['department'],
-                    'password': row['password'],  # Hashed password
-                    'status': row['status'],
-                    'pending': bool(row['pending']),  # Convert TINYINT to bool
-                    'created_at': row['created_at'],
-                    'updated_at': row['updated_at']
-                }
-            return employees
-    except pymysql.Error as e:
-        print(f"Load Employees Error: {e}")
-        return {}
+            page = EmployeeStore(((row['username'], _row_to_employee(row)) for row in rows), columns=columns)
+            next_after = rows[-1]['username'] if len(rows) == limit else None
+            return page, next_after
+    except pymysql.Error as e:
+        _log_error("Load Employee Page", e)
+        return EmployeeStore(columns=columns), None
     finally:
         conn.close()
 
-def get_employee(username):
+def iter_employee_pages(page_size=PAGE_SIZE, columns=None, **filters):
+    """Yield successive EmployeeStore pages for the given filters (department, status, pending)."""
+    after = None
+    while True:
+        page, after = load_employee_page(after, page_size, columns, **filters)
+        if page:
+            yield page
+        if after is None:
+            return
+
+@traced
+def load_employees(columns=None, **filters):
+    """Load all matching employees as an EmployeeStore {username: EmployeeRecord}.
+
+    Reads page by page; pass columns to leave out data the caller doesn't need. Password hashes
+    are left out unless columns asks for them.
+    """
+    employees = EmployeeStore(columns=columns)
+    for page in iter_employee_pages(columns=columns, **filters):
+        dict.update(employees, page)
+    return employees
+
+@traced
+def get_employee(username, columns=None):
     """Load a single employee by username."""
     conn = get_connection()
     try:
         with conn.cursor() as cursor:
-            cursor.execute("SELECT * FROM employees WHERE username = %s", (username,))
+            cursor.execute(f"SELECT {_select_list(columns)} FROM employees WHERE username = %s AND {NOT_DELETED}",
+                           (username,))
             row = cursor.fetchone()
             if row:
-                return {
-                    'name': row['name'],
-                    'email': row['email'],
-                    'id': row['emp_id'],
-                    'salary': float(row['salary']),
-                    'days': row['days_worked'],
-                    'department': row['department'],
-                    'password': row['password'],  # Hashed
-                    'status': row['status'],
-                    'pending': bool(row['pending']),
-                    'created_at': row['created_at'],
-                    'updated_at': row['updated_at']
-                }
+                return _row_to_employee(row)
             return None
     except pymysql.Error as e:
-        print(f"Get Employee Error: {e}")
+        _log_error("Get Employee", e)
         return None
     finally:
         conn.close()
 
-def save_employees(employees):
-    """Save the employees dict to the database (upsert each record). Password should be pre-hashed."""
-    conn = get_connection()
-    try:
-        with conn.cursor() as cursor:
-            for username, emp in employees.items():
-                cursor.execute("""
-                    INSERT INTO employees 
-                    (username, name, email, emp_id, salary, days_worked, department, password, status, pending)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                    ON DUPLICATE KEY UPDATE
-                    name = VALUES(name),
-                    email = VALUES(email),
-                    emp_id = VALUES(emp_id),
-                    salary = VALUES(salary),
-                    days_worked = VALUES(days_worked),
-                    department = VALUES(department),
-                    password = VALUES(password),
-                    status = VALUES(status),
-                    pending = VALUES(pending)
-                """, (
-                    username, emp.get('name'), emp.get('email'), emp.get('id'),
-                    emp.get('salary'), emp.get('days'), emp.get('department'),
-                    emp.get('password'), emp.get('status'), emp.get('pending', True)  # Default pending to True for new/updated
-                ))
+@traced
+def get_employees(usernames, columns=None):
+    """Load the given employees as a dict {username: EmployeeRecord} in one query."""
+    usernames = list(usernames)
+    if not usernames:
+        return {}
+    conn = get_connection()
+    try:
+        employees = {}
+        with conn.cursor() as cursor:
+            for start in range(0, len(usernames), IN_CLAUSE_CHUNK):
+                chunk = usernames[start:start + IN_CLAUSE_CHUNK]
+                placeholders = ", ".join(["%s"] * len(chunk))
+                cursor.execute(f"SELECT {_select_list(columns)} FROM employees "
+                               f"WHERE username IN ({placeholders}) AND {NOT_DELETED}", chunk)
+                for row in cursor.fetchall():
+                    employees[row['username']] = _row_to_employee(row)
+        return employees
+    except pymysql.Error as e:
+        _log_error("Get Employees", e)
+        return {}
+    finally:
+        conn.close()
+
+@traced
+def get_login_record(username):
+    """An employee's SUMMARY_COLUMNS record plus password hash in one primary-key lookup, or None."""
+    return get_employee(username, columns=SUMMARY_COLUMNS + ('password',))
+
+@traced
+def authenticate(username, password):
+    """Check an employee's credentials with a single primary-key lookup.
+
+    Returns the employee's SUMMARY_COLUMNS record on success (so the dashboard needn't query
+    again), or None for an unknown username or wrong password. bcrypt runs on the calling
+    thread; the UI verifies through workers.PasswordService instead.
+    """
+    emp = get_login_record(username)
+    if emp is None:
+        return None
+    if not check_password(password, emp.pop('password')):
+        return None
+    return emp
+
+EMPLOYEE_UPSERT_SQL = """
+    INSERT INTO employees
+    (username, name, email, emp_id, salary, days_worked, department, password, status, pending)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+    name = VALUES(name),
+    email = VALUES(email),
+    emp_id = VALUES(emp_id),
+    salary = VALUES(salary),
+    days_worked = VALUES(days_worked),
+    department = VALUES(department),
+    password = COALESCE(NULLIF(VALUES(password), ''), password),
+    status = VALUES(status),
+    pending = VALUES(pending),
+    deleted_at = NULL
+"""
+
+def _emp_id_owners(cursor, emp_ids, lock=False):
+    # {emp_id: username} of the employees holding them, deleted ones included (their IDs stay taken)
+    owners = {}
+    emp_ids = list(emp_ids)
+    for chunk in _in_chunks(emp_ids):
+        cursor.execute(f"SELECT username, emp_id FROM employees WHERE emp_id IN ({', '.join(['%s'] * len(chunk))})"
+                       f"{' FOR UPDATE' if lock else ''}", chunk)
+        owners.update((row['emp_id'], row['username']) for row in cursor.fetchall())
+    return owners
+
+@traced
+def emp_id_owners(emp_ids):
+    """{emp_id: username} for those of emp_ids already held by an employee (deleted ones included)."""
+    conn = get_connection()
+    try:
+        with conn.cursor() as cursor:
+            return _emp_id_owners(cursor, emp_ids)
+    except pymysql.Error as e:
+        _log_error("Employee IDs", e)
+        raise
+    finally:
+        conn.close()
+
+def emp_id_conflict(emp_id, owner):
+    """The message save_employees and the CSV import report for an employee ID taken by owner."""
+    return f"Employee ID '{emp_id}' already belongs to '{owner}'"
+
+def _check_emp_ids(cursor, params):
+    # emp_id is a second unique key, so ON DUPLICATE KEY UPDATE would match on it as well and
+    # overwrite (or restore) the employee holding the ID: refuse those rows instead
+    claimed = {}
+    conflicts = []
+    for username, emp_id in ((row[0], row[3]) for row in params if row[3] is not None):
+        if claimed.setdefault(emp_id, username) != username:
+            conflicts.append(emp_id_conflict(emp_id, claimed[emp_id]))
+    owners = _emp_id_owners(cursor, claimed, lock=True)
+    conflicts += [emp_id_conflict(emp_id, owner) for emp_id, owner in owners.items()
+                  if claimed.get(emp_id, owner) != owner]
+    if conflicts:
+        raise ValueError("; ".join(conflicts[:5]) + (f" (and {len(conflicts) - 5} more)" if len(conflicts) > 5 else ""))
+
+@traced
+def save_employees(employees, usernames=None):
+    """Upsert employees in one batched statement. Password should be pre-hashed.
+
+    Only the given usernames are written when provided, otherwise every record in the dict.
+    A missing/None password keeps the stored hash of an existing employee. It is sent as '' rather
+    than NULL, which a NOT NULL column rejects before the duplicate key is resolved; a new employee
+    saved that way gets an empty hash, which never matches at login. Raises ValueError, writing
+    nothing, if an employee ID belongs to another employee (see emp_id_owners).
+    """
+    if usernames is None:
+        usernames = list(employees)
+    params = []
+    for username in usernames:
+        emp = employees[username]
+        params.append((
+            username, emp.get('name'), emp.get('email'), emp.get('id') or None,  # emp_id is unique; blank = NULL
+            emp.get('salary'), emp.get('days'), emp.get('department'),
+            emp.get('password') or '', emp.get('status'), emp.get('pending', True)  # Default pending to True for new/updated
+        ))
+    if not params:
+        return
+    conn = get_connection()
+    try:
+        with conn.cursor() as cursor:
+            _check_emp_ids(cursor, params)
+            # pymysql folds executemany on INSERT ... VALUES into multi-row statements
+            cursor.executemany(EMPLOYEE_UPSERT_SQL, params)
+        conn.commit()
+        _notify_write('employees', list(usernames))
+    except pymysql.Error as e:
+        _log_error("Save Employees", e)
+        conn.rollback()
+        raise  # Let the caller keep its unsaved changes and report the failure
+    except ValueError:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+@traced
+def write_employees(changes, columns=None):
+    """Upsert {username: employee_dict} and return those rows as now stored (one write, one read)."""
+    save_employees(changes)
+    return get_employees(changes, columns=columns)
+
+# Fields update_employees may set
+BULK_EDIT_FIELDS = ('salary', 'days', 'department', 'status', 'pending')
+
+def _update_many(operation, assignments, assigned, usernames, department, status, pending):
+    # update_employees / delete_employees: SET assignments on the live employees targeted
+    if usernames is not None and not usernames:
+        return 0
+    conn = get_connection()
+    try:
+        changed = 0
+        with conn.cursor() as cursor:
+            if usernames is not None:
+                usernames = list(usernames)
+                for chunk in _in_chunks(usernames):
+                    cursor.execute(f"UPDATE employees SET {assignments} WHERE username IN "
+                                   f"({', '.join(['%s'] * len(chunk))}) AND {NOT_DELETED}", assigned + chunk)
+                    changed += cursor.rowcount
+            else:
+                conditions, params = employee_filters(department, status, pending)
+                where = f"WHERE {' AND '.join(conditions)}"
+                # Locks the matching rows, and names them for the write listeners
+                cursor.execute(f"SELECT username FROM employees {where} FOR UPDATE", params)
+                usernames = [row['username'] for row in cursor.fetchall()]
+                cursor.execute(f"UPDATE employees SET {assignments} {where}", assigned + params)
+                changed = cursor.rowcount
         conn.commit()
+        _notify_write('employees', usernames)
+        return changed
     except pymysql.Error as e:
-        print(f"Save Employees Error: {e}")
+        _log_error(operation, e)
         conn.rollback()
+        raise
     finally:
         conn.close()
 
+@traced
+def update_employees(values, usernames=None, department=None, status=None, pending=None):
+    """Set the same values ({field: value}) on many employees in one transaction.
+
+    Targets the given usernames, or else every employee matching the filters (None = any, as in
+    employee_filters; no usernames and no filters means everyone). A filter is applied by a single
+    set-based UPDATE, usernames by one UPDATE per IN_CLAUSE_CHUNK of them. Returns the number of
+    employees changed (rows already holding the values don't count). Setting days also marks the
+    employees pending, as saving one employee does, unless values sets pending itself. Raises
+    ValueError for fields not in BULK_EDIT_FIELDS and, after rolling back, on database errors.
+    """
+    unknown = set(values) - set(BULK_EDIT_FIELDS)
+    if unknown or not values:
+        raise ValueError(f"Cannot bulk edit {', '.join(sorted(unknown)) or 'nothing'}")
+    if 'days' in values and 'pending' not in values:
+        values = dict(values, pending=True)  # The new attendance is paid in the next run
+    assignments = ", ".join(f"{EMPLOYEE_COLUMNS[field]} = %s" for field in values)
+    assigned = [values[field] for field in values]
+    return _update_many("Update Employees", assignments, assigned, usernames, department, status, pending)
+
+@traced
+def delete_employees(usernames=None, department=None, status=None, pending=None):
+    """Soft-delete many employees in one transaction, targeted as in update_employees.
+
+    Only stamps deleted_at, so it costs what a bulk edit does however much payroll history the
+    employees have: from the commit on they are gone from every query and view. purger.py removes
+    their history (to payrolls_archive) and then the rows a small batch at a time; until then their
+    emp_id stays taken, and saving one of the usernames again restores that employee. Returns the
+    number of employees deleted; raises, after rolling back, on database errors.
+    """
+    return _update_many("Delete Employees", "deleted_at = NOW()", [], usernames, department, status, pending)
+
+@traced
 def delete_employee(username):
-    """Delete an employee by username, including related payroll records."""
+    """Delete an employee by username (a soft delete, see delete_employees)."""
+    return delete_employees([username])
+
+@traced
+def load_deleted_usernames(limit=100):
+    """Usernames of soft-deleted employees still waiting to be purged, longest deleted first."""
     conn = get_connection()
     try:
         with conn.cursor() as cursor:
-            # Delete related payroll records first to avoid foreign key constraints
-            cursor.execute("DELETE FROM payrolls WHERE employee_username = %s", (username,))
-            # Then delete the employee
-            cursor.execute("DELETE FROM employees WHERE username = %s", (username,))
+            cursor.execute("SELECT username FROM employees WHERE deleted_at IS NOT NULL "
+                           "ORDER BY deleted_at LIMIT %s", (limit,))
+            return [row['username'] for row in cursor.fetchall()]
+    except pymysql.Error as e:
+        _log_error("Load Deleted Employees", e)
+        return []
+    finally:
+        conn.close()
+
+# Payroll rows purge_deleted_employee moves per transaction
+PURGE_BATCH = 500
+
+@traced
+def purge_deleted_employee(username, batch_size=PURGE_BATCH, archive=True):
+    """Purge the next batch of a soft-deleted employee, in one short transaction.
+
+    Moves up to batch_size of their payroll rows, oldest first along the history index, to
+    payrolls_archive (or just deletes them if not archive); once none are left, deletes the
+    employee row. Returns the number of payroll rows purged: 0 once the employee is gone, or if
+    they were restored meanwhile. payroll_monthly keeps their totals, as the runs were paid.
+    """
+    conn = get_connection()
+    try:
+        with conn.cursor() as cursor:
+            # Locks the tombstone, so the employee can't be restored halfway through a batch
+            cursor.execute("SELECT deleted_at FROM employees WHERE username = %s FOR UPDATE", (username,))
+            row = cursor.fetchone()
+            if row is None or row['deleted_at'] is None:
+                conn.commit()
+                return 0
+            cursor.execute("""
+                SELECT id FROM payrolls WHERE employee_username = %s
+                ORDER BY processed_at LIMIT %s FOR UPDATE
+            """, (username, batch_size))
+            ids = [row['id'] for row in cursor.fetchall()]
+            if ids:
+                placeholders = ", ".join(["%s"] * len(ids))
+                if archive:
+                    cursor.execute(f"""
+                        INSERT INTO payrolls_archive
+                        (id, employee_username, gross, tax, net, processed_at, period, run_id)
+                        SELECT id, employee_username, gross, tax, net, processed_at, period, run_id
+                        FROM payrolls WHERE id IN ({placeholders})
+                    """, ids)
+                cursor.execute(f"DELETE FROM payrolls WHERE id IN ({placeholders})", ids)
+            else:
+                cursor.execute("DELETE FROM employees WHERE username = %s", (username,))
+        conn.commit()
+        if ids:
+            _notify_write('payrolls', [username])
+        return len(ids)
+    except pymysql.Error as e:
+        _log_error("Purge Employee", e)
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+# Monthly payroll totals per department, kept in step with the payrolls table by save_payrolls.
+# department is '' for employees without one (it is part of the primary key).
+PAYROLL_ROLLUP_DDL = """
+    CREATE TABLE IF NOT EXISTS payroll_monthly (
+        month DATE NOT NULL,
+        department VARCHAR(100) NOT NULL DEFAULT '',
+        payrolls INT NOT NULL DEFAULT 0,
+        gross DECIMAL(16,2) NOT NULL DEFAULT 0,
+        tax DECIMAL(16,2) NOT NULL DEFAULT 0,
+        net DECIMAL(16,2) NOT NULL DEFAULT 0,
+        PRIMARY KEY (month, department)
+    )
+"""
+
+PAYROLL_ROLLUP_SQL = """
+    INSERT INTO payroll_monthly (month, department, payrolls, gross, tax, net)
+    VALUES (%s, %s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+        payrolls = payrolls + VALUES(payrolls),
+        gross = gross + VALUES(gross),
+        tax = tax + VALUES(tax),
+        net = net + VALUES(net)
+"""
+
+@traced
+def ensure_payroll_rollup():
+    """Create payroll_monthly if needed, backfilling it from the payroll history the first time."""
+    global _rollup_ready
+    if _rollup_ready:
+        return
+    conn = get_connection()
+    try:
+        with conn.cursor() as cursor:
+            create_payroll_rollup(cursor)
+        conn.commit()
+        _rollup_ready = True
+    except pymysql.Error as e:
+        _log_error("Payroll Rollup", e)  # Statements using the table then fail and report it
+        conn.rollback()
+    finally:
+        conn.close()
+
+def mark_payroll_rollup_ready():
+    """Skip ensure_payroll_rollup's check in this process, e.g. in worker processes whose parent
+    has already ensured the table: a backfill racing their payroll writes would count them twice."""
+    global _rollup_ready
+    _rollup_ready = True
+
+@traced
+def rebuild_payroll_rollup():
+    """Recompute payroll_monthly from the whole payrolls table (one full scan, for repairs)."""
+    ensure_payroll_rollup()
+    conn = get_connection()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("DELETE FROM payroll_monthly")
+            fill_payroll_rollup(cursor)
         conn.commit()
+        _notify_write('payroll_monthly')
     except pymysql.Error as e:
-        print(f"Delete Employee Error: {e}")
+        _log_error("Payroll Rollup", e)
         conn.rollback()
-        raise  # Propagate the error to the caller (UI) for proper handling
+        raise
     finally:
         conn.close()
 
-def save_payrolls(employees):
-    """Process payroll calculations and save to payrolls table, then set pending=0."""
+def create_payroll_rollup(cursor, by_period=True):
+    """Create payroll_monthly if needed and backfill it when empty (also run by migrations.py)."""
+    cursor.execute(PAYROLL_ROLLUP_DDL)
+    cursor.execute("SELECT 1 FROM payroll_monthly LIMIT 1")
+    if cursor.fetchone() is None:
+        fill_payroll_rollup(cursor, by_period)
+
+def fill_payroll_rollup(cursor, by_period=True):
+    """Sum the payrolls table into payroll_monthly (one full scan).
+
+    by_period=False is for schemas without payrolls.period (before migration 6), where every
+    payroll counts in the month it was processed.
+    """
+    # History of purged employees is gone from payrolls, and departments are the current ones.
+    # Ledger runs count in their period, as save_payroll_chunk adds them; older rows in the month processed
+    month = "DATE_FORMAT(p.processed_at, '%Y-%m-01')"
+    if by_period:
+        month = f"COALESCE(p.period, {month})"
+    cursor.execute(f"""
+        INSERT INTO payroll_monthly (month, department, payrolls, gross, tax, net)
+        SELECT {month}, COALESCE(e.department, ''), COUNT(*), SUM(p.gross), SUM(p.tax), SUM(p.net)
+        FROM payrolls p LEFT JOIN employees e ON e.username = p.employee_username
+        GROUP BY {month}, COALESCE(e.department, '')
+    """)
+
+# What save_payrolls did: employees paid, and pending employees skipped as already paid for period
+PayrollRunResult = namedtuple('PayrollRunResult', ['paid', 'skipped', 'period'])
+
+# Serialises payroll runs across processes and windows (a MySQL named lock, held by one session)
+PAYROLL_RUN_LOCK = 'payroll_db_payroll_run'
+
+# What paying an employee needs
+PAYROLL_COLUMNS = ('salary', 'days', 'department', 'pending')
+
+def _in_chunks(values):
+    for start in range(0, len(values), IN_CLAUSE_CHUNK):
+        yield values[start:start + IN_CLAUSE_CHUNK]
+
+@contextmanager
+def payroll_run_lock():
+    """Hold the payroll run lock for the block; raises RuntimeError if another run holds it."""
     conn = get_connection()
     try:
         with conn.cursor() as cursor:
-            for username, emp in employees.items():
-                if emp.get('pending', False):
-                    gross = (emp.get('salary', 0) / 30) * emp.get('days', 0)
-                    tax = 0.15 * gross
-                    net = gross - tax
-                    cursor.execute("""
-                        INSERT INTO payrolls (employee_username, gross, tax, net)
-                        VALUES (%s, %s, %s, %s)
-                    """, (username, gross, tax, net))
-                    cursor.execute("UPDATE employees SET pending = 0 WHERE username = %s", (username,))
+            cursor.execute("SELECT GET_LOCK(%s, 0) AS locked", (PAYROLL_RUN_LOCK,))
+            if not cursor.fetchone()['locked']:
+                raise RuntimeError("Another payroll run is in progress")
+        try:
+            yield
+        finally:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT RELEASE_LOCK(%s)", (PAYROLL_RUN_LOCK,))
+    finally:
+        conn.close()
+
+@traced
+def begin_payroll_run(period=None):
+    """The payroll run to work on, from the payroll_runs ledger (migration 6); call it under payroll_run_lock.
+
+    An unfinished run (one that failed or whose process died) is resumed: it keeps its period,
+    timestamp and progress. Otherwise a new run is started for period (default: this month).
+    Returns the ledger row as a dict (id, period, status, processed_at, employees, chunks,
+    first_username, last_username, ...).
+    """
+    conn = get_connection()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT * FROM payroll_runs WHERE status <> 'completed' ORDER BY id LIMIT 1")
+            run = cursor.fetchone()
+            if run is None:
+                processed_at = datetime.now().replace(microsecond=0)
+                cursor.execute("INSERT INTO payroll_runs (period, processed_at) VALUES (%s, %s)",
+                               (period or processed_at.date().replace(day=1), processed_at))
+                cursor.execute("SELECT * FROM payroll_runs WHERE id = %s", (cursor.lastrowid,))
+                run = cursor.fetchone()
+            elif run['status'] != 'running':
+                cursor.execute("UPDATE payroll_runs SET status = 'running', error = NULL WHERE id = %s", (run['id'],))
+                run['status'] = 'running'
         conn.commit()
+        return run
     except pymysql.Error as e:
-        print(f"Save Payrolls Error: {e}")
+        _log_error("Begin Payroll Run", e)
         conn.rollback()
+        raise
     finally:
         conn.close()
 
+@traced
+def save_payroll_chunk(run, employees):
+    """Pay the pending employees of {username: employee} as part of run, in one transaction.
+
+    Idempotent per (employee, period): employees that already have a payroll for the run's period
+    are skipped and stay pending for the next one, so retrying a chunk never pays anyone twice.
+    The payroll rows, their totals in payroll_monthly, the cleared pending flags and the run's
+    progress in the ledger commit together. Raises on database errors (after rolling back).
+    Returns (employees paid, pending employees skipped as already paid for the period).
+    """
+    usernames = [username for username, emp in employees.items() if emp.get('pending', False)]
+    if not usernames:
+        return 0, 0
+    period = run['period']
+    ensure_payroll_rollup()
+    conn = get_connection()
+    try:
+        with conn.cursor() as cursor:
+            # Locking read: a concurrent insert of the same (employee, period) waits for this transaction
+            paid = set()
+            for chunk in _in_chunks(usernames):
+                cursor.execute(f"""
+                    SELECT employee_username FROM payrolls
+                    WHERE period = %s AND employee_username IN ({', '.join(['%s'] * len(chunk))})
+                    FOR UPDATE
+                """, [period] + chunk)
+                paid.update(row['employee_username'] for row in cursor.fetchall())
+            usernames = [username for username in usernames if username not in paid]
+            if usernames:
+                pay = compute_employees(employees[username] for username in usernames)
+                gross, tax, net = as_decimals(pay.gross), as_decimals(pay.tax), as_decimals(pay.net)
+                totals = group_totals([employees[username].get('department') or '' for username in usernames], pay)
+                cursor.executemany("""
+                    INSERT INTO payrolls (employee_username, gross, tax, net, processed_at, period, run_id)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s)
+                """, [row + (run['processed_at'], period, run['id']) for row in zip(usernames, gross, tax, net)])
+                # The run's period is the month it pays, even when resumed in a later month
+                cursor.executemany(PAYROLL_ROLLUP_SQL, [
+                    (period, department, count, centavos_to_decimal(g), centavos_to_decimal(t), centavos_to_decimal(n))
+                    for department, (count, g, t, n) in totals.items()
+                ])
+                for chunk in _in_chunks(usernames):
+                    placeholders = ", ".join(["%s"] * len(chunk))
+                    cursor.execute(f"UPDATE employees SET pending = 0 WHERE username IN ({placeholders})", chunk)
+            # Progress of the last committed chunk; parallel workers widen the range from both ends
+            first, last = min(employees), max(employees)
+            cursor.execute("""
+                UPDATE payroll_runs
+                SET employees = employees + %s, chunks = chunks + 1,
+                    first_username = LEAST(COALESCE(first_username, %s), %s),
+                    last_username = GREATEST(COALESCE(last_username, %s), %s)
+                WHERE id = %s
+            """, (len(usernames), first, first, last, last, run['id']))
+        conn.commit()
+        if usernames:
+            _notify_write('payrolls', usernames)
+            _notify_write('payroll_monthly')
+            _notify_write('employees', usernames)
+        return len(usernames), len(paid)
+    except pymysql.Error as e:
+        _log_error("Save Payrolls", e)
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+@traced
+def finish_payroll_run(run, error=None):
+    """Mark run completed, or failed with the error's message (a later run resumes it).
+
+    A run that completes without having paid anyone is deleted instead, so approving payroll with
+    no pending employees leaves no empty runs in the ledger.
+    """
+    conn = get_connection()
+    try:
+        with conn.cursor() as cursor:
+            if not error:
+                cursor.execute("DELETE FROM payroll_runs WHERE id = %s AND employees = 0", (run['id'],))
+            if error or not cursor.rowcount:
+                cursor.execute("UPDATE payroll_runs SET status = %s, error = %s, finished_at = NOW() WHERE id = %s",
+                               ('failed' if error else 'completed', str(error)[:1000] if error else None, run['id']))
+        conn.commit()
+    except pymysql.Error as e:
+        _log_error("Finish Payroll Run", e)
+        conn.rollback()
+    finally:
+        conn.close()
+
+@traced
+def load_payroll_runs(limit=20):
+    """The most recent payroll runs in the ledger, newest first."""
+    conn = get_connection()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT * FROM payroll_runs ORDER BY id DESC LIMIT %s", (limit,))
+            return cursor.fetchall()
+    except pymysql.Error as e:
+        _log_error("Load Payroll Runs", e)
+        return []
+    finally:
+        conn.close()
+
+@traced
+def save_payrolls(employees=None):
+    """Process payroll for every pending employee as one run in the payroll_runs ledger.
+
+    Runs as a bulk job, IN_CLAUSE_CHUNK employees at a time: each chunk is computed in one pass and
+    committed with save_payroll_chunk (payroll rows, monthly rollup, pending flags, ledger progress).
+    If a chunk fails the run is marked failed and the error raised; the next call, or
+    payroll_runner.py, resumes it without redoing the committed chunks. Holds payroll_run_lock, so
+    a second click while a run is in progress fails instead of racing it. Without an employees dict
+    the pending employees are read from the database, page by page. Returns a PayrollRunResult.
+    """
+    with payroll_run_lock():
+        run = begin_payroll_run()
+        paid = skipped = 0
+        try:
+            if employees is None:
+                pages = iter_employee_pages(IN_CLAUSE_CHUNK, PAYROLL_COLUMNS, pending=True)
+            else:
+                pages = ({username: employees[username] for username in chunk} for chunk in _in_chunks(list(employees)))
+            for page in pages:
+                chunk_paid, chunk_skipped = save_payroll_chunk(run, page)
+                paid += chunk_paid
+                skipped += chunk_skipped
+        except Exception as e:
+            finish_payroll_run(run, error=e)
+            raise
+        finish_payroll_run(run)
+        return PayrollRunResult(paid, skipped, run['period'])
+
+def _row_to_payroll(row):
+    return {
+        'gross': float(row['gross']),
+        'tax': float(row['tax']),
+        'net': float(row['net']),
+        'processed_at': row['processed_at']
+    }
+
+@traced
+def load_payroll_page(username, before=None, limit=PAYROLL_PAGE_SIZE):
+    """Load one page of an employee's payroll history, newest first.
+
+    Keyset pagination on (processed_at, id): pass the returned next_before as before to get the
+    next older page. With the (employee_username, processed_at) index every page is a short index
+    range scan, however long the history. Returns (payrolls, next_before); next_before is None on
+    the oldest page.
+    """
+    conditions, params = ["employee_username = %s"], [username]
+    if before is not None:
+        processed_at, payroll_id = before
+        conditions.append("(processed_at < %s OR (processed_at = %s AND id < %s))")
+        params += [processed_at, processed_at, payroll_id]
+    params.append(limit)
+    conn = get_connection()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(f"SELECT id, gross, tax, net, processed_at FROM payrolls WHERE {' AND '.join(conditions)} "
+                           "ORDER BY processed_at DESC, id DESC LIMIT %s", params)
+            rows = cursor.fetchall()
+            next_before = (rows[-1]['processed_at'], rows[-1]['id']) if len(rows) == limit else None
+            return [_row_to_payroll(row) for row in rows], next_before
+    except pymysql.Error as e:
+        _log_error("Load Payroll Page", e)
+        return [], None
+    finally:
+        conn.close()
+
+@traced
 def load_payrolls(username):
-    """Load payroll history for an employee."""
+    """Load the whole payroll history for an employee (see load_payroll_page for views)."""
     conn = get_connection()
     try:
         with conn.cursor() as cursor:
             cursor.execute("SELECT * FROM payrolls WHERE employee_username = %s ORDER BY processed_at DESC", (username,))
-            rows = cursor.fetchall()
-            return [
-                {
-                    'gross': float(row['gross']),
-                    'tax': float(row['tax']),
-                    'net': float(row['net']),
-                    'processed_at': row['processed_at']
-                } for row in rows
-            ]
-    except pymysql.Error as e:
-        print(f"Load Payrolls Error: {e}")
+            return [_row_to_payroll(row) for row in cursor.fetchall()]
+    except pymysql.Error as e:
+        _log_error("Load Payrolls", e)
+        return []
+    finally:
+        conn.close()
+
+@traced
+def load_dashboard_aggregates(recent=6):
+    """Dashboard figures computed by the server: one grouped aggregate per department plus the newest employees.
+
+    Returns (department_rows, recent_rows). Employees without a department (NULL or blank) form
+    one '' row, as in employee_filters and payroll_monthly. Pending net pay uses
+    payroll.sql_payslip, which rounds exactly like the Python payroll kernel.
+    """
+    net = sql_payslip('salary', 'days_worked').net
+    conn = get_connection()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(f"""
+                SELECT COALESCE(department, '') AS department,
+                       COUNT(*) AS employees,
+                       SUM(COALESCE(status, 'Active') = 'Active') AS active,
+                       SUM(pending) AS pending,
+                       SUM(CASE WHEN pending = 1 THEN {net} ELSE 0 END) AS pending_net,
+                       SUM(salary) AS salary_total,
+                       SUM(days_worked) AS days_total
+                FROM employees WHERE deleted_at IS NULL
+                GROUP BY COALESCE(department, '')
+            """)
+            departments = cursor.fetchall()
+            cursor.execute("""
+                SELECT username, name, emp_id, salary, days_worked, pending
+                FROM employees WHERE deleted_at IS NULL ORDER BY created_at DESC LIMIT %s
+            """, (recent,))
+            return departments, [dict(_row_to_employee(row), username=row['username']) for row in cursor.fetchall()]
+    except pymysql.Error as e:
+        _log_error("Load Dashboard Aggregates", e)
+        return [], []
+    finally:
+        conn.close()
+
+@traced
+def load_payroll_trend(months=12, department=None):
+    """Net payroll per month for the last months (oldest first), read from payroll_monthly.
+
+    Returns [(month, net)] with month as the first day of the month; months without payroll runs
+    are absent. Costs O(months x departments) however long the payroll history is.
+    """
+    today = date.today()
+    first = today.year * 12 + today.month - months  # Month index of the earliest month shown
+    since = date(first // 12, first % 12 + 1, 1)
+    params = [since]
+    where = "month >= %s"
+    if department is not None:
+        where += " AND department = %s"
+        params.append(department)
+    ensure_payroll_rollup()
+    conn = get_connection()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(f"SELECT month, SUM(net) AS net FROM payroll_monthly WHERE {where} "
+                           "GROUP BY month ORDER BY month", params)
+            return [(row['month'], row['net']) for row in cursor.fetchall()]
+    except pymysql.Error as e:
+        _log_error("Load Payroll Trend", e)
         return []
     finally:
-        conn.close()
\ No newline at end of file
+        conn.close()
@@ -0,0 +1,138 @@
+"""Process-wide read-through cache of employee records, shared by every window.
+
+get()/get_many() answer from the cache and read only the misses from the database, in one query.
+Entries expire after TTL seconds and the least recently used are evicted beyond MAX_ENTRIES.
+write() saves through db.write_employees and caches the rows as stored (write-through).
+
+Every committed write to employees through db.py (saves, deletes, payroll runs, imports) reaches
+the cache as a write listener: the written usernames are dropped, then subscribers are told which
+usernames changed so open views can re-read just those rows (workers.EmployeeChangeNotifier
+delivers this as a Qt signal). Records hold CACHE_COLUMNS: what the views show, never password hashes.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+import db
+
+TTL = 300  # Seconds an entry is trusted; writes made by other processes show up after this
+MAX_ENTRIES = 20000
+CACHE_COLUMNS = db.SUMMARY_COLUMNS
+
+
+class EmployeeCache:
+    """Per-username LRU cache with expiry; thread-safe (views read it from AsyncDb worker threads)."""
+
+    def __init__(self, columns=CACHE_COLUMNS, ttl=TTL, max_entries=MAX_ENTRIES):
+        self.columns = columns
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # username -> (record, cached_at), least recently used first
+        self._lock = threading.Lock()
+        self._generation = 0  # Bumped by every invalidation; reads that raced one aren't cached
+        self._subscribers = []
+        self.hits = self.misses = self.evictions = 0
+
+    def _lookup(self, username, now):
+        # Caller holds the lock
+        entry = self._entries.get(username)
+        if entry is None:
+            return None
+        if now - entry[1] >= self.ttl:
+            del self._entries[username]
+            return None
+        self._entries.move_to_end(username)
+        return entry[0]
+
+    def _store(self, records, generation=None):
+        now = time.monotonic()
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return  # Written meanwhile: these rows may predate the write
+            for username, record in records.items():
+                self._entries[username] = (record, now)
+                self._entries.move_to_end(username)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get(self, username):
+        """The employee's record, or None if there is no such employee."""
+        return self.get_many([username]).get(username)
+
+    def get_many(self, usernames):
+        """{username: record} for those of usernames that exist; misses are read in one query."""
+        found, missing = {}, []
+        now = time.monotonic()
+        with self._lock:
+            for username in usernames:
+                record = self._lookup(username, now)
+                if record is None:
+                    missing.append(username)
+                else:
+                    found[username] = record
+            self.hits += len(found)
+            self.misses += len(missing)
+            generation = self._generation
+        if missing:
+            fresh = db.get_employees(missing, columns=self.columns)
+            self._store(fresh, generation)
+            found.update(fresh)
+        return found
+
+    def put_many(self, records):
+        """Cache records just read elsewhere, e.g. a page loaded for a table."""
+        self._store(records)
+
+    def write(self, changes):
+        """Save {username: employee} through db.write_employees and cache the rows as stored.
+
+        Returns {username: record} for the saved employees.
+        """
+        fresh = db.write_employees(changes, columns=self.columns)
+        self._store(fresh)
+        return fresh
+
+    def invalidate(self, usernames=None):
+        """Drop the given usernames (None = everything)."""
+        with self._lock:
+            self._generation += 1
+            if usernames is None:
+                self._entries.clear()
+            else:
+                for username in usernames:
+                    self._entries.pop(username, None)
+
+    def subscribe(self, callback):
+        """Call callback(usernames) after employees change; usernames is None when unknown (any may have)."""
+        self._subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        if callback in self._subscribers:
+            self._subscribers.remove(callback)
+
+    def on_write(self, table, usernames=None):
+        # db write listener; runs on the thread that committed
+        if table != 'employees':
+            return
+        self.invalidate(usernames)
+        changed = None if usernames is None else list(usernames)
+        for callback in list(self._subscribers):
+            try:
+                callback(changed)
+            except Exception as e:
+                print(f"Employee Cache Subscriber Error: {e}")
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses,
+                    'evictions': self.evictions}
+
+
+_cache = EmployeeCache()
+db.add_write_listener(_cache.on_write)
+
+
+def get_cache():
+    """The process-wide EmployeeCache."""
+    return _cache
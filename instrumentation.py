@@ -0,0 +1,287 @@
+"""Timing spans for database operations and UI handlers, with a slow-operation log and trace export.
+
+Wrap a function with @traced (or a block with `with span("name"):`) and every call records its
+wall time, thread, the SQL statements it executed and the rows it fetched or sent in bulk
+(db.get_connection hands out counting cursors), and any error reported through record_error.
+Spans nest per thread; a parent's counts include its children's.
+
+Finished spans go to every listener. Built in:
+- the slow log: spans slower than SLOW_MS are logged as warnings on the "payroll.slow" logger;
+- the trace buffer (off by default): export_chrome_trace(path) writes it in Chrome trace event
+  format, viewable offline in chrome://tracing or https://ui.perfetto.dev.
+
+Environment: PAYROLL_SLOW_MS sets the threshold, PAYROLL_TRACE=<file> records a trace and writes
+it to that file when the process exits, PAYROLL_INSTRUMENTATION=0 turns everything off.
+"""
+import atexit
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+SLOW_MS = float(os.environ.get('PAYROLL_SLOW_MS', 200))
+TRACE_LIMIT = 200000  # Spans kept for export; the oldest are dropped first
+
+slow_log = logging.getLogger("payroll.slow")
+
+_enabled = os.environ.get('PAYROLL_INSTRUMENTATION', '1') != '0'
+_tracing = False
+_trace = deque(maxlen=TRACE_LIMIT)
+_listeners = []
+_local = threading.local()
+_epoch_ns = time.perf_counter_ns()
+
+
+class Span:
+    __slots__ = ('name', 'attrs', 'parent', 'start_ns', 'duration_ns', 'thread', 'statements', 'rows', 'error')
+
+    def __init__(self, name, attrs, parent):
+        self.name = name
+        self.attrs = attrs
+        self.parent = parent
+        self.thread = threading.get_ident()
+        self.statements = 0
+        self.rows = 0
+        self.error = None
+        self.duration_ns = 0
+        self.start_ns = time.perf_counter_ns()
+
+    @property
+    def duration_ms(self):
+        return self.duration_ns / 1e6
+
+    def __repr__(self):
+        return (f"<Span {self.name} {self.duration_ms:.1f} ms, {self.statements} statements, "
+                f"{self.rows} rows{', error' if self.error else ''}>")
+
+
+def _stack():
+    stack = getattr(_local, 'stack', None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+
+def current_span():
+    """Innermost open span on this thread, or None."""
+    stack = _stack()
+    return stack[-1] if stack else None
+
+
+class span:
+    """Context manager timing a block as a span named name; attrs are recorded with it."""
+    __slots__ = ('name', 'attrs', 'span')
+
+    def __init__(self, name, **attrs):
+        self.name = name
+        self.attrs = attrs
+        self.span = None
+
+    def __enter__(self):
+        if not _enabled:
+            return None
+        stack = _stack()
+        self.span = Span(self.name, self.attrs, stack[-1] if stack else None)
+        stack.append(self.span)
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb):
+        current = self.span
+        if current is None:
+            return False
+        current.duration_ns = time.perf_counter_ns() - current.start_ns
+        if exc is not None and current.error is None:
+            current.error = f"{exc_type.__name__}: {exc}"
+        stack = _stack()
+        if stack and stack[-1] is current:
+            stack.pop()
+        if current.parent is not None:
+            current.parent.statements += current.statements
+            current.parent.rows += current.rows
+        _finish(current)
+        return False
+
+
+def traced(name=None):
+    """Decorator recording every call as a span; usable bare (@traced) or named (@traced("ui.save"))."""
+    def decorate(func, span_name):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            with span(span_name):
+                return func(*args, **kwargs)
+        return wrapper
+
+    if callable(name):
+        return decorate(name, f"{name.__module__}.{name.__qualname__}")
+    return lambda func: decorate(func, name or f"{func.__module__}.{func.__qualname__}")
+
+
+def count(statements=0, rows=0):
+    """Add to the innermost span's statement/row counts (no-op outside spans)."""
+    stack = getattr(_local, 'stack', None)
+    if stack:
+        stack[-1].statements += statements
+        stack[-1].rows += rows
+
+
+def record_error(error):
+    """Attach an error the caller handled (e.g. printed and returned a default) to the current span."""
+    current = current_span()
+    if current is not None:
+        current.error = f"{type(error).__name__}: {error}"
+
+
+def add_listener(callback):
+    """Call callback(span) for every finished span, on the thread that ran it."""
+    _listeners.append(callback)
+
+
+def remove_listener(callback):
+    _listeners.remove(callback)
+
+
+def _finish(finished):
+    if finished.duration_ms >= SLOW_MS:
+        slow_log.warning("%s took %.1f ms (%d statements, %d rows)%s", finished.name, finished.duration_ms,
+                         finished.statements, finished.rows, f" [{finished.error}]" if finished.error else "")
+    if _tracing:
+        _trace.append(finished)
+    for callback in list(_listeners):
+        try:
+            callback(finished)
+        except Exception as e:
+            print(f"Instrumentation Listener Error: {e}")
+
+
+def configure(enabled=None, slow_ms=None, trace=None):
+    """Turn instrumentation on/off, change the slow threshold (ms) or start/stop recording a trace."""
+    global _enabled, SLOW_MS, _tracing
+    if enabled is not None:
+        _enabled = enabled
+    if slow_ms is not None:
+        SLOW_MS = slow_ms
+    if trace is not None:
+        _tracing = trace
+
+
+def is_enabled():
+    return _enabled
+
+
+def recorded_spans():
+    return list(_trace)
+
+
+def clear_trace():
+    _trace.clear()
+
+
+def chrome_trace_events(spans=None):
+    """Spans as Chrome trace "complete" events (microsecond timestamps, one lane per thread)."""
+    pid = os.getpid()
+    events = []
+    for s in (recorded_spans() if spans is None else spans):
+        args = dict(s.attrs, statements=s.statements, rows=s.rows)
+        if s.error:
+            args['error'] = s.error
+        events.append({
+            'name': s.name,
+            'cat': s.name.split('.', 1)[0],
+            'ph': 'X',
+            'ts': (s.start_ns - _epoch_ns) / 1000,
+            'dur': s.duration_ns / 1000,
+            'pid': pid,
+            'tid': s.thread,
+            'args': {key: value if isinstance(value, (int, float, str, bool)) or value is None else str(value)
+                     for key, value in args.items()},
+        })
+    return events
+
+
+def export_chrome_trace(path, spans=None):
+    """Write the recorded spans to path as a Chrome trace JSON file; returns the number of events."""
+    events = chrome_trace_events(spans)
+    with open(path, 'w') as f:
+        json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+    return len(events)
+
+
+class _CountingCursor:
+    """Cursor proxy that counts statements and fetched rows into the current span."""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def __enter__(self):
+        self._cursor.__enter__()
+        return self
+
+    def __exit__(self, *exc_info):
+        return self._cursor.__exit__(*exc_info)
+
+    def execute(self, query, args=None):
+        count(statements=1)
+        return self._cursor.execute(query, args)
+
+    def executemany(self, query, args):
+        count(statements=1, rows=len(args) if hasattr(args, '__len__') else 0)  # Rows sent
+        return self._cursor.executemany(query, args)
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        if row is not None:
+            count(rows=1)
+        return row
+
+    def fetchmany(self, size=None):
+        rows = self._cursor.fetchmany(size) if size is not None else self._cursor.fetchmany()
+        count(rows=len(rows))
+        return rows
+
+    def fetchall(self):
+        rows = self._cursor.fetchall()
+        count(rows=len(rows))
+        return rows
+
+    def __iter__(self):
+        for row in self._cursor:
+            count(rows=1)
+            yield row
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class _CountingConnection:
+    """Connection proxy whose cursors count into the current span."""
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def cursor(self, *args, **kwargs):
+        return _CountingCursor(self._conn.cursor(*args, **kwargs))
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+def instrument_connection(conn):
+    """conn with counting cursors, or conn itself when instrumentation is off."""
+    return _CountingConnection(conn) if _enabled else conn
+
+
+def _write_trace_at_exit(path):
+    try:
+        export_chrome_trace(path)
+    except OSError as e:
+        print(f"Trace Export Error: {e}")
+
+
+if os.environ.get('PAYROLL_TRACE'):
+    _tracing = True
+    atexit.register(_write_trace_at_exit, os.environ['PAYROLL_TRACE'])
@@ -0,0 +1,355 @@
+"""Versioned schema migrations for payroll_db: creates the tables and the indexes the queries rely on.
+
+Every migration has a version number and is recorded in schema_migrations once applied, so each
+runs exactly once per database. The steps themselves are idempotent as well (CREATE ... IF NOT
+EXISTS, indexes added only when missing), so databases whose tables were made by hand in XAMPP
+are brought up to date rather than failing. Append new migrations to MIGRATIONS; never renumber.
+
+    python migrations.py                                # apply pending migrations
+    python migrations.py --status                       # list applied / pending versions
+    python migrations.py --partition-years 2020 2030    # ... and yearly partitions of payrolls
+"""
+import argparse
+from datetime import date
+
+import pymysql
+
+from db import create_payroll_rollup, get_connection
+
+PAYROLL_HISTORY_INDEX = 'idx_payrolls_employee_processed'
+PAYROLL_PERIOD_KEY = 'uq_payrolls_employee_period'
+
+# Held while migrating, so two processes starting at once don't both apply the same version
+MIGRATION_LOCK = 'payroll_db_migrations'
+LOCK_TIMEOUT = 60
+
+
+def index_exists(cursor, table, index):
+    cursor.execute("""
+        SELECT 1 FROM information_schema.statistics
+        WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s
+        LIMIT 1
+    """, (table, index))
+    return cursor.fetchone() is not None
+
+
+def add_index(cursor, table, index, columns, unique=False):
+    """CREATE [UNIQUE] INDEX unless an index with that name already exists."""
+    if index_exists(cursor, table, index):
+        return False
+    cursor.execute(f"CREATE {'UNIQUE ' if unique else ''}INDEX {index} ON {table} ({', '.join(columns)})")
+    return True
+
+
+def column_exists(cursor, table, column):
+    cursor.execute("""
+        SELECT 1 FROM information_schema.columns
+        WHERE table_schema = DATABASE() AND table_name = %s AND column_name = %s
+        LIMIT 1
+    """, (table, column))
+    return cursor.fetchone() is not None
+
+
+def partition_names(cursor, table):
+    """Names of the table's partitions, empty if it isn't partitioned."""
+    cursor.execute("""
+        SELECT partition_name AS name FROM information_schema.partitions
+        WHERE table_schema = DATABASE() AND table_name = %s AND partition_name IS NOT NULL
+        ORDER BY partition_ordinal_position
+    """, (table,))
+    return [row['name'] for row in cursor.fetchall()]
+
+
+def create_employees(cursor):
+    # username is the key every query uses; emp_id is unique but optional (NULL when blank)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS employees (
+            username VARCHAR(100) NOT NULL,
+            name VARCHAR(255) NOT NULL,
+            email VARCHAR(255),
+            emp_id VARCHAR(50),
+            salary DECIMAL(12,2) NOT NULL DEFAULT 0,
+            days_worked INT NOT NULL DEFAULT 0,
+            department VARCHAR(100),
+            password VARCHAR(255) NOT NULL,
+            status VARCHAR(20) NOT NULL DEFAULT 'Active',
+            pending TINYINT(1) NOT NULL DEFAULT 1,
+            created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+            PRIMARY KEY (username),
+            UNIQUE KEY uq_employees_emp_id (emp_id)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """)
+    # Hand-made tables may lack the keys
+    if not index_exists(cursor, 'employees', 'PRIMARY'):
+        cursor.execute("ALTER TABLE employees ADD PRIMARY KEY (username)")
+    if not index_exists(cursor, 'employees', 'uq_employees_emp_id'):
+        # Earlier versions stored a blank ID as '', which the unique key would reject twice over
+        cursor.execute("UPDATE employees SET emp_id = NULL WHERE emp_id = ''")
+    add_index(cursor, 'employees', 'uq_employees_emp_id', ['emp_id'], unique=True)
+
+
+def create_payrolls(cursor):
+    # No foreign key to employees: purger.py removes the history itself, and FKs would
+    # rule out partitioning payrolls by year
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS payrolls (
+            id INT NOT NULL AUTO_INCREMENT,
+            employee_username VARCHAR(100) NOT NULL,
+            gross DECIMAL(12,2) NOT NULL,
+            tax DECIMAL(12,2) NOT NULL,
+            net DECIMAL(12,2) NOT NULL,
+            processed_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (id)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """)
+
+
+def add_employee_filter_indexes(cursor):
+    # load_employee_page filters on these and orders by username; InnoDB appends the primary key
+    # to every secondary index, so each is effectively (column, username) and serves the keyset too
+    add_index(cursor, 'employees', 'idx_employees_department', ['department'])
+    add_index(cursor, 'employees', 'idx_employees_status', ['status'])
+    add_index(cursor, 'employees', 'idx_employees_pending', ['pending'])
+    # load_dashboard_aggregates' "newest employees"
+    add_index(cursor, 'employees', 'idx_employees_created_at', ['created_at'])
+
+
+def add_payroll_history_index(cursor):
+    # load_payroll_page: one employee's history is a contiguous index range already in
+    # processed_at order, so no full scan and no filesort however many runs the table holds
+    add_index(cursor, 'payrolls', PAYROLL_HISTORY_INDEX, ['employee_username', 'processed_at'])
+
+
+def create_monthly_rollup(cursor):
+    # payrolls.period only arrives with migration 6; until then every row would have it NULL anyway
+    create_payroll_rollup(cursor, by_period=False)
+
+
+def create_payroll_runs(cursor):
+    # The ledger db.save_payrolls and payroll_runner.py record every run in; an unfinished run
+    # (status running or failed) is resumed by the next one
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS payroll_runs (
+            id INT NOT NULL AUTO_INCREMENT,
+            period DATE NOT NULL,
+            status VARCHAR(20) NOT NULL DEFAULT 'running',
+            processed_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            employees INT NOT NULL DEFAULT 0,
+            chunks INT NOT NULL DEFAULT 0,
+            first_username VARCHAR(100),
+            last_username VARCHAR(100),
+            error TEXT,
+            finished_at TIMESTAMP NULL DEFAULT NULL,
+            PRIMARY KEY (id),
+            KEY idx_payroll_runs_status (status)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """)
+    # One payroll per employee and period. Rows from before the ledger keep period NULL, which the
+    # unique key ignores (older history may well have two payrolls in a month)
+    if not column_exists(cursor, 'payrolls', 'period'):
+        cursor.execute("ALTER TABLE payrolls ADD COLUMN period DATE NULL, ADD COLUMN run_id INT NULL")
+    columns = ['employee_username', 'period']
+    if partition_names(cursor, 'payrolls'):
+        columns.append('processed_at')  # Required in every unique key of a partitioned table
+    add_index(cursor, 'payrolls', PAYROLL_PERIOD_KEY, columns, unique=True)
+
+
+def add_employee_change_index(cursor):
+    # change_feed polls for rows stamped since its high-water mark: an index range read of just
+    # the changed rows, in the (updated_at, username) order it reads them
+    add_index(cursor, 'employees', 'idx_employees_updated_at', ['updated_at'])
+
+
+def add_soft_deletes(cursor):
+    # delete_employees only stamps deleted_at; purger.py later moves the history to payrolls_archive
+    # (same columns, plus when) and removes the row. The index finds what is left to purge
+    if not column_exists(cursor, 'employees', 'deleted_at'):
+        cursor.execute("ALTER TABLE employees ADD COLUMN deleted_at TIMESTAMP NULL DEFAULT NULL")
+    add_index(cursor, 'employees', 'idx_employees_deleted_at', ['deleted_at'])
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS payrolls_archive (
+            id INT NOT NULL,
+            employee_username VARCHAR(100) NOT NULL,
+            gross DECIMAL(12,2) NOT NULL,
+            tax DECIMAL(12,2) NOT NULL,
+            net DECIMAL(12,2) NOT NULL,
+            processed_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            period DATE NULL,
+            run_id INT NULL,
+            archived_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (id),
+            KEY idx_payrolls_archive_employee (employee_username, processed_at)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """)
+
+
+# (version, description, step(cursor)); append only
+MIGRATIONS = [
+    (1, "create employees", create_employees),
+    (2, "create payrolls", create_payrolls),
+    (3, "employee filter indexes", add_employee_filter_indexes),
+    (4, "payroll history index", add_payroll_history_index),
+    (5, "monthly payroll rollup", create_monthly_rollup),
+    (6, "payroll run ledger", create_payroll_runs),
+    (7, "employee change feed index", add_employee_change_index),
+    (8, "soft deletes and payroll archive", add_soft_deletes),
+]
+
+
+def _ensure_migrations_table(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INT NOT NULL PRIMARY KEY,
+            description VARCHAR(255) NOT NULL,
+            applied_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+        ) ENGINE=InnoDB
+    """)
+
+
+def applied_versions(cursor):
+    _ensure_migrations_table(cursor)
+    cursor.execute("SELECT version FROM schema_migrations")
+    return {row['version'] for row in cursor.fetchall()}
+
+
+def status():
+    """[(version, description, applied)] for every known migration."""
+    conn = get_connection()
+    try:
+        with conn.cursor() as cursor:
+            applied = applied_versions(cursor)
+        conn.commit()
+        return [(version, description, version in applied) for version, description, _ in MIGRATIONS]
+    finally:
+        conn.close()
+
+
+def _year_partitions(column_type, first_year, last_year):
+    # TIMESTAMP columns can only be partitioned on UNIX_TIMESTAMP(); DATETIME uses RANGE COLUMNS
+    if column_type == 'timestamp':
+        bound = "UNIX_TIMESTAMP('{}-01-01 00:00:00')"
+    else:
+        bound = "'{}-01-01'"
+    partitions = [f"PARTITION p{year} VALUES LESS THAN ({bound.format(year + 1)})"
+                  for year in range(first_year, last_year + 1)]
+    partitions.append("PARTITION pmax VALUES LESS THAN (MAXVALUE)")
+    return ", ".join(partitions)
+
+
+def _processed_at_type(cursor):
+    cursor.execute("""
+        SELECT data_type AS type FROM information_schema.columns
+        WHERE table_schema = DATABASE() AND table_name = 'payrolls' AND column_name = 'processed_at'
+    """)
+    return cursor.fetchone()['type'].lower()
+
+
+def partition_payrolls_by_year(first_year, last_year=None):
+    """Range-partition payrolls by year of processed_at (p<year> ... plus a catch-all pmax).
+
+    Optional: old years can then be archived or dropped per partition, and date-bounded queries
+    prune to the partitions they need. MySQL requires the partitioning column in every unique key,
+    so the primary key becomes (id, processed_at) and the per-period key gains processed_at (one
+    payroll per employee and period is then kept by db.save_payroll_chunk's locking check alone),
+    and partitioned InnoDB tables cannot have foreign keys. Rewrites the whole table: run it in a
+    maintenance window.
+    """
+    last_year = last_year or date.today().year + 1
+    conn = get_connection()
+    try:
+        with conn.cursor() as cursor:
+            if partition_names(cursor, 'payrolls'):
+                return False
+            column_type = _processed_at_type(cursor)
+            method = "RANGE (UNIX_TIMESTAMP(processed_at))" if column_type == 'timestamp' else "RANGE COLUMNS (processed_at)"
+            cursor.execute("ALTER TABLE payrolls DROP PRIMARY KEY, ADD PRIMARY KEY (id, processed_at)")
+            if index_exists(cursor, 'payrolls', PAYROLL_PERIOD_KEY):
+                cursor.execute(f"ALTER TABLE payrolls DROP INDEX {PAYROLL_PERIOD_KEY}, "
+                               f"ADD UNIQUE INDEX {PAYROLL_PERIOD_KEY} (employee_username, period, processed_at)")
+            cursor.execute(f"ALTER TABLE payrolls PARTITION BY {method} "
+                           f"({_year_partitions(column_type, first_year, last_year)})")
+        conn.commit()
+        print(f"Partitioned payrolls by year, {first_year} to {last_year}")
+        return True
+    except pymysql.Error as e:
+        print(f"Migration Error: {e}")
+        raise
+    finally:
+        conn.close()
+
+
+def add_payroll_year_partitions(through_year):
+    """Split pmax so every year up to through_year has its own partition (e.g. yearly, before New Year)."""
+    conn = get_connection()
+    try:
+        with conn.cursor() as cursor:
+            names = partition_names(cursor, 'payrolls')
+            years = [int(name[1:]) for name in names if name[1:].isdigit()]
+            if not years or max(years) >= through_year:
+                return False
+            partitions = _year_partitions(_processed_at_type(cursor), max(years) + 1, through_year)
+            cursor.execute(f"ALTER TABLE payrolls REORGANIZE PARTITION pmax INTO ({partitions})")
+        conn.commit()
+        print(f"Added payrolls partitions up to {through_year}")
+        return True
+    except pymysql.Error as e:
+        print(f"Migration Error: {e}")
+        raise
+    finally:
+        conn.close()
+
+
+def migrate(target=None, partition_years=None):
+    """Apply every pending migration up to target (default: all), in version order.
+
+    Each version is recorded as soon as it succeeds, so a failed run resumes from the failing
+    step. MySQL commits DDL implicitly, which is why every step is written to be re-runnable.
+    partition_years=(first, last) also partitions payrolls by year (opt-in, rewrites the table).
+    Returns the versions applied.
+    """
+    applied_now = []
+    conn = get_connection()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT GET_LOCK(%s, %s) AS locked", (MIGRATION_LOCK, LOCK_TIMEOUT))
+            if not cursor.fetchone()['locked']:
+                raise RuntimeError("Another process is running migrations")
+            try:
+                applied = applied_versions(cursor)
+                for version, description, step in MIGRATIONS:
+                    if version in applied or (target is not None and version > target):
+                        continue
+                    step(cursor)
+                    cursor.execute("INSERT INTO schema_migrations (version, description) VALUES (%s, %s)",
+                                   (version, description))
+                    conn.commit()
+                    applied_now.append(version)
+                    print(f"Applied migration {version}: {description}")
+            finally:
+                cursor.execute("SELECT RELEASE_LOCK(%s)", (MIGRATION_LOCK,))
+    except pymysql.Error as e:
+        print(f"Migration Error: {e}")
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+    if partition_years:
+        first_year, last_year = partition_years
+        if not partition_payrolls_by_year(first_year, last_year):
+            add_payroll_year_partitions(last_year)
+    return applied_now
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--target', type=int, help="stop after this version")
+    parser.add_argument('--status', action='store_true', help="list migrations and exit")
+    parser.add_argument('--partition-years', nargs=2, type=int, metavar=('FIRST', 'LAST'),
+                        help="range-partition payrolls by year (rewrites the table)")
+    args = parser.parse_args()
+    if args.status:
+        for version, description, applied in status():
+            print(f"{version:>4}  {'applied' if applied else 'pending':<8} {description}")
+    else:
+        migrate(args.target, args.partition_years)
@@ -0,0 +1,66 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import bcrypt
+
+# Password given to employees created without one
+DEFAULT_PASSWORD = "123"
+
+# Worker processes for hashing; bcrypt is CPU-bound so one per core
+WORKERS = os.cpu_count() or 2
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def hash_password(password):
+    """bcrypt hash (str) of a password with a fresh salt. CPU-bound: call through the pool from the UI."""
+    return bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
+
+
+def check_password(password, hashed):
+    """True if password matches the stored bcrypt hash; False for a missing hash."""
+    if not hashed:
+        return False
+    return bcrypt.checkpw(password.encode(), hashed.encode())
+
+
+def get_executor():
+    """Process pool shared by every password job, started on first use."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # spawn, not fork: workers must not inherit the Qt GUI process state
+            _executor = ProcessPoolExecutor(max_workers=WORKERS,
+                                            mp_context=multiprocessing.get_context("spawn"))
+        return _executor
+
+
+def submit_hash(password):
+    """Hash a password in the process pool; returns a concurrent.futures.Future of the hash."""
+    return get_executor().submit(hash_password, password)
+
+
+def submit_check(password, hashed):
+    """Verify a password in the process pool; returns a Future of the bool result."""
+    return get_executor().submit(check_password, password, hashed)
+
+
+def hash_many(passwords):
+    """Hash many passwords in parallel across all cores, for bulk onboarding and seeding. Keeps order."""
+    passwords = list(passwords)
+    if not passwords:
+        return []
+    chunksize = max(1, len(passwords) // (WORKERS * 4))
+    return list(get_executor().map(hash_password, passwords, chunksize=chunksize))
+
+
+def shutdown():
+    """Stop the worker processes (they are restarted on the next call)."""
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown()
@@ -0,0 +1,128 @@
+from collections import namedtuple
+from decimal import Decimal, ROUND_HALF_UP
+
+import numpy as np
+
+# Payroll rules: gross = salary / 30 * days worked, tax = 15% of gross, net = gross - tax.
+# All amounts are rounded half-up to the centavo, exactly as Decimal.quantize would.
+DAYS_PER_MONTH = 30
+TAX_PERCENT = 15
+
+Payslip = namedtuple('Payslip', ['gross', 'tax', 'net'])  # Float pesos, centavos / 100 (exact to 2 places)
+PayrollColumns = namedtuple('PayrollColumns', ['gross', 'tax', 'net'])  # int64 arrays of centavos
+
+
+# How close x * 100 may come to a half centavo before a float is rounded through its decimal repr
+HALF_TOLERANCE = 1e-6
+
+
+def _decimal_centavos(amount):
+    return int((Decimal(str(amount or 0)) * 100).quantize(Decimal(1), ROUND_HALF_UP))
+
+
+def to_centavos(amount):
+    """Exact integer centavos for a peso amount (float, int, str or Decimal), rounded half up.
+
+    Half up means half away from zero, as Decimal's ROUND_HALF_UP and MySQL's ROUND of exact values.
+    A float is rounded as its shortest repr would be (1.005 -> 101), like the Decimal it stands for.
+    """
+    if isinstance(amount, float):
+        # Same as _centavos_array. x * 100 is only ambiguous near a half (1.005 * 100 = 100.49999...):
+        # those few go through Decimal, the rest are rounded directly
+        scaled = amount * 100
+        centavos = round(scaled)
+        if abs(abs(scaled - centavos) - 0.5) < HALF_TOLERANCE:
+            return _decimal_centavos(float.__repr__(amount))  # Plain digits for numpy floats too
+        return centavos
+    return _decimal_centavos(amount)
+
+
+def centavos_to_decimal(centavos):
+    """Decimal pesos with 2 places for an integer (or numpy integer) centavo amount."""
+    return Decimal(int(centavos)).scaleb(-2)
+
+
+def as_decimals(column):
+    """List of Decimal pesos for a centavo column from compute_batch."""
+    return [centavos_to_decimal(c) for c in column.tolist()]
+
+
+def _div_half_up(num, den):
+    # Integer division rounding half away from zero, same as Decimal ROUND_HALF_UP
+    sign = -1 if num < 0 else 1
+    return sign * ((2 * abs(num) + den) // (2 * den))
+
+
+def _div_half_up_array(num, den):
+    return np.sign(num) * ((2 * np.abs(num) + den) // (2 * den))
+
+
+def _centavos_array(amounts):
+    # Salaries are DECIMAL(.., 2) values, so rounding x * 100 recovers the exact centavos; amounts
+    # near a half centavo are rounded by to_centavos, so both paths agree on every float
+    amounts = np.asarray(amounts, dtype=np.float64)
+    scaled = np.abs(amounts) * 100
+    centavos = (np.sign(amounts) * np.floor(scaled + 0.5)).astype(np.int64)
+    halves = np.flatnonzero(np.abs(scaled - np.floor(scaled) - 0.5) < HALF_TOLERANCE)
+    for i in halves.tolist():
+        centavos[i] = to_centavos(float(amounts[i]))
+    return centavos
+
+
+def compute_centavos(salary, days):
+    """(gross, tax, net) integer centavos for a single employee, the same amounts compute_batch gives."""
+    gross = to_centavos(salary) * int(days or 0)
+    if gross >= 0:  # _div_half_up without the sign handling
+        gross = (2 * gross + DAYS_PER_MONTH) // (2 * DAYS_PER_MONTH)
+        tax = (2 * gross * TAX_PERCENT + 100) // 200
+    else:
+        gross = _div_half_up(gross, DAYS_PER_MONTH)
+        tax = _div_half_up(gross * TAX_PERCENT, 100)
+    return gross, tax, gross - tax
+
+
+def compute(salary, days):
+    """Payslip for a single employee, for display. Scalar fast path that skips NumPy and Decimal.
+
+    Use compute_centavos (or centavos_to_decimal on its amounts) where exact sums are needed.
+    """
+    gross, tax, net = compute_centavos(salary, days)
+    return Payslip._make((gross / 100, tax / 100, net / 100))
+
+
+def compute_batch(salaries, days):
+    """Gross, tax and net for N employees from parallel salary/days columns, as centavo arrays."""
+    salaries = _centavos_array(salaries)
+    days = np.asarray(days, dtype=np.int64)
+    gross = _div_half_up_array(salaries * days, DAYS_PER_MONTH)
+    tax = _div_half_up_array(gross * TAX_PERCENT, 100)
+    return PayrollColumns(gross, tax, gross - tax)
+
+
+def sql_payslip(salary='salary', days='days_worked'):
+    """Payslip of SQL expressions computing the same amounts as compute(), for aggregates in MySQL.
+
+    MySQL rounds exact DECIMAL values half away from zero, so these match the kernel to the centavo.
+    """
+    gross = f"ROUND({salary} * {days} / {DAYS_PER_MONTH}, 2)"
+    tax = f"ROUND({gross} * {TAX_PERCENT} / 100, 2)"
+    return Payslip(gross, tax, f"({gross} - {tax})")
+
+
+def group_totals(keys, pay):
+    """Sum a PayrollColumns batch per key: {key: (payslips, gross, tax, net)} with centavo totals."""
+    groups, index = np.unique(np.asarray(keys, dtype=object), return_inverse=True)
+    totals = []
+    for column in pay:
+        sums = np.zeros(len(groups), dtype=np.int64)
+        np.add.at(sums, index, column)
+        totals.append(sums.tolist())
+    counts = np.bincount(index, minlength=len(groups)).tolist()
+    return {key: (counts[i], totals[0][i], totals[1][i], totals[2][i]) for i, key in enumerate(groups.tolist())}
+
+
+def compute_employees(employees):
+    """compute_batch over an iterable of employee dicts ('salary' and 'days' keys)."""
+    employees = list(employees)
+    return compute_batch([emp.get('salary') or 0 for emp in employees],
+                         [emp.get('days') or 0 for emp in employees])
@@ -0,0 +1,139 @@
+"""Headless payroll run for cron: processes every pending employee without the admin dashboard.
+
+Does what "Approve Payroll" does (db.save_payrolls), a chunk of employees at a time: each chunk
+is read by keyset and committed with db.save_payroll_chunk, which records the run's progress in
+the payroll_runs ledger in the same transaction. A run that stops part-way is marked failed (or
+left running if the process died) and the next run resumes it from its last committed chunk, with
+the same period and timestamp; employees already paid for the period are never paid again.
+
+    python payroll_runner.py                       # one process, chunks of 1000
+    python payroll_runner.py --workers 4           # departments spread over 4 processes
+    python payroll_runner.py --status              # recent runs from the ledger
+
+e.g. crontab: 0 2 * * * cd /opt/payroll && python payroll_runner.py >> payroll_run.log 2>&1
+Exits non-zero if a chunk fails or another run holds the lock.
+"""
+import argparse
+import multiprocessing
+import sys
+import time
+
+import pymysql
+
+import db
+
+CHUNK_SIZE = db.IN_CLAUSE_CHUNK  # Employees per transaction
+
+
+def pending_departments():
+    """Departments that have pending employees ('' for those without one), largest first."""
+    conn = db.get_connection()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("""
+                SELECT COALESCE(department, '') AS department, COUNT(*) AS employees
+                FROM employees WHERE pending = 1 AND deleted_at IS NULL
+                GROUP BY COALESCE(department, '')
+                ORDER BY employees DESC
+            """)
+            return [(row['department'], int(row['employees'])) for row in cursor.fetchall()]
+    finally:
+        conn.close()
+
+
+def run_department(department, run, chunk_size=CHUNK_SIZE, db_config=None):
+    """Pay the pending employees of one department (None = all) in committed chunks of run.
+
+    Returns (department, employees paid, chunks, seconds, employees skipped as already paid for the
+    period). A failing chunk raises; everything committed before it stays paid and recorded in the ledger.
+    """
+    if db_config is not None:  # A worker process: connect where the parent does
+        db.DB_CONFIG.update(db_config)
+        db.mark_payroll_rollup_ready()  # run_payroll ensured it before starting the workers
+    label = "all departments" if department is None else (department or "(no department)")
+    started = time.perf_counter()
+    employees = chunks = skipped = 0
+    after = None
+    while True:
+        page, after = db.load_employee_page(after, chunk_size, db.PAYROLL_COLUMNS, department=department, pending=True)
+        if not page:
+            break
+        paid, already_paid = db.save_payroll_chunk(run, page)
+        employees += paid
+        skipped += already_paid
+        chunks += 1
+        elapsed = time.perf_counter() - started
+        print(f"{label}: chunk {chunks}, {employees} employees ({employees / max(elapsed, 1e-9):,.0f}/s)", flush=True)
+        if after is None:
+            break
+    return department, employees, chunks, time.perf_counter() - started, skipped
+
+
+def _run_department(args):
+    return run_department(*args)
+
+
+def run_payroll(workers=1, chunk_size=CHUNK_SIZE):
+    """Pay every pending employee as one ledger run; with workers > 1, departments run in parallel processes.
+
+    Resumes the unfinished run if there is one. Returns (run, {department: (employees, chunks,
+    seconds, skipped)}), the department key being None when run in one process.
+    """
+    chunk_size = min(chunk_size, db.IN_CLAUSE_CHUNK)
+    with db.payroll_run_lock():
+        run = db.begin_payroll_run()
+        if run['chunks']:
+            print(f"Resuming payroll run {run['id']} for {run['period']:%B %Y}: {run['employees']} employees "
+                  f"were paid in {run['chunks']} chunks, up to {run['last_username']}", flush=True)
+        db.ensure_payroll_rollup()  # Once here rather than racing in every worker
+        try:
+            if workers > 1:
+                jobs = [(department, run, chunk_size, dict(db.DB_CONFIG)) for department, _ in pending_departments()]
+                # spawn: each worker opens its own connections and inherits no pool state
+                context = multiprocessing.get_context("spawn")
+                with context.Pool(min(workers, max(len(jobs), 1))) as pool:
+                    results = list(pool.imap_unordered(_run_department, jobs))
+            else:
+                results = [run_department(None, run, chunk_size)]
+        except Exception as e:
+            db.finish_payroll_run(run, error=e)
+            raise
+        db.finish_payroll_run(run)
+    return run, {department: tuple(stats) for department, *stats in results}
+
+
+def print_status(limit=10):
+    print(f"{'run':>5}  {'period':<8} {'status':<10} {'employees':>9} {'chunks':>6}  {'processed range':<29} error")
+    for run in db.load_payroll_runs(limit):
+        span = f"{run['first_username'] or ''}..{run['last_username'] or ''}"
+        print(f"{run['id']:>5}  {run['period']:%Y-%m}  {run['status']:<10} {run['employees']:>9} {run['chunks']:>6}  "
+              f"{span:<29} {run['error'] or ''}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, default=1, help="processes; departments are split between them")
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help="employees per transaction")
+    parser.add_argument('--status', action='store_true', help="list recent runs and exit")
+    args = parser.parse_args()
+    if args.status:
+        print_status()
+        sys.exit(0)
+    started = time.perf_counter()
+    try:
+        run, results = run_payroll(args.workers, args.chunk_size)
+    except (RuntimeError, pymysql.Error) as e:
+        print(f"Payroll Run Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    seconds = time.perf_counter() - started
+    total = sum(employees for employees, _, _, _ in results.values())
+    skipped = sum(already_paid for _, _, _, already_paid in results.values())
+    if skipped:
+        print(f"{skipped} pending employees skipped: already paid for {run['period']:%B %Y}")
+    if not total:
+        print("No employees paid" if skipped else "No pending employees")
+        sys.exit(0)
+    for department, (employees, chunks, elapsed, _) in sorted(results.items(), key=lambda item: -item[1][0]):
+        if department is not None:
+            print(f"  {department or '(no department)':<24} {employees:>9} employees {chunks:>6} chunks {elapsed:>8.1f}s")
+    print(f"Run {run['id']} ({run['period']:%B %Y}): paid {total} employees in {seconds:.1f}s ({total / max(seconds, 1e-9):,.0f} employees/s)")
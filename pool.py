@@ -0,0 +1,181 @@
+import threading
+import time
+from collections import deque
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection frees up within the pool's checkout timeout."""
+
+
+class PooledConnection:
+    """A checked-out connection. close() hands it back to the pool instead of closing the socket."""
+
+    def __init__(self, pool, raw):
+        self._pool = pool
+        self._raw = raw
+
+    def close(self):
+        if self._raw is not None:
+            raw, self._raw = self._raw, None
+            self._pool._release(raw)
+
+    def __getattr__(self, name):
+        if self._raw is None:
+            raise AttributeError(f"Connection already returned to the pool (accessing '{name}')")
+        return getattr(self._raw, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class ConnectionPool:
+    """Bounded, thread-safe pool of DB-API connections.
+
+    connect is any zero-argument callable returning a connection (pymysql.connect or an
+    in-process stand-in with ping/rollback/close). Connections idle longer than
+    max_idle_time seconds are closed; ones idle longer than health_check_after are
+    pinged before being handed out.
+    """
+
+    def __init__(self, connect, max_size=10, max_idle_time=300, health_check_after=30, timeout=10):
+        self._connect = connect
+        self.max_size = max_size
+        self.max_idle_time = max_idle_time
+        self.health_check_after = health_check_after
+        self.timeout = timeout
+        self._idle = deque()  # (raw, returned_at) pairs, most recently returned on the right
+        self._size = 0  # Open connections, idle + checked out
+        self._cond = threading.Condition()
+        self._closed = False
+        self._metrics = {
+            'checkouts': 0,
+            'wait_time_total': 0.0,
+            'wait_time_max': 0.0,
+            'timeouts': 0,
+            'connections_created': 0,
+            'connections_recycled': 0,
+            'health_check_failures': 0,
+        }
+
+    def get_connection(self):
+        """Check out a connection, waiting up to timeout seconds if the pool is exhausted."""
+        start = time.monotonic()
+        deadline = start + self.timeout
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Connection pool is closed")
+            expired = self._take_expired()
+            while True:
+                if self._idle:
+                    # LIFO keeps a few connections hot and lets the rest age out
+                    raw, returned_at = self._idle.pop()
+                    break
+                if self._size < self.max_size:
+                    self._size += 1
+                    raw, returned_at = None, None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._metrics['timeouts'] += 1
+                    raise PoolTimeout(f"No database connection available after {self.timeout}s "
+                                      f"(pool size {self.max_size})")
+                self._cond.wait(remaining)
+                if self._closed:
+                    raise RuntimeError("Connection pool is closed")
+            waited = time.monotonic() - start
+            self._metrics['checkouts'] += 1
+            self._metrics['wait_time_total'] += waited
+            self._metrics['wait_time_max'] = max(self._metrics['wait_time_max'], waited)
+        self._close_quietly(expired)
+
+        if raw is not None and time.monotonic() - returned_at > self.health_check_after:
+            if not self._is_healthy(raw):
+                with self._cond:
+                    self._metrics['health_check_failures'] += 1
+                self._close_quietly([raw])
+                raw = None
+        if raw is None:
+            raw = self._open()
+        return PooledConnection(self, raw)
+
+    def _open(self):
+        """Open a new connection for a slot that has already been reserved in _size."""
+        try:
+            raw = self._connect()
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._metrics['connections_created'] += 1
+        return raw
+
+    def _release(self, raw):
+        try:
+            # End any implicit read transaction so the next borrower doesn't see a stale snapshot
+            raw.rollback()
+        except Exception:
+            self._discard(raw)
+            return
+        with self._cond:
+            if not self._closed:
+                self._idle.append((raw, time.monotonic()))
+                self._cond.notify()
+                return
+        self._discard(raw)
+
+    def _discard(self, raw):
+        self._close_quietly([raw])
+        with self._cond:
+            self._size -= 1
+            self._cond.notify()
+
+    def _take_expired(self):
+        """Pop connections idle past max_idle_time (caller holds the lock, closes them after)."""
+        expired = []
+        cutoff = time.monotonic() - self.max_idle_time
+        while self._idle and self._idle[0][1] < cutoff:
+            expired.append(self._idle.popleft()[0])
+        self._size -= len(expired)
+        self._metrics['connections_recycled'] += len(expired)
+        return expired
+
+    @staticmethod
+    def _is_healthy(raw):
+        try:
+            raw.ping(reconnect=False)
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _close_quietly(connections):
+        for raw in connections:
+            try:
+                raw.close()
+            except Exception:
+                pass
+
+    def stats(self):
+        """Snapshot of pool size and checkout metrics."""
+        with self._cond:
+            stats = dict(self._metrics)
+            stats['size'] = self._size
+            stats['idle'] = len(self._idle)
+            stats['in_use'] = self._size - len(self._idle)
+            stats['max_size'] = self.max_size
+        return stats
+
+    def close(self):
+        """Close every idle connection. Checked-out connections are closed when returned."""
+        with self._cond:
+            idle = [raw for raw, _ in self._idle]
+            self._idle.clear()
+            self._size -= len(idle)
+            self._closed = True
+            self._cond.notify_all()
+        self._close_quietly(idle)
@@ -0,0 +1,64 @@
+"""Background purge of deleted employees: their payroll history first, then the employee row.
+
+Deleting an employee (db.delete_employees) only stamps employees.deleted_at, which hides them at
+once. This removes what is left, a batch at a time: each db.purge_deleted_employee call is one
+short transaction moving PURGE_BATCH payroll rows to payrolls_archive (or dropping them with
+--no-archive), and the purge pauses between batches so payroll runs and saves get the history
+table's locks in between. Safe to interrupt and run again; an employee saved again before the
+purge reaches them is restored and left alone. The admin dashboard runs it after every delete.
+
+    python purger.py                             # archive and purge everything deleted
+    python purger.py --batch 200 --pause 0.5     # gentler on a busy database
+    python purger.py --no-archive                # drop the history instead of archiving it
+
+e.g. crontab: 30 3 * * * cd /opt/payroll && python purger.py >> purge.log 2>&1
+"""
+import argparse
+import sys
+import time
+
+import pymysql
+
+import db
+
+PAUSE = 0.1  # Seconds between batches
+
+
+def purge_deleted(batch_size=db.PURGE_BATCH, pause=PAUSE, archive=True, stop=None, progress=None):
+    """Purge every deleted employee; returns (employees purged, payroll rows purged).
+
+    stop is an optional threading.Event checked between batches; progress(username, rows) is
+    called after each batch.
+    """
+    employees = rows = 0
+    while True:
+        usernames = db.load_deleted_usernames()
+        if not usernames:
+            return employees, rows
+        for username in usernames:
+            while True:
+                if stop is not None and stop.is_set():
+                    return employees, rows
+                purged = db.purge_deleted_employee(username, batch_size, archive)
+                if progress is not None:
+                    progress(username, purged)
+                if not purged:
+                    break
+                rows += purged
+                time.sleep(pause)
+            employees += 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--batch', type=int, default=db.PURGE_BATCH, help="payroll rows per transaction")
+    parser.add_argument('--pause', type=float, default=PAUSE, help="seconds to wait between batches")
+    parser.add_argument('--no-archive', action='store_true', help="delete history without copying it to payrolls_archive")
+    args = parser.parse_args()
+    started = time.perf_counter()
+    try:
+        employees, rows = purge_deleted(args.batch, args.pause, not args.no_archive)
+    except pymysql.Error as e:
+        print(f"Purge Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    print(f"Purged {employees} deleted employees and {rows} payroll rows in {time.perf_counter() - started:.1f}s")
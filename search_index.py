@@ -0,0 +1,235 @@
+"""In-memory prefix search over employees' username, name, email, employee ID and department.
+
+Every field is split into lowercase words at anything that isn't a letter or digit, and at
+letter/digit boundaries ("EMP0001234" -> "emp", "0001234" and "1234"). The index keeps the
+distinct words in one sorted list, a flat trie: the words starting with a prefix are one
+contiguous bisect range. Each word maps to the usernames that contain it: a set, or just the
+username when only one employee has the word (most ID and email words), which saves a set each.
+
+A query matches employees that have a word starting with each of its terms. search() walks the
+words of its most selective term, exact word first, and stops at the limit, so a lookup touches
+about limit candidates rather than the whole table. Each candidate is checked against the other
+terms by set membership in their words' postings, or, for a term as short as one letter, against
+the candidate's own words. Matches of the same word come in no particular order.
+
+The index is built on first use from one pass over the table. Writes through db.py reach it as a
+write listener; the written usernames are re-read in one query before the next search, so saves,
+deletes, imports and changes found by change_feed show up without a rebuild.
+"""
+import re
+import threading
+from bisect import bisect_left, insort
+
+import db
+
+SEARCH_COLUMNS = ('name', 'email', 'id', 'department')
+TOP_K = 20  # Matches returned by default
+REBUILD_THRESHOLD = 5000  # More stale employees than this: rebuild instead of patching
+NARROW_RANGE = 64  # Words a term may span and still be checked through their postings
+
+_WORD = re.compile(r"[^\W\d_]+|\d+")
+
+
+def words(text):
+    """Lowercase words of text, numbers also without their leading zeros."""
+    found = []
+    for word in _WORD.findall(text.lower()):
+        found.append(word)
+        if word[0] == '0' and word.strip('0'):
+            found.append(word.lstrip('0'))
+    return found
+
+
+def employee_words(username, emp):
+    """The distinct words an employee is found by."""
+    found = set(words(username))
+    for field in SEARCH_COLUMNS:
+        value = emp.get(field)
+        if value:
+            found.update(words(str(value)))
+    return found
+
+
+class EmployeeSearchIndex:
+    """Word -> usernames map over a sorted word list; thread-safe (searches run on AsyncDb threads)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._build_lock = threading.RLock()
+        self._clear()
+
+    def _clear(self):
+        self._words = []  # Sorted distinct words
+        self._postings = {}  # word -> username, or set of usernames
+        self._docs = {}  # username -> tuple of its words
+        self._stale = set()  # Usernames written since they were indexed
+        self._stale_all = False
+        self._building = False
+        self.built = False  # Searches wait for a build in progress
+
+    def __len__(self):
+        return len(self._docs)
+
+    def build(self):
+        """(Re)index every employee: one keyset-paged pass over the table."""
+        with self._build_lock:
+            with self._lock:
+                self._clear()
+                self._building = True  # Writes from here on are marked stale and patched in later
+            for page in db.iter_employee_pages(db.IN_CLAUSE_CHUNK, SEARCH_COLUMNS):
+                with self._lock:
+                    for username, emp in page.items():
+                        self._add(username, emp, insort_words=False)
+            with self._lock:
+                self._words = sorted(self._postings)  # Once, rather than an insort per new word
+                self._building = False
+                self.built = True
+
+    def ensure_built(self):
+        if not self.built:
+            with self._build_lock:
+                if not self.built:  # Or another thread just built it
+                    self.build()
+
+    def _add(self, username, emp, insort_words=True):
+        # Caller holds the lock; replaces what was indexed for username
+        doc = employee_words(username, emp)
+        if username in self._docs:
+            if doc == set(self._docs[username]):
+                return  # e.g. a payroll run only cleared the pending flag
+            self._remove(username)
+        self._docs[username] = tuple(doc)
+        postings = self._postings
+        for word in doc:
+            posting = postings.get(word)
+            if posting is None:
+                postings[word] = username
+                if insort_words:
+                    insort(self._words, word)
+            elif type(posting) is str:
+                postings[word] = {posting, username}
+            else:
+                posting.add(username)
+
+    def _remove(self, username):
+        # Caller holds the lock
+        postings = self._postings
+        for word in self._docs.pop(username, ()):
+            posting = postings[word]
+            if type(posting) is str:
+                del postings[word]
+                del self._words[bisect_left(self._words, word)]
+            else:
+                posting.discard(username)
+                if len(posting) == 1:
+                    postings[word] = next(iter(posting))
+
+    def add(self, username, emp):
+        """Index (or re-index) one employee from a record with SEARCH_COLUMNS."""
+        with self._lock:
+            self._add(username, emp)
+
+    def remove(self, username):
+        with self._lock:
+            self._remove(username)
+
+    def on_write(self, table, usernames=None):
+        # db write listener: only mark them, the re-read happens on the next search's thread
+        if table != 'employees' or not (self.built or self._building):
+            return
+        with self._lock:
+            if usernames is None:
+                self._stale_all = True
+            else:
+                self._stale.update(usernames)
+
+    def refresh(self):
+        """Re-read the employees written since they were indexed (or rebuild if that's most of them)."""
+        with self._lock:
+            stale, self._stale = list(self._stale), set()
+            rebuild, self._stale_all = self._stale_all, False
+        if rebuild or len(stale) > REBUILD_THRESHOLD:
+            self.build()
+            return
+        if stale:
+            fresh = db.get_employees(stale, columns=SEARCH_COLUMNS)
+            with self._lock:
+                for username in stale:
+                    if username in fresh:
+                        self._add(username, fresh[username])
+                    else:
+                        self._remove(username)
+
+    def _range(self, term):
+        # Caller holds the lock; [start, stop) of the words starting with term
+        start = bisect_left(self._words, term)
+        return start, bisect_left(self._words, term[:-1] + chr(ord(term[-1]) + 1), start)
+
+    def _postings_of(self, start, stop):
+        # Caller holds the lock; the username containers of the words in [start, stop)
+        return [(p,) if type(p) is str else p for p in map(self._postings.__getitem__, self._words[start:stop])]
+
+    def search(self, text, limit=TOP_K):
+        """Usernames of up to limit employees matching every word of text, exact words first."""
+        self.ensure_built()
+        if self._stale or self._stale_all:
+            self.refresh()
+        terms = sorted(set(words(text)), key=len, reverse=True)
+        if not terms:
+            return []
+        with self._lock:
+            words_, postings_of = self._words, self._postings
+            # (estimated employees, term, [start, stop), postings if the range is narrow)
+            ranges = []
+            for term in terms:
+                start, stop = self._range(term)
+                if start == stop:
+                    return []
+                if stop - start > NARROW_RANGE:
+                    ranges.append((stop - start, term, start, stop, None))  # At least one each
+                else:
+                    postings = self._postings_of(start, stop)
+                    ranges.append((sum(map(len, postings)), term, start, stop, postings))
+            ranges.sort(key=lambda item: item[0])
+            _, _, start, stop, _ = ranges[0]  # The most selective term leads
+            checks = [postings for *_, postings in ranges[1:] if postings is not None]
+            broad = [term for _, term, _, _, postings in ranges[1:] if postings is None]
+            docs = self._docs
+
+            def matches(username):
+                for postings in checks:
+                    for usernames in postings:
+                        if username in usernames:
+                            break
+                    else:
+                        return False
+                for term in broad:
+                    for word in docs[username]:
+                        if word.startswith(term):
+                            break
+                    else:
+                        return False
+                return True
+
+            found = []
+            seen = set()
+            for index in range(start, stop):
+                posting = postings_of[words_[index]]
+                for username in (posting,) if type(posting) is str else posting:
+                    if username in seen:
+                        continue
+                    seen.add(username)
+                    if matches(username):
+                        found.append(username)
+                        if len(found) >= limit:
+                            return found
+        return found
+
+
+_index = EmployeeSearchIndex()
+db.add_write_listener(_index.on_write)
+
+
+def get_index():
+    """The process-wide EmployeeSearchIndex."""
+    return _index
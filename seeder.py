@@ -1,7 +1,10 @@
 import pymysql
 import random
-import bcrypt
 from datetime import datetime, timedelta
+from db import PAYROLL_ROLLUP_SQL
+from migrations import migrate
+from passwords import DEFAULT_PASSWORD, hash_many
+from payroll import centavos_to_decimal, compute_centavos
 
 # DB Configuration (same as db.py)
 DB_CONFIG = {
@@ -40,7 +43,7 @@ def check_table_exists(table_name):
     conn = get_connection()
     try:
         with conn.cursor() as cursor:
-            cursor.execute(f"SHOW TABLES LIKE '{table_name}'")
+            cursor.execute("SHOW TABLES LIKE %s", (table_name,))
             result = cursor.fetchone()
             return bool(result)
     except pymysql.Error as e:
@@ -50,11 +53,13 @@ def check_table_exists(table_name):
         conn.close()
 
 def seed_employees():
-    """Seed 100 realistic dummy employees and optional payroll data."""
+    """Seed 100 realistic dummy employees and optional payroll data (see datagen.py for load-test volumes)."""
+    migrate()  # Creates the tables and indexes on a fresh database
     if not check_table_exists('employees'):
         print("Error: 'employees' table does not exist in database 'payroll_db'. Please create it first.")
         return
-    if not check_table_exists('payrolls'):
+    has_payrolls = check_table_exists('payrolls')  # Checked once, not per employee
+    if not has_payrolls:
         print("Warning: 'payrolls' table does not exist. Skipping payroll seeding.")
 
     conn = get_connection()
@@ -68,7 +73,11 @@ def seed_employees():
                 existing_usernames.add(row[0])
                 existing_emp_ids.add(row[1])
 
+            # Hash password "123" for all 100 employees at once, in parallel across cores
+            password_hashes = hash_many([DEFAULT_PASSWORD] * 100)
+
             inserted = 0
+            rollup = {}  # (month, department) -> [payrolls, gross, tax, net centavos] of the seeded history
             for i in range(100):  # Attempt to insert 100 employees
                 first = random.choice(first_names)
                 last = random.choice(last_names)
@@ -92,9 +101,7 @@ def seed_employees():
                 salary = round(random.uniform(20000, 100000), 2)
                 days_worked = random.randint(0, 30)
                 department = random.choice(departments)
-                # Hash password "123"
-                salt = bcrypt.gensalt()
-                password = bcrypt.hashpw(b"123", salt).decode()
+                password = password_hashes.pop()
                 status = 'Inactive' if random.random() < 0.1 else 'Active'  # 10% Inactive
                 pending = 1 if random.random() < 0.5 else 0  # 50% pending
                 created_at = datetime.now() - timedelta(days=random.randint(0, 365))
@@ -125,10 +132,9 @@ def seed_employees():
                     continue
 
                 # Seed payroll data for 50% of employees
-                if check_table_exists('payrolls') and random.random() < 0.5:
-                    gross = (salary / 30) * days_worked
-                    tax = 0.15 * gross
-                    net = gross - tax
+                if has_payrolls and random.random() < 0.5:
+                    pay = compute_centavos(salary, days_worked)
+                    gross, tax, net = (centavos_to_decimal(amount) for amount in pay)
                     processed_at = created_at + timedelta(days=random.randint(1, 30))
                     try:
                         cursor.execute("""
@@ -136,9 +142,17 @@ def seed_employees():
                             VALUES (%s, %s, %s, %s, %s)
                         """, (username, gross, tax, net, processed_at))
                         print(f"Inserted payroll for {username}")
+                        totals = rollup.setdefault((processed_at.date().replace(day=1), department), [0, 0, 0, 0])
+                        for k, amount in enumerate((1,) + pay):
+                            totals[k] += amount
                     except pymysql.Error as e:
                         print(f"Error inserting payroll for {username}: {e}")
 
+            # The history was inserted directly, not by save_payrolls: add it to the monthly totals
+            cursor.executemany(PAYROLL_ROLLUP_SQL, [
+                key + (count,) + tuple(centavos_to_decimal(c) for c in amounts)
+                for key, (count, *amounts) in rollup.items()
+            ])
             conn.commit()
             print(f"Seeded {inserted} dummy employees successfully.")
     except pymysql.Error as e:
@@ -0,0 +1,224 @@
+import sys
+from array import array
+
+from PyQt5 import sip
+from PyQt5.QtCore import QAbstractTableModel, QEvent, QModelIndex, QRect, Qt, pyqtSignal
+from PyQt5.QtGui import QColor, QPainter
+from PyQt5.QtWidgets import QStyledItemDelegate
+
+from payroll import centavos_to_decimal, compute_batch
+
+# Typed arrays for numeric fields (8 bytes per value instead of a boxed Python object);
+# 'gross' is derived from salary/days by the payroll kernel, in centavos
+NUMERIC_FIELDS = {'salary': 'd', 'days': 'q', 'gross': 'q'}
+# Repetitive strings shared between rows instead of stored once per employee
+INTERNED_FIELDS = {'department', 'status'}
+
+
+class EmployeeColumns:
+    """Compact column-oriented employee rows: one list or typed array per field, no dict per employee."""
+
+    def __init__(self, fields):
+        self.fields = tuple(fields)
+        self.clear()
+
+    def clear(self):
+        self.usernames = []
+        self.columns = {field: array(NUMERIC_FIELDS[field]) if field in NUMERIC_FIELDS else []
+                        for field in self.fields}
+
+    def __len__(self):
+        return len(self.usernames)
+
+    def append_page(self, page):
+        """Append an {username: employee_dict} page (e.g. from db.load_employee_page)."""
+        usernames = list(page)
+        rows = [page[username] for username in usernames]
+        self.usernames.extend(usernames)
+        for field, column in self.columns.items():
+            if field == 'gross':
+                column.extend(compute_batch([emp.get('salary') or 0 for emp in rows],
+                                            [emp.get('days') or 0 for emp in rows]).gross.tolist())
+            elif field in NUMERIC_FIELDS:
+                column.extend(emp.get(field) or 0 for emp in rows)
+            elif field in INTERNED_FIELDS:
+                column.extend(sys.intern(emp.get(field) or "") for emp in rows)
+            else:
+                column.extend(emp.get(field) for emp in rows)
+
+    def update_row(self, row, emp):
+        """Overwrite one loaded row with a fresh employee record."""
+        for field, column in self.columns.items():
+            if field == 'gross':
+                column[row] = int(compute_batch([emp.get('salary') or 0], [emp.get('days') or 0]).gross[0])
+            elif field in NUMERIC_FIELDS:
+                column[row] = emp.get(field) or 0
+            elif field in INTERNED_FIELDS:
+                column[row] = sys.intern(emp.get(field) or "")
+            else:
+                column[row] = emp.get(field)
+
+    def value(self, row, field):
+        if field == 'username':
+            return self.usernames[row]
+        return self.columns[field][row]
+
+    def remove(self, username):
+        """Drop an employee; returns the row it occupied, or None if it isn't loaded."""
+        try:
+            row = self.usernames.index(username)
+        except ValueError:
+            return None
+        del self.usernames[row]
+        for column in self.columns.values():
+            del column[row]
+        return row
+
+
+def format_value(field, value):
+    if field == 'gross':
+        return str(centavos_to_decimal(value))
+    return "" if value is None else str(value)
+
+
+class EmployeeTableModel(QAbstractTableModel):
+    """Read-only employee table over an EmployeeColumns store, filled page by page as the view scrolls.
+
+    columns is a list of (header, field) pairs; field 'username' shows the key and 'gross' the
+    calculated salary. load_page(after, on_page) must start loading the page that follows the
+    keyset cursor after and call on_page((page, next_after)) on the GUI thread when it arrives;
+    without one the model stays empty. Columns with field None are left blank for a delegate to paint.
+    """
+
+    def __init__(self, columns, load_page, parent=None):
+        super().__init__(parent)
+        self.headers = [header for header, _ in columns]
+        self.fields = [field for _, field in columns]
+        self.store = EmployeeColumns(f for f in self.fields if f not in (None, 'username'))
+        self._load_page = load_page
+        self._after = None
+        self._has_more = load_page is not None
+        self._loading = False
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.store)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.fields)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole or not index.isValid():
+            return None
+        field = self.fields[index.column()]
+        if field is None:
+            return None
+        return format_value(field, self.store.value(index.row(), field))
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.headers[section]
+        return super().headerData(section, orientation, role)
+
+    def username(self, row):
+        return self.store.usernames[row]
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self._has_more and not self._loading
+
+    def fetchMore(self, parent=QModelIndex()):
+        if not self.canFetchMore(parent):
+            return
+        self._loading = True
+        self._load_page(self._after, self._page_loaded)
+
+    def _page_loaded(self, result):
+        if sip.isdeleted(self):
+            return  # The view was closed while the page was loading
+        page, next_after = result
+        if page:
+            first = len(self.store)
+            self.beginInsertRows(QModelIndex(), first, first + len(page) - 1)
+            self.store.append_page(page)
+            self.endInsertRows()
+        self._after = next_after
+        self._has_more = next_after is not None
+        self._loading = False
+
+    def remove(self, username):
+        """Remove a deleted employee's row if it has been fetched."""
+        if username not in self.store.usernames:
+            return
+        row = self.store.usernames.index(username)
+        self.beginRemoveRows(QModelIndex(), row, row)
+        self.store.remove(username)
+        self.endRemoveRows()
+
+    def loaded(self, usernames):
+        """Those of usernames whose rows have been fetched."""
+        fetched = set(self.store.usernames)
+        return [username for username in usernames if username in fetched]
+
+    def update_rows(self, usernames, records):
+        """Refresh the fetched rows of usernames from records ({username: employee}), in place.
+
+        Usernames missing from records were deleted and their rows are removed. Other rows,
+        and the view's scroll position, are left alone.
+        """
+        rows = {username: row for row, username in enumerate(self.store.usernames)}
+        last = len(self.fields) - 1
+        for username in usernames:
+            row = rows.get(username)
+            if row is not None and username in records:
+                self.store.update_row(row, records[username])
+                self.dataChanged.emit(self.index(row, 0), self.index(row, last), [Qt.DisplayRole])
+        for username in usernames:
+            if username in rows and username not in records:
+                self.remove(username)
+
+    def reload(self):
+        """Drop every fetched row and start again from the first page."""
+        self.beginResetModel()
+        self.store.clear()
+        self._after = None
+        self._has_more = self._load_page is not None
+        self._loading = False
+        self.endResetModel()
+        self.fetchMore()
+
+
+class ButtonDelegate(QStyledItemDelegate):
+    """Paints a button-looking action in every cell of a column and reports clicks by row.
+
+    Nothing is created per row: the view only paints the cells that are visible.
+    """
+    clicked = pyqtSignal(int)  # row
+
+    def __init__(self, text, background, foreground, parent=None):
+        super().__init__(parent)
+        self.text = text
+        self.background = QColor(background)
+        self.foreground = QColor(foreground)
+
+    def _button_rect(self, rect):
+        return QRect(rect).adjusted(6, 4, -6, -4)
+
+    def paint(self, painter, option, index):
+        painter.save()
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.setPen(Qt.NoPen)
+        painter.setBrush(self.background)
+        button = self._button_rect(option.rect)
+        painter.drawRoundedRect(button, 8, 8)
+        font = painter.font()
+        font.setBold(True)
+        painter.setFont(font)
+        painter.setPen(self.foreground)
+        painter.drawText(button, Qt.AlignCenter, self.text)
+        painter.restore()
+
+    def editorEvent(self, event, model, option, index):
+        if (event.type() == QEvent.MouseButtonRelease and event.button() == Qt.LeftButton
+                and self._button_rect(option.rect).contains(event.pos())):
+            self.clicked.emit(index.row())
+            return True
+        return super().editorEvent(event, model, option, index)
@@ -0,0 +1,44 @@
+"""ChangeFeed reports other processes' writes, not the ones this process already announced."""
+import pytest
+
+import change_feed
+import db
+import sqlite_standin
+
+
+@pytest.fixture
+def conn():
+    conn = sqlite_standin.install()
+    sqlite_standin.populate(conn, 10)
+    return conn
+
+
+def _external(conn, sql):
+    # Another process: straight to the database, past db.py's write listeners
+    conn.raw.execute(sql)
+    conn.raw.commit()
+
+
+def test_local_writes_are_not_reported_again(conn):
+    feed = change_feed.ChangeFeed()
+    assert feed.poll() == change_feed.NO_CHANGES
+    db.update_employees({'days': 3}, usernames=['user0000001', 'user0000002'])
+    _external(conn, "UPDATE employees SET days_worked = 9 WHERE username = 'user0000005'")
+    assert feed.poll() == change_feed.Changes(['user0000005'], [])
+
+
+def test_local_payroll_runs_are_not_reported_again(conn):
+    feed = change_feed.ChangeFeed()
+    feed.poll()
+    db.save_payrolls()
+    _external(conn, "INSERT INTO payrolls (employee_username, gross, tax, net) VALUES ('user0000007', 1, 0, 1)")
+    assert feed.poll() == change_feed.Changes([], ['user0000007'])
+    assert feed.poll() == change_feed.NO_CHANGES
+
+
+def test_external_writes_are_not_taken_for_local_ones(conn):
+    feed = change_feed.ChangeFeed()
+    feed.poll()
+    change_feed.publish(change_feed.Changes(['user0000003'], []))
+    _external(conn, "UPDATE employees SET days_worked = 9 WHERE username = 'user0000003'")
+    assert feed.poll() == change_feed.Changes(['user0000003'], [])
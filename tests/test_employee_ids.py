@@ -0,0 +1,49 @@
+"""save_employees and the CSV import never let one employee's ID overwrite another employee."""
+import pytest
+
+import bulk_io
+import db
+import sqlite_standin
+
+
+@pytest.fixture
+def conn():
+    conn = sqlite_standin.install()
+    sqlite_standin.populate(conn, 3)
+    return conn
+
+
+def _new(name, emp_id):
+    return {'name': name, 'id': emp_id, 'salary': 1000, 'days': 1, 'password': 'x', 'status': 'Active'}
+
+
+def test_save_refuses_an_id_held_by_another_employee(conn):
+    with pytest.raises(ValueError, match="already belongs to 'user0000001'"):
+        db.save_employees({'intruder': _new("Intruder", 'EMP0000001')})
+    assert db.get_employee('intruder') is None
+    assert db.get_employee('user0000001')['name'] == "Employee 1"
+
+
+def test_save_refuses_an_id_given_twice_in_one_batch(conn):
+    with pytest.raises(ValueError, match="already belongs to 'a'"):
+        db.save_employees({'a': _new("A", 'NEW'), 'b': _new("B", 'NEW')})
+    assert db.get_employee('a') is None
+
+
+def test_save_keeps_an_employees_own_id(conn):
+    db.save_employees({'user0000001': _new("Renamed", 'EMP0000001')})
+    assert db.get_employee('user0000001')['name'] == "Renamed"
+
+
+def test_import_rejects_rows_with_a_taken_id(conn, tmp_path):
+    path = tmp_path / "employees.csv"
+    path.write_text("username,id,name,salary,days\n"
+                    "new1,EMP0000002,New 1,1000,1\n"
+                    "new2,NEW,New 2,1000,1\n"
+                    "new3,NEW,New 3,1000,1\n")
+    result = bulk_io.import_employees(str(path))
+    assert (result.imported, result.rejected) == (1, 2)
+    assert [line for line, _ in result.errors] == [2, 4]
+    assert db.get_employee('user0000002')['name'] == "Employee 2"
+    assert db.get_employee('new1') is None
+    assert db.get_employee('new2')['id'] == 'NEW'
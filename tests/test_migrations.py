@@ -0,0 +1,128 @@
+"""Migrations applied to a database with the baseline (pre-migrations) schema.
+
+The full run needs a MySQL/MariaDB server reachable with db.DB_CONFIG; it uses the scratch
+database PAYROLL_TEST_DB (default payroll_migration_test), dropped and recreated, and is skipped
+when no server answers. The rollup backfill also runs on the SQLite stand-in.
+"""
+import os
+from datetime import datetime
+
+import pymysql
+import pytest
+
+import db
+import migrations
+import sqlite_standin
+
+TEST_DB = os.environ.get('PAYROLL_TEST_DB', 'payroll_migration_test')
+
+# The tables as the baseline app expected them, made by hand in XAMPP
+BASELINE_EMPLOYEES = """
+    CREATE TABLE employees (
+        username VARCHAR(100) PRIMARY KEY,
+        name VARCHAR(255) NOT NULL,
+        email VARCHAR(255),
+        emp_id VARCHAR(50),
+        salary DECIMAL(12,2),
+        days_worked INT,
+        department VARCHAR(100),
+        password VARCHAR(255),
+        status VARCHAR(20),
+        pending TINYINT(1),
+        created_at TIMESTAMP NULL,
+        updated_at TIMESTAMP NULL
+    )
+"""
+BASELINE_PAYROLLS = """
+    CREATE TABLE payrolls (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        employee_username VARCHAR(100) NOT NULL,
+        gross DECIMAL(12,2) NOT NULL,
+        tax DECIMAL(12,2) NOT NULL,
+        net DECIMAL(12,2) NOT NULL,
+        processed_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+EMPLOYEES = [
+    # Blank IDs were stored as '' by the baseline GUI
+    ('ana', 'Ana', '', 'IT'),
+    ('ben', 'Ben', '', 'HR'),
+    ('cy', 'Cy', 'EMP001', None),
+]
+PAYROLLS = [
+    ('ana', 1000, 150, 850, datetime(2026, 1, 15)),
+    ('ben', 2000, 300, 1700, datetime(2026, 1, 20)),
+    ('cy', 3000, 450, 2550, datetime(2026, 2, 3)),
+]
+
+
+def _insert_baseline_rows(cursor, placeholder):
+    values = ", ".join([placeholder] * 4)
+    cursor.executemany(f"INSERT INTO employees (username, name, emp_id, department) VALUES ({values})", EMPLOYEES)
+    values = ", ".join([placeholder] * 5)
+    cursor.executemany(f"INSERT INTO payrolls (employee_username, gross, tax, net, processed_at) VALUES ({values})",
+                       PAYROLLS)
+
+
+def _rollup(rows):
+    return sorted((str(row['month'])[:7], row['department'], int(row['payrolls']), float(row['net']))
+                  for row in rows)
+
+
+EXPECTED_ROLLUP = [('2026-01', 'HR', 1, 1700.0), ('2026-01', 'IT', 1, 850.0), ('2026-02', '', 1, 2550.0)]
+
+
+def test_rollup_backfill_before_payroll_period_column():
+    conn = sqlite_standin.SQLStandInConnection()
+    conn.raw.executescript("DROP TABLE IF EXISTS payroll_monthly; DROP TABLE payrolls; DROP TABLE employees;")
+    conn.raw.execute(BASELINE_EMPLOYEES)
+    conn.raw.execute(BASELINE_PAYROLLS.replace("INT AUTO_INCREMENT PRIMARY KEY", "INTEGER PRIMARY KEY AUTOINCREMENT"))
+    _insert_baseline_rows(conn.raw, "?")
+    with conn.cursor() as cursor:
+        migrations.create_monthly_rollup(cursor)
+        cursor.execute("SELECT * FROM payroll_monthly")
+        assert _rollup(cursor.fetchall()) == EXPECTED_ROLLUP
+
+
+@pytest.fixture
+def baseline_mysql():
+    config = {key: value for key, value in db.DB_CONFIG.items() if key != 'db'}
+    try:
+        server = pymysql.connect(**config)
+    except pymysql.err.OperationalError as e:
+        pytest.skip(f"No MySQL server: {e}")
+    saved = dict(db.DB_CONFIG)
+    try:
+        with server.cursor() as cursor:
+            cursor.execute(f"DROP DATABASE IF EXISTS `{TEST_DB}`")
+            cursor.execute(f"CREATE DATABASE `{TEST_DB}`")
+            cursor.execute(f"USE `{TEST_DB}`")
+            cursor.execute(BASELINE_EMPLOYEES)
+            cursor.execute(BASELINE_PAYROLLS)
+            _insert_baseline_rows(cursor, "%s")
+        server.commit()
+        db.DB_CONFIG['db'] = TEST_DB
+        db.configure_pool()
+        yield
+    finally:
+        db.DB_CONFIG.clear()
+        db.DB_CONFIG.update(saved)
+        db.configure_pool()
+        with server.cursor() as cursor:
+            cursor.execute(f"DROP DATABASE IF EXISTS `{TEST_DB}`")
+        server.close()
+
+
+def test_migrate_baseline_schema(baseline_mysql):
+    assert migrations.migrate() == [version for version, _, _ in migrations.MIGRATIONS]
+    assert all(applied for _, _, applied in migrations.status())
+    assert migrations.migrate() == []
+    conn = db.get_connection()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT * FROM payroll_monthly")
+            assert _rollup(cursor.fetchall()) == EXPECTED_ROLLUP
+            cursor.execute("SELECT COUNT(*) AS blank FROM employees WHERE emp_id IS NULL")
+            assert cursor.fetchone()['blank'] == 2
+    finally:
+        conn.close()
@@ -0,0 +1,247 @@
+import time
+
+from PyQt5 import sip
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, QTimer, pyqtSignal
+
+import change_feed
+import passwords
+from employee_cache import get_cache
+from instrumentation import span
+
+
+class PasswordService(QObject):
+    """Runs bcrypt hashing/verification in the passwords process pool and reports back by signal.
+
+    Results are delivered on the GUI thread. tag is any object the caller passes along to match a
+    result to its request (e.g. the employee being saved).
+    """
+    hashed = pyqtSignal(object, str)  # tag, bcrypt hash
+    verified = pyqtSignal(object, bool)  # tag, password matches
+    failed = pyqtSignal(object, str)  # tag, error message
+
+    def hash(self, password, tag=None):
+        """Start hashing password; emits hashed(tag, hash) or failed(tag, message)."""
+        future = passwords.submit_hash(password)
+        future.add_done_callback(lambda f: self._deliver(f, self.hashed, tag))
+
+    def verify(self, password, hashed, tag=None):
+        """Start checking password against hashed; emits verified(tag, ok) or failed(tag, message)."""
+        future = passwords.submit_check(password, hashed)
+        future.add_done_callback(lambda f: self._deliver(f, self.verified, tag))
+
+    def _deliver(self, future, signal, tag):
+        # Runs on the executor's callback thread; emitting queues the signal to the GUI thread
+        try:
+            try:
+                result = future.result()
+            except Exception as e:
+                self.failed.emit(tag, str(e))
+                return
+            signal.emit(tag, result)
+        except RuntimeError:
+            pass  # The window owning this service was closed before the job finished
+
+
+class ProgressReporter(QObject):
+    """Progress callback for long db.py jobs, safe to call from the worker thread.
+
+    Calling it with (done, total) emits changed(done, total), delivered on the GUI thread.
+    """
+    changed = pyqtSignal(object, object)
+
+    def __call__(self, done, total):
+        try:
+            self.changed.emit(done, total)
+        except RuntimeError:
+            pass  # The window showing the progress was closed
+
+
+class EmployeeChangeNotifier(QObject):
+    """Relays the shared employee cache's change notifications as a signal on the GUI thread.
+
+    changed(usernames) carries the list of usernames written, or None when any employee may
+    have changed. Stops listening when its parent window is destroyed.
+    """
+    changed = pyqtSignal(object)
+
+    def __init__(self, parent=None, cache=None):
+        super().__init__(parent)
+        cache = cache or get_cache()
+        relay = self._relay
+        cache.subscribe(relay)
+        self.destroyed.connect(lambda *_: cache.unsubscribe(relay))
+
+    def _relay(self, usernames):
+        # Runs on the thread that committed the write; emitting queues the signal to the GUI thread
+        try:
+            self.changed.emit(usernames)
+        except RuntimeError:
+            pass  # Destroyed between the write and the notification
+
+
+class _TaskSignals(QObject):
+    done = pyqtSignal(object, object, object)  # task, result, error message (None on success)
+
+
+class DbTask(QRunnable):
+    """One db.py call run on a QThreadPool thread."""
+
+    def __init__(self, key, func, args, kwargs):
+        super().__init__()
+        self.setAutoDelete(False)  # AsyncDb keeps the reference until the result is delivered
+        self.key = key
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.callbacks = []  # (on_result, on_error) pairs, more than one when requests coalesce
+        self.cancelled = False
+        self.signals = _TaskSignals()
+        self.submitted = time.perf_counter()
+
+    def run(self):
+        if self.cancelled:
+            return
+        try:
+            # Time spent waiting for a pool thread shows up as queued_ms
+            with span(f"async.{self.key}", queued_ms=round((time.perf_counter() - self.submitted) * 1000, 2)):
+                result = self.func(*self.args, **self.kwargs)
+        except Exception as e:
+            result, error = None, str(e) or type(e).__name__
+        else:
+            error = None
+        try:
+            self.signals.done.emit(self, result, error)
+        except RuntimeError:
+            pass  # The application quit while the call was running
+
+
+class AsyncDb(QObject):
+    """Runs db.py operations off the GUI thread and delivers their results by signal.
+
+    Every request has a key naming what it loads or changes. A request whose key is already in
+    flight with the same arguments is coalesced onto the running one (both callers get its
+    result); with different arguments, or replace=True, the older request is cancelled and only
+    the newest result is delivered. Queries already running on the server are not interrupted,
+    their results are just dropped.
+
+    Writes (write=True) are never coalesced, replaced or cancelled: each one runs and reports its
+    own result or error, however many with the same key are in flight.
+    """
+    finished = pyqtSignal(str, object)  # key, result
+    failed = pyqtSignal(str, str)  # key, error message
+
+    def __init__(self, parent=None, thread_pool=None):
+        super().__init__(parent)
+        self._thread_pool = thread_pool or QThreadPool.globalInstance()
+        self._tasks = {}  # key -> DbTask in flight
+        self._writes = set()  # Write DbTasks in flight
+
+    def run(self, key, func, *args, on_result=None, on_error=None, replace=False, write=False, **kwargs):
+        """Call func(*args, **kwargs) on a worker thread; on_result/on_error run on the GUI thread.
+
+        Pass write=True for calls that change data, so they always run (see the class docstring).
+        """
+        if write:
+            task = self._start(key, func, args, kwargs, on_result, on_error)
+            self._writes.add(task)
+            return task
+        task = self._tasks.get(key)
+        if task is not None and not replace and task.func == func and (task.args, task.kwargs) == (args, kwargs):
+            if (on_result, on_error) not in task.callbacks:
+                task.callbacks.append((on_result, on_error))
+            return task
+        self.cancel(key)
+        task = self._start(key, func, args, kwargs, on_result, on_error)
+        self._tasks[key] = task
+        return task
+
+    def _start(self, key, func, args, kwargs, on_result, on_error):
+        task = DbTask(key, func, args, kwargs)
+        task.callbacks.append((on_result, on_error))
+        task.signals.done.connect(self._deliver)
+        self._thread_pool.start(task)
+        return task
+
+    def is_running(self, key):
+        return key in self._tasks or any(task.key == key for task in self._writes)
+
+    def cancel(self, key):
+        """Drop the request for key: it won't start if still queued, and its result is discarded.
+
+        Writes are not affected.
+        """
+        task = self._tasks.pop(key, None)
+        if task is not None:
+            task.cancelled = True
+            self._thread_pool.tryTake(task)
+
+    def cancel_all(self):
+        for key in list(self._tasks):
+            self.cancel(key)
+
+    def _deliver(self, task, result, error):
+        # Runs on the GUI thread (queued from the worker)
+        if task in self._writes:
+            self._writes.discard(task)
+        elif task.cancelled or self._tasks.get(task.key) is not task:
+            return
+        else:
+            del self._tasks[task.key]
+        with span(f"deliver.{task.key}"):
+            if error is None:
+                self.finished.emit(task.key, result)
+            else:
+                self.failed.emit(task.key, error)
+            for on_result, on_error in task.callbacks:
+                if error is None and on_result is not None:
+                    on_result(result)
+                elif error is not None and on_error is not None:
+                    on_error(error)
+
+
+class ChangeFeedPoller(QObject):
+    """Polls a change_feed.ChangeFeed every interval seconds while a watched window is open.
+
+    Each poll runs on a pool thread; what it finds is published on the GUI thread to db.py's
+    write listeners, which refresh the shared caches and, through EmployeeChangeNotifier, the
+    changed rows of every open view. Use the process-wide instance from change_feed_poller().
+    """
+
+    def __init__(self, feed=None, interval=change_feed.POLL_INTERVAL, parent=None):
+        super().__init__(parent)
+        self.feed = feed or change_feed.ChangeFeed()
+        self.db = AsyncDb(self)
+        self.timer = QTimer(self)
+        self.timer.setInterval(int(interval * 1000))
+        self.timer.timeout.connect(self._tick)
+        self._windows = []
+
+    def watch(self, window):
+        """Poll while window is open (shown and not destroyed)."""
+        self._windows.append(window)
+        if not self.timer.isActive():
+            self.feed.reset()  # Changes made while nothing was watching were never shown stale
+            self.timer.start()
+            self.poll()  # Sets the high-water marks
+
+    def _tick(self):
+        self._windows = [w for w in self._windows if not sip.isdeleted(w) and w.isVisible()]
+        if not self._windows:
+            self.timer.stop()
+            return
+        self.poll()
+
+    def poll(self):
+        # A poll still running is coalesced with this one rather than overlapping it
+        self.db.run("change_feed", self.feed.poll, on_result=change_feed.publish)
+
+
+_poller = None
+
+
+def change_feed_poller():
+    """The process-wide ChangeFeedPoller (needs a QApplication)."""
+    global _poller
+    if _poller is None:
+        _poller = ChangeFeedPoller()
+    return _poller